@@ -2,23 +2,35 @@ from __future__ import annotations
 
 import argparse
 
-from src.config.settings import ensure_directories, load_settings
+from src.common.profiling import StartupProfile
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Validate config and paths")
     parser.add_argument("--config", default="config/default.yaml")
+    parser.add_argument("--profile-startup", action="store_true", help="Print import/load timings to stderr")
     args = parser.parse_args()
 
-    settings = load_settings(args.config)
-    ensure_directories(settings)
+    profile = StartupProfile(enabled=args.profile_startup)
+    settings_module = profile.import_module("src.config.settings")
+    with profile.stage("load settings"):
+        settings = settings_module.load_settings(args.config)
+        settings_module.ensure_directories(settings)
 
     print("Config loaded successfully")
     print(f"Version: {settings.version}")
     print(f"Raw data dir: {settings.raw_data_dir}")
     print(f"Chunk output path: {settings.chunk_output_path}")
-    print(f"BM25 index path: {settings.bm25_index_path}")
-    print(f"Dense index dir: {settings.dense_index_dir}")
+    # The same location IndexManager serves: CURRENT in the versioned store
+    # when one is published, otherwise the flat paths.
+    build_indices = profile.import_module("src.indexing.build_indices")
+    with profile.stage("resolve index location"):
+        location = build_indices.resolve_index_location(settings)
+    layout = "versioned" if location.immutable else "flat"
+    print(f"Index version: {location.version} ({layout})")
+    print(f"BM25 index path: {location.bm25_path} ({'found' if location.bm25_path.exists() else 'missing'})")
+    print(f"Dense index dir: {location.dense_dir} ({'found' if (location.dense_dir / 'embeddings.npy').exists() else 'missing'})")
+    profile.print_report()
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ from typing import Any, Dict, List
 from src.app.service import QAService
 from src.config.settings import load_settings
 from src.eval.dataset import load_eval_dataset
+from src.eval.run_eval import eval_settings
 
 
 def _write_json(path: Path, payload: Dict[str, Any]) -> None:
@@ -67,7 +68,7 @@ def _write_markdown(path: Path, report: Dict[str, Any]) -> None:
 
 
 def build_report(config_path: Path, dataset_path: Path, top_k: int, sample_limit: int) -> Dict[str, Any]:
-    settings = load_settings(config_path)
+    settings = eval_settings(load_settings(config_path))
     service = QAService(settings)
     items = load_eval_dataset(dataset_path)
 
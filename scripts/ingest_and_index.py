@@ -10,17 +10,23 @@ from src.ingestion.pipeline import ingest_and_chunk
 def main() -> None:
     parser = argparse.ArgumentParser(description="Ingest documents and build indices")
     parser.add_argument("--config", default="config/default.yaml")
+    parser.add_argument("--full", action="store_true", help="Re-parse every file, ignoring the ingestion manifest")
     args = parser.parse_args()
 
     settings = load_settings(args.config)
     ensure_directories(settings)
-    chunks = ingest_and_chunk(settings)
-    build_all_indices(settings)
-
-    print(f"Ingested {len(chunks)} chunks")
+    report = ingest_and_chunk(settings, full=args.full)
+    location = build_all_indices(settings, changes=report.changes)
+
+    print(f"Ingested {report.chunks} chunks ({len(report.files)} files parsed) in {report.elapsed_s:.1f}s")
+    if report.changes is not None:
+        print("Changes: " + ", ".join(f"{name}={count}" for name, count in report.changes.summary().items()))
+    for failed in report.failed:
+        print(f"Skipped {failed.path}: {failed.error}")
     print(f"Chunk file: {settings.chunk_output_path}")
-    print(f"BM25 index: {settings.bm25_index_path}")
-    print(f"Dense index dir: {settings.dense_index_dir}")
+    print(f"Index version: {location.version}")
+    print(f"BM25 index: {location.bm25_path}")
+    print(f"Dense index dir: {location.dense_dir}")
 
 
 if __name__ == "__main__":
@@ -5,16 +5,25 @@ import os
 
 import uvicorn
 
+from src.config.settings import load_settings
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run FastAPI server")
     parser.add_argument("--config", default="config/default.yaml")
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: serving.workers)")
+    parser.add_argument("--profile-startup", action="store_true", help="Log import/load timings once the service is loaded")
     args = parser.parse_args()
 
     os.environ["APP_CONFIG_PATH"] = args.config
-    uvicorn.run("src.api.app:app", host=args.host, port=args.port, reload=False)
+    if args.profile_startup:
+        os.environ["APP_PROFILE_STARTUP"] = "1"
+    workers = args.workers if args.workers is not None else load_settings(args.config).serving_workers
+    # Workers are separate processes; with serving.mmap_indices they map the
+    # same immutable index files instead of each loading a private copy.
+    uvicorn.run("src.api.app:app", host=args.host, port=args.port, reload=False, workers=max(1, workers))
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ from __future__ import annotations
 import argparse
 import json
 
-from src.eval.run_eval import run_full_eval
+from src.common.profiling import StartupProfile
 
 
 def main() -> None:
@@ -11,9 +11,12 @@ def main() -> None:
     parser.add_argument("--config", default="config/default.yaml")
     parser.add_argument("--top_k", type=int, default=5)
     parser.add_argument("--dataset", default=None, help="Optional dataset JSONL path override")
+    parser.add_argument("--profile-startup", action="store_true", help="Print import/load timings to stderr")
     args = parser.parse_args()
 
-    report = run_full_eval(args.config, top_k=args.top_k, dataset_path=args.dataset)
+    profile = StartupProfile(enabled=args.profile_startup)
+    run_eval = profile.import_module("src.eval.run_eval")
+    report = run_eval.run_full_eval(args.config, top_k=args.top_k, dataset_path=args.dataset, profile=profile)
     output = {
         "retrieval": {
             "bm25": report["retrieval"]["bm25"]["summary"],
@@ -25,6 +28,7 @@ def main() -> None:
         "answer": report["answer"].get("summary", {}),
     }
     print(json.dumps(output, indent=2, ensure_ascii=False))
+    profile.print_report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import argparse
+import logging
+
+from src.config.settings import ensure_directories, load_settings
+from src.ingestion.watcher import IngestionWatcher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Watch raw_data_dir and publish index versions as documents change")
+    parser.add_argument("--config", default="config/default.yaml")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    settings = load_settings(args.config)
+    ensure_directories(settings)
+    # API workers pick up each published version with index.watch_interval_s.
+    try:
+        IngestionWatcher(settings).run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,41 @@
 from __future__ import annotations
 
+import hmac
+import json
+import logging
+import math
 import os
+import uuid
+from contextlib import asynccontextmanager
 from functools import lru_cache
+from typing import Callable, Iterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
-from src.api.models import AskRequest, AskResponse, HealthResponse, SearchRequest, SearchResponse
+from src.api.models import (
+    AskBatchItem,
+    AskBatchRequest,
+    AskBatchResponse,
+    AskRequest,
+    AskResponse,
+    HealthResponse,
+    LivenessResponse,
+    ProfileRequest,
+    ReloadResponse,
+    ReadinessResponse,
+    SearchBatchItem,
+    SearchBatchRequest,
+    SearchBatchResponse,
+    SearchRequest,
+    SearchResponse,
+    StatsResponse,
+)
+from src.app.admission import AdmissionRejected
 from src.app.service import QAService
+from src.common.metrics import REGISTRY
+from src.common.profiling import ProfilerBusy, StartupProfile, record_service_loads
+from src.common.tracing import NOOP_SPAN, begin_span, end_span, use_span, valid_trace_id
 from src.config.settings import ensure_directories, load_settings
 
 
@@ -18,36 +47,242 @@ def get_service() -> QAService:
     return QAService(settings)
 
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Load indices at startup instead of on the first request. The transformers
+    # model (if configured) keeps loading in the background after this returns.
+    profile = StartupProfile(enabled=os.getenv("APP_PROFILE_STARTUP", "").strip() == "1")
+    try:
+        with profile.stage("construct QAService"):
+            service = get_service()
+        record_service_loads(profile, service)
+    except Exception:
+        logger.exception("Service failed to load at startup; /health/ready will report not ready")
+    if profile.enabled:
+        logger.warning("%s", profile.report())
+    yield
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    # Keeps the admission slot for as long as the response runs and releases it
+    # however it ends: body sent, client gone before or during the body, or an
+    # error while streaming. A generator's finally would not run when the body
+    # never starts.
+    def __init__(self, content: Iterator[str], release: Callable[[], None], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+class _SpanEndingResponse:
+    # Wraps the response returned by the tracing middleware so the request span
+    # ends once the body has been sent (or the client is gone), not when the
+    # handler returns: a streamed body such as /ask/stream does its retrieval
+    # and generation after that.
+    def __init__(self, response, span) -> None:
+        self.response = response
+        self.span = span
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    async def __call__(self, scope, receive, send) -> None:
+        error = None
+        try:
+            await self.response(scope, receive, send)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            end_span(self.span, error)
+
+
+def _admin_authorized(token: str | None) -> bool:
+    expected = os.getenv("APP_ADMIN_TOKEN", "")
+    return bool(expected) and hmac.compare_digest((token or "").encode("utf-8"), expected.encode("utf-8"))
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Vietnamese Internal Docs RAG Assistant", version="0.1.0")
+    app = FastAPI(title="Vietnamese Internal Docs RAG Assistant", version="0.1.0", lifespan=_lifespan)
+
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        # Every response carries X-Trace-Id (the caller's, if valid) so a slow
+        # request can be matched to its spans in the trace file.
+        trace_id = valid_trace_id(request.headers.get("x-trace-id")) or uuid.uuid4().hex
+        span = begin_span(f"{request.method} {request.url.path}", trace_id=trace_id)
+        try:
+            with use_span(span):
+                response = await call_next(request)
+        except BaseException as exc:
+            end_span(span, exc)
+            raise
+        span.set_attribute("http.status_code", response.status_code)
+        response.headers["X-Trace-Id"] = trace_id
+        if span is NOOP_SPAN:
+            return response
+        return _SpanEndingResponse(response, span)
+
+    @app.exception_handler(AdmissionRejected)
+    def admission_rejected(request: Request, exc: AdmissionRejected) -> JSONResponse:
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": str(exc), "reason": exc.reason},
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_s)))},
+        )
 
     @app.get("/health", response_model=HealthResponse)
     def health() -> HealthResponse:
         status = get_service().health()
         return HealthResponse(**status.__dict__)
 
+    @app.get("/health/live", response_model=LivenessResponse)
+    def health_live() -> LivenessResponse:
+        return LivenessResponse(status="ok")
+
+    @app.get("/health/ready", response_model=ReadinessResponse)
+    def health_ready():
+        try:
+            readiness = get_service().readiness()
+        except Exception as exc:
+            payload = ReadinessResponse(ready=False, indices_loaded=False, llm_state="not_loaded", llm_backend="", error=str(exc))
+            return JSONResponse(status_code=503, content=payload.model_dump())
+        payload = ReadinessResponse(**readiness.__dict__)
+        return JSONResponse(status_code=200 if readiness.ready else 503, content=payload.model_dump())
+
+    @app.get("/stats", response_model=StatsResponse)
+    def stats() -> StatsResponse:
+        return StatsResponse(**get_service().stats())
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.post("/admin/profile")
+    def admin_profile(req: ProfileRequest, x_admin_token: str | None = Header(default=None)) -> Response:
+        # Off unless profiler.enabled, and then only for callers presenting the
+        # APP_ADMIN_TOKEN secret. Blocks for the profiling window.
+        service = get_service()
+        if not service.settings.profiler_enabled:
+            return JSONResponse(status_code=404, content={"detail": "Not Found"})
+        if not _admin_authorized(x_admin_token):
+            return JSONResponse(status_code=403, content={"detail": "Admin token required"})
+        try:
+            data, session = service.profiler.run(req.mode, seconds=req.seconds, requests=req.requests)
+        except ProfilerBusy as exc:
+            return JSONResponse(status_code=409, content={"detail": str(exc)})
+        headers = {"X-Profile-Requests": str(session.requests)}
+        if req.mode == "sample":
+            headers["X-Profile-Samples"] = str(session.samples)
+            return PlainTextResponse(data.decode("utf-8"), headers=headers)
+        headers["Content-Disposition"] = 'attachment; filename="profile.pstats"'
+        return Response(content=data, media_type="application/octet-stream", headers=headers)
+
+    @app.post("/admin/reload", response_model=ReloadResponse)
+    def admin_reload(wait: bool = False, x_admin_token: str | None = Header(default=None)):
+        # Loads the index version CURRENT points at and swaps it in; in-flight
+        # requests finish on the version they started with.
+        if not _admin_authorized(x_admin_token):
+            return JSONResponse(status_code=403, content={"detail": "Admin token required"})
+        indices = get_service().indices
+        if wait:
+            result = indices.reload_now()
+            return JSONResponse(
+                status_code=500 if result["status"] == "failed" else 200,
+                content=ReloadResponse(**result).model_dump(),
+            )
+        return ReloadResponse(status=indices.reload(), version=indices.current.version)
+
     @app.post("/search", response_model=SearchResponse)
     def search(req: SearchRequest) -> SearchResponse:
-        payload = get_service().search(
-            query=req.query,
-            top_k=req.top_k,
-            department_filter=req.department_filter,
-            access_level=req.access_level,
-            debug=req.debug,
-        )
+        service = get_service()
+        with service.admission.admit("search"), service.profiler.request():
+            payload = service.search(
+                query=req.query,
+                top_k=req.top_k,
+                department_filter=req.department_filter,
+                access_level=req.access_level,
+                debug=req.debug,
+                timeout_ms=req.timeout_ms,
+            )
         return SearchResponse(**payload)
 
+    @app.post("/search/batch", response_model=SearchBatchResponse)
+    def search_batch(req: SearchBatchRequest) -> SearchBatchResponse:
+        service = get_service()
+        with service.admission.admit("search"), service.profiler.request():
+            results = service.search_many([item.model_dump() for item in req.requests])
+        items = []
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                items.append(SearchBatchItem(index=index, error=str(result)))
+            else:
+                items.append(SearchBatchItem(index=index, result=SearchResponse(**result)))
+        return SearchBatchResponse(results=items)
+
     @app.post("/ask", response_model=AskResponse)
     def ask(req: AskRequest) -> AskResponse:
-        answer = get_service().ask(
-            question=req.question,
-            top_k=req.top_k,
-            department_filter=req.department_filter,
-            access_level=req.access_level,
-            debug=req.debug,
-        )
+        service = get_service()
+        with service.admission.admit("ask"), service.profiler.request():
+            answer = service.ask(
+                question=req.question,
+                top_k=req.top_k,
+                department_filter=req.department_filter,
+                access_level=req.access_level,
+                debug=req.debug,
+                timeout_ms=req.timeout_ms,
+            )
         return AskResponse(**answer.to_dict())
 
+    @app.post("/ask/batch", response_model=AskBatchResponse)
+    def ask_batch(req: AskBatchRequest) -> AskBatchResponse:
+        service = get_service()
+        with service.admission.admit("ask"), service.profiler.request():
+            results = service.ask_many([item.model_dump() for item in req.requests])
+        items = []
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                items.append(AskBatchItem(index=index, error=str(result)))
+            else:
+                items.append(AskBatchItem(index=index, result=AskResponse(**result.to_dict())))
+        return AskBatchResponse(results=items)
+
+    @app.post("/ask/stream")
+    def ask_stream(req: AskRequest) -> StreamingResponse:
+        service = get_service()
+        service.admission.acquire("ask")
+        try:
+            events = service.ask_stream(
+                question=req.question,
+                top_k=req.top_k,
+                department_filter=req.department_filter,
+                access_level=req.access_level,
+                debug=req.debug,
+                timeout_ms=req.timeout_ms,
+            )
+            lines = service.profiler.request_stream(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+            return _AdmittedStreamingResponse(
+                lines,
+                release=lambda: service.admission.release("ask"),
+                media_type="application/x-ndjson",
+            )
+        except BaseException:
+            service.admission.release("ask")
+            raise
+
     return app
 
 
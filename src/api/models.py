@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +11,7 @@ class SearchRequest(BaseModel):
     department_filter: Optional[str] = None
     access_level: Optional[str] = "public"
     debug: bool = False
+    timeout_ms: Optional[int] = Field(default=None, ge=1)
 
 
 class SearchHit(BaseModel):
@@ -26,6 +27,8 @@ class SearchHit(BaseModel):
 class SearchResponse(BaseModel):
     hits: List[SearchHit]
     debug: Optional[Dict[str, Any]] = None
+    degraded: Optional[str] = None
+    timed_out: Optional[str] = None
 
 
 class AskRequest(BaseModel):
@@ -34,6 +37,7 @@ class AskRequest(BaseModel):
     department_filter: Optional[str] = None
     access_level: Optional[str] = "public"
     debug: bool = False
+    timeout_ms: Optional[int] = Field(default=None, ge=1)
 
 
 class AskResponse(BaseModel):
@@ -43,6 +47,36 @@ class AskResponse(BaseModel):
     status: str
     clarifying_question: Optional[str] = None
     debug: Optional[Dict[str, Any]] = None
+    degraded: Optional[str] = None
+    timed_out: Optional[str] = None
+
+
+class SearchBatchRequest(BaseModel):
+    requests: List[SearchRequest] = Field(min_length=1, max_length=64)
+
+
+class SearchBatchItem(BaseModel):
+    index: int
+    result: Optional[SearchResponse] = None
+    error: Optional[str] = None
+
+
+class SearchBatchResponse(BaseModel):
+    results: List[SearchBatchItem]
+
+
+class AskBatchRequest(BaseModel):
+    requests: List[AskRequest] = Field(min_length=1, max_length=64)
+
+
+class AskBatchItem(BaseModel):
+    index: int
+    result: Optional[AskResponse] = None
+    error: Optional[str] = None
+
+
+class AskBatchResponse(BaseModel):
+    results: List[AskBatchItem]
 
 
 class HealthResponse(BaseModel):
@@ -50,3 +84,42 @@ class HealthResponse(BaseModel):
     version: str
     indices_loaded: bool
     llm_loaded: bool
+    index_version: str | None = None
+    freshness_lag_s: float | None = None
+
+
+class LivenessResponse(BaseModel):
+    status: str
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    indices_loaded: bool
+    llm_state: str
+    llm_backend: str
+    load_durations_s: Dict[str, float] = Field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class ProfileRequest(BaseModel):
+    mode: Literal["sample", "cprofile"] = "sample"
+    seconds: Optional[float] = Field(default=None, gt=0)
+    requests: Optional[int] = Field(default=None, ge=1)
+
+
+class ReloadResponse(BaseModel):
+    status: str
+    version: str
+    error: Optional[str] = None
+
+
+class StatsResponse(BaseModel):
+    llm_scheduler: Dict[str, float]
+    llm_prefix_cache: Dict[str, float] = Field(default_factory=dict)
+    answer_cache: Dict[str, float] = Field(default_factory=dict)
+    semantic_cache: Dict[str, float] = Field(default_factory=dict)
+    admission: Dict[str, Dict[str, float]] = Field(default_factory=dict)
+    degradation: Dict[str, float] = Field(default_factory=dict)
+    single_flight: Dict[str, float] = Field(default_factory=dict)
+    slow_query_log: Dict[str, float] = Field(default_factory=dict)
+    indices: Dict[str, Any] = Field(default_factory=dict)
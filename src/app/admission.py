@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from threading import Condition
+from typing import Dict, Iterator
+
+from src.config.settings import AppSettings
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, endpoint: str, status_code: int, reason: str, retry_after_s: float) -> None:
+        super().__init__(f"{endpoint} rejected: {reason}")
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class ConcurrencyLimiter:
+    # At most max_concurrency requests run at once; up to max_queue more wait
+    # for a slot. A full queue is rejected at once (429), a request that waits
+    # longer than queue_timeout_s gives up (503). Either way the caller gets a
+    # fast answer instead of piling onto an oversubscribed CPU.
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout_s: float,
+        retry_after_s: float,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self.retry_after_s = retry_after_s
+        self._cond = Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def acquire(self) -> None:
+        with self._cond:
+            if self.active >= self.max_concurrency and self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected(self.name, 429, "queue_full", self.retry_after_s)
+            deadline = time.monotonic() + self.queue_timeout_s
+            self.waiting += 1
+            try:
+                while self.active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise AdmissionRejected(self.name, 503, "queue_timeout", self.retry_after_s)
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+            }
+
+
+class AdmissionController:
+    # One limiter per endpoint family. Batch and streaming variants share the
+    # limiter of their plain endpoint and hold one slot for the whole request.
+    def __init__(self, settings: AppSettings) -> None:
+        self.enabled = settings.admission_enabled
+        queue_timeout_s = settings.admission_queue_timeout_ms / 1000.0
+        self.limiters: Dict[str, ConcurrencyLimiter] = {
+            "search": ConcurrencyLimiter(
+                "search",
+                settings.admission_search_max_concurrency,
+                settings.admission_search_max_queue,
+                queue_timeout_s,
+                settings.admission_retry_after_s,
+            ),
+            "ask": ConcurrencyLimiter(
+                "ask",
+                settings.admission_ask_max_concurrency,
+                settings.admission_ask_max_queue,
+                queue_timeout_s,
+                settings.admission_retry_after_s,
+            ),
+        }
+
+    def acquire(self, endpoint: str) -> None:
+        if self.enabled:
+            self.limiters[endpoint].acquire()
+
+    def release(self, endpoint: str) -> None:
+        if self.enabled:
+            self.limiters[endpoint].release()
+
+    @contextmanager
+    def admit(self, endpoint: str) -> Iterator[None]:
+        self.acquire(endpoint)
+        try:
+            yield
+        finally:
+            self.release(endpoint)
+
+    def queue_depth(self, endpoint: str) -> int:
+        return self.limiters[endpoint].waiting
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
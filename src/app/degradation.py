@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.common.metrics import DEGRADED_RESPONSES_TOTAL
+from src.config.settings import AppSettings
+
+DEGRADATION_STEPS = ("heuristic_llm", "bm25_only", "reduced_candidates")
+
+
+@dataclass
+class DegradationDecision:
+    level: int
+    name: str | None
+    use_fallback_llm: bool
+    use_dense: bool
+    max_candidate_size: int | None
+
+
+class DegradationPolicy:
+    # Walks the configured ladder as load grows. Level N applies the first N
+    # steps, and a level is entered when the endpoint's admission queue depth or
+    # its own recent p95 latency crosses that level's threshold. Latency windows
+    # and levels are kept per endpoint, so slow /ask generations do not degrade
+    # /search. Steps are cumulative, so level 2 of the default ladder is
+    # "heuristic LLM and BM25-only".
+    def __init__(self, settings: AppSettings, queue_depth: Callable[[str], int]) -> None:
+        unknown = [step for step in settings.degradation_ladder if step not in DEGRADATION_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown degradation steps: {unknown}")
+        self.enabled = settings.degradation_enabled
+        self.ladder: List[str] = list(settings.degradation_ladder)
+        self.queue_depths = list(settings.degradation_queue_depths)
+        self.latency_ms = list(settings.degradation_latency_ms)
+        self.reduced_candidate_size = settings.degradation_reduced_candidate_size
+        self._queue_depth = queue_depth
+        self._latency_window = max(1, settings.degradation_latency_window)
+        self._latencies: Dict[str, deque] = {}
+        self._lock = Lock()
+        self.levels: Dict[str, int] = {}
+        self.transitions = 0
+        self.requests_by_level: Dict[str, int] = {name: 0 for name in self.ladder}
+
+    def record_latency(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            window = self._latencies.get(endpoint)
+            if window is None:
+                window = self._latencies[endpoint] = deque(maxlen=self._latency_window)
+            window.append(seconds * 1000.0)
+
+    def _recent_p95_ms(self, endpoint: str) -> float:
+        window = self._latencies.get(endpoint)
+        if not window:
+            return 0.0
+        return float(np.percentile(np.fromiter(window, dtype=np.float64), 95))
+
+    def _target_level(self, endpoint: str) -> int:
+        depth = self._queue_depth(endpoint)
+        p95_ms = self._recent_p95_ms(endpoint)
+        level = 0
+        for idx in range(len(self.ladder)):
+            over_depth = idx < len(self.queue_depths) and depth >= self.queue_depths[idx]
+            over_latency = idx < len(self.latency_ms) and p95_ms >= self.latency_ms[idx]
+            if over_depth or over_latency:
+                level = idx + 1
+        return level
+
+    def decide(self, endpoint: str) -> DegradationDecision:
+        if not self.enabled:
+            return DegradationDecision(level=0, name=None, use_fallback_llm=False, use_dense=True, max_candidate_size=None)
+        with self._lock:
+            level = self._target_level(endpoint)
+            if level != self.levels.get(endpoint, 0):
+                self.transitions += 1
+                self.levels[endpoint] = level
+            if level:
+                self.requests_by_level[self.ladder[level - 1]] += 1
+                DEGRADED_RESPONSES_TOTAL.inc(level=self.ladder[level - 1])
+        steps = self.ladder[:level]
+        return DegradationDecision(
+            level=level,
+            name=steps[-1] if steps else None,
+            use_fallback_llm="heuristic_llm" in steps,
+            use_dense="bm25_only" not in steps,
+            max_candidate_size=self.reduced_candidate_size if "reduced_candidates" in steps else None,
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            payload: Dict[str, float] = {
+                "level": max(self.levels.values(), default=0),
+                "transitions": self.transitions,
+            }
+            for endpoint in sorted(set(self.levels) | set(self._latencies)):
+                payload[f"level_{endpoint}"] = self.levels.get(endpoint, 0)
+                payload[f"recent_p95_ms_{endpoint}"] = self._recent_p95_ms(endpoint)
+            for name, count in self.requests_by_level.items():
+                payload[f"requests_{name}"] = count
+            return payload
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterator, List, Sequence
+
+from src.common.schemas import DocumentChunk
+from src.config.settings import AppSettings
+from src.indexing.bm25_index import BM25Index
+from src.indexing.build_indices import resolve_index_location
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+from src.indexing.index_store import IndexLocation, IndexStore
+from src.retrieval.bm25_retriever import BM25Retriever
+from src.retrieval.dense_retriever import DenseRetriever
+from src.retrieval.service import RetrievalService
+from src.retrieval.sharding import ShardCoordinator, ShardedBM25Retriever, ShardedDenseRetriever
+
+logger = logging.getLogger(__name__)
+
+
+class IndexGeneration:
+    # One loaded index version. Requests pin the generation they started on,
+    # so a reload never changes the indices under an in-flight request.
+    def __init__(self, location: IndexLocation, bm25: BM25Retriever, dense: DenseRetriever, retrieval: RetrievalService) -> None:
+        self.location = location
+        self.version = location.version
+        self.bm25 = bm25
+        self.dense = dense
+        self.retrieval = retrieval
+        self.in_flight = 0
+        self.load_durations_s: Dict[str, float] = {}
+        self.shards: ShardCoordinator | None = None
+        # Index metadata that does not need the indices themselves, which a
+        # sharded generation does not keep in this process.
+        self.chunks: Sequence[DocumentChunk] = []
+        self.embedding_dim = 0
+        # Keeps prune from deleting the version's files while they are mapped.
+        self.lease: Path | None = None
+
+    def release_memory(self) -> None:
+        if self.shards is not None:
+            self.shards.close()
+            self.shards = None
+        if self.lease is not None:
+            IndexStore.release(self.lease)
+            self.lease = None
+        self.bm25 = None
+        self.dense = None
+        self.retrieval = None
+
+
+class IndexManager:
+    # Owns the live IndexGeneration. reload() loads the version CURRENT points
+    # at on a background thread, warms it with sample queries, then swaps it in
+    # under the lock. The old generation is retired and its indices are dropped
+    # once its last in-flight request finishes. The embedding backend is shared
+    # across generations, so a reload never reloads the embedding model.
+    def __init__(
+        self,
+        settings: AppSettings,
+        on_swap: Callable[[IndexGeneration], None] | None = None,
+    ) -> None:
+        self.settings = settings
+        self.backend = EmbeddingBackend(settings.embedding_model_name)
+        self._on_swap = on_swap
+        self._lock = Lock()
+        self._reload_lock = Lock()
+        self._retired: List[IndexGeneration] = []
+        self._reload_thread: Thread | None = None
+        self._stop = Event()
+        self._watcher: Thread | None = None
+        self.reloads = 0
+        self.last_reload_error: str | None = None
+        self.last_reload_s: float | None = None
+        self.current = self.load(resolve_index_location(settings))
+        if self.current.shards is not None:
+            self.current.shards.warm()
+
+    def load(self, location: IndexLocation) -> IndexGeneration:
+        # A version from the index store is leased for as long as the
+        # generation is loaded, so a build in another process does not prune it.
+        lease = None
+        if location.immutable and self.settings.index_store_dir is not None:
+            lease = IndexStore(self.settings.index_store_dir).lease(location.version)
+        try:
+            generation = self._load(location)
+        except BaseException:
+            if lease is not None:
+                IndexStore.release(lease)
+            raise
+        generation.lease = lease
+        return generation
+
+    def _load(self, location: IndexLocation) -> IndexGeneration:
+        # Immutable versions are memory-mapped when serving.mmap_indices is on,
+        # so every worker process shares one copy of the arrays. A faiss index
+        # would be a private copy per worker, so mmapped embeddings are
+        # searched with numpy. Chunks are loaded once and shared by both indices.
+        mmap = self.settings.serving_mmap_indices and location.immutable
+        durations: Dict[str, float] = {}
+        started = time.perf_counter()
+        dense_index = DenseIndex.load(
+            location.dense_dir,
+            search_backend="numpy" if mmap else self.settings.dense_search_backend,
+            mmap=mmap,
+        )
+        dense = DenseRetriever(index=dense_index, backend=self.backend)
+        durations["dense"] = time.perf_counter() - started
+        started = time.perf_counter()
+        if location.bm25_path.is_dir():
+            bm25 = BM25Retriever(BM25Index.load_arrays(location.bm25_path, dense_index.chunks, mmap=mmap))
+        else:
+            bm25 = BM25Retriever.from_path(location.bm25_path)
+        durations["bm25"] = time.perf_counter() - started
+        if self.settings.retrieval_shards <= 1:
+            generation = IndexGeneration(location, bm25, dense, RetrievalService(self.settings, bm25, dense))
+            generation.chunks = dense_index.chunks
+            generation.embedding_dim = int(dense_index.embeddings.shape[1])
+            generation.load_durations_s = durations
+            return generation
+
+        # The full indices are only needed to partition them; once the shards
+        # hold their parts, this process keeps just the coordinator.
+        started = time.perf_counter()
+        shards = ShardCoordinator(
+            bm25.index,
+            dense_index,
+            self.backend,
+            self.settings.retrieval_shards,
+            executor=self.settings.retrieval_shard_executor,
+        )
+        del bm25, dense, dense_index
+        sharded_bm25, sharded_dense = ShardedBM25Retriever(shards), ShardedDenseRetriever(shards)
+        durations["shards"] = time.perf_counter() - started
+        generation = IndexGeneration(location, sharded_bm25, sharded_dense, RetrievalService(self.settings, sharded_bm25, sharded_dense))
+        generation.shards = shards
+        generation.chunks = shards.chunks
+        generation.embedding_dim = shards.embedding_dim
+        generation.load_durations_s = durations
+        return generation
+
+    def warm(self, generation: IndexGeneration) -> int:
+        if generation.shards is not None:
+            generation.shards.warm()
+        queries = list(self.settings.index_warmup_queries)
+        if not queries:
+            titles = dict.fromkeys(chunk.title for chunk in generation.chunks[:50] if chunk.title)
+            queries = list(titles)[:5]
+        for query in queries:
+            generation.retrieval.retrieve(query=query, top_k=self.settings.default_top_k, department_filter=None, access_level=None)
+        return len(queries)
+
+    @contextmanager
+    def use(self) -> Iterator[IndexGeneration]:
+        with self._lock:
+            generation = self.current
+            generation.in_flight += 1
+        try:
+            yield generation
+        finally:
+            with self._lock:
+                generation.in_flight -= 1
+                drained = generation is not self.current and generation.in_flight == 0
+                if drained and generation in self._retired:
+                    self._retired.remove(generation)
+                else:
+                    drained = False
+            if drained:
+                generation.release_memory()
+
+    def swap(self, generation: IndexGeneration) -> IndexGeneration:
+        with self._lock:
+            previous = self.current
+            self.current = generation
+            idle = previous.in_flight == 0
+            if not idle:
+                self._retired.append(previous)
+        if idle:
+            previous.release_memory()
+        if self._on_swap is not None:
+            self._on_swap(generation)
+        return previous
+
+    def reload_now(self) -> Dict[str, str | None]:
+        # Loads and swaps in the CURRENT version; a no-op when it is already live.
+        with self._reload_lock:
+            started = time.perf_counter()
+            generation = None
+            try:
+                location = resolve_index_location(self.settings)
+                if location.version == self.current.version:
+                    return {"status": "unchanged", "version": location.version, "error": None}
+                generation = self.load(location)
+                self.warm(generation)
+                previous = self.swap(generation)
+            except Exception as exc:
+                if generation is not None and generation is not self.current:
+                    generation.release_memory()
+                self.last_reload_error = str(exc)
+                logger.exception("Index reload failed")
+                return {"status": "failed", "version": self.current.version, "error": str(exc)}
+            self.reloads += 1
+            self.last_reload_error = None
+            self.last_reload_s = time.perf_counter() - started
+            logger.info("Swapped index version %s -> %s", previous.version, generation.version)
+            return {"status": "reloaded", "version": generation.version, "error": None}
+
+    def reload(self) -> str:
+        # Starts reload_now() in the background unless one is already running.
+        with self._lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return "already_running"
+            self._reload_thread = Thread(target=self.reload_now, name="index-reload", daemon=True)
+            self._reload_thread.start()
+        return "started"
+
+    def start_watching(self, interval_s: float) -> None:
+        if interval_s <= 0 or self._watcher is not None:
+            return
+
+        def watch() -> None:
+            while not self._stop.wait(interval_s):
+                if resolve_index_location(self.settings).version != self.current.version:
+                    self.reload_now()
+
+        self._watcher = Thread(target=watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, float | str | None]:
+        with self._lock:
+            return {
+                "version": self.current.version,
+                "shards": self.current.shards.n_shards if self.current.shards is not None else 0,
+                "in_flight": self.current.in_flight,
+                "draining_versions": len(self._retired),
+                "draining_requests": sum(gen.in_flight for gen in self._retired),
+                "reloads": self.reloads,
+                "last_reload_s": self.last_reload_s,
+                "last_reload_error": self.last_reload_error,
+            }
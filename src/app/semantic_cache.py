@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.common.metrics import CACHE_LOOKUPS_TOTAL
+from src.common.schemas import AnswerPackage
+from src.indexing.dense_index import EmbeddingBackend
+from src.rag.answer_cache import package_from_row, package_to_row
+
+
+@dataclass
+class SemanticCacheHit:
+    question: str
+    cached_question: str
+    similarity: float
+    scope: Tuple
+
+
+class SemanticCache:
+    # Ring buffer of recent query embeddings with the answer package each one
+    # produced. A lookup returns a cached package when a query in the same scope
+    # (top_k, filters, debug) clears the cosine similarity threshold.
+    def __init__(self, backend: EmbeddingBackend, capacity: int, threshold: float) -> None:
+        self.backend = backend
+        self.capacity = max(1, capacity)
+        self.threshold = threshold
+        self._matrix: Optional[np.ndarray] = None
+        self._questions: List[str] = []
+        self._scopes: List[Tuple] = []
+        self._rows: List[dict] = []
+        self._next = 0
+        self._lock = Lock()
+        self._listeners: List[Callable[[SemanticCacheHit], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.false_hits = 0
+
+    def add_hit_listener(self, listener: Callable[[SemanticCacheHit], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_hit_listener(self, listener: Callable[[SemanticCacheHit], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def record_false_hit(self, hit: SemanticCacheHit) -> None:
+        with self._lock:
+            self.false_hits += 1
+
+    def _encode(self, question: str) -> np.ndarray:
+        return self.backend.encode([question])[0].astype(np.float32)
+
+    def lookup(self, question: str, scope: Tuple) -> Optional[AnswerPackage]:
+        vector = self._encode(question)
+        with self._lock:
+            best_idx = -1
+            best_sim = -1.0
+            if self._matrix is not None and self._rows:
+                sims = self._matrix[: len(self._rows)] @ vector
+                for idx in np.argsort(sims)[::-1]:
+                    if self._scopes[int(idx)] == scope:
+                        best_idx = int(idx)
+                        best_sim = float(sims[idx])
+                        break
+            if best_idx < 0 or best_sim < self.threshold:
+                self.misses += 1
+                CACHE_LOOKUPS_TOTAL.inc(cache="semantic", result="miss")
+                return None
+            self.hits += 1
+            row = self._rows[best_idx]
+            hit = SemanticCacheHit(
+                question=question,
+                cached_question=self._questions[best_idx],
+                similarity=best_sim,
+                scope=scope,
+            )
+        CACHE_LOOKUPS_TOTAL.inc(cache="semantic", result="hit")
+        for listener in list(self._listeners):
+            listener(hit)
+        package = package_from_row(row)
+        if package.debug:
+            # The stored debug payload (normalized question, retrieval lists,
+            # prompt) describes the cached question, not this one.
+            package.debug = {
+                "semantic_cache_hit": True,
+                "cached_question": hit.cached_question,
+                "similarity": hit.similarity,
+                "cached_debug": package.debug,
+            }
+        return package
+
+    def store(self, question: str, scope: Tuple, package: AnswerPackage) -> None:
+        vector = self._encode(question)
+        row = package_to_row(package)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            slot = self._next
+            self._matrix[slot] = vector
+            if slot < len(self._rows):
+                self._questions[slot] = question
+                self._scopes[slot] = scope
+                self._rows[slot] = row
+            else:
+                self._questions.append(question)
+                self._scopes.append(scope)
+                self._rows.append(row)
+            self._next = (slot + 1) % self.capacity
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._questions.clear()
+            self._scopes.clear()
+            self._rows.clear()
+            self._next = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "false_hits": self.false_hits,
+            }
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from threading import Thread
+from typing import Any, Dict, Iterator, List
 
-from src.common.schemas import AnswerPackage
+from src.app.admission import AdmissionController
+from src.app.degradation import DegradationDecision, DegradationPolicy
+from src.app.index_manager import IndexGeneration, IndexManager
+from src.app.semantic_cache import SemanticCache
+from src.app.single_flight import SingleFlight
+from src.app.slow_query_log import SlowQueryLog
+from src.common.deadline import Deadline
+from src.common.metrics import INDEX_SIZE, request_timings
+from src.common.profiling import RequestProfiler
+from src.common.schemas import AnswerPackage, RetrievalHit
+from src.common.tracing import configure_tracing, start_span, trace_stream
 from src.config.settings import AppSettings
-from src.rag.answerer import RAGAnswerer
+from src.ingestion.watcher import IngestionWatcher, freshness_lag_s, read_ingestion_status
+from src.rag.answer_cache import normalize_question
+from src.rag.answerer import RAGAnswerer, build_llm
+from src.rag.local_llm import LocalLLM
 from src.retrieval.bm25_retriever import BM25Retriever
 from src.retrieval.dense_retriever import DenseRetriever
-from src.retrieval.service import RetrievalService
+from src.retrieval.service import RetrievalDebug, RetrievalRequest, RetrievalService
 
 
 @dataclass
@@ -16,33 +32,142 @@ class HealthStatus:
     version: str
     indices_loaded: bool
     llm_loaded: bool
+    index_version: str | None = None
+    freshness_lag_s: float | None = None
+
+
+@dataclass
+class ReadinessStatus:
+    ready: bool
+    indices_loaded: bool
+    llm_state: str
+    llm_backend: str
+    load_durations_s: Dict[str, float] = field(default_factory=dict)
+    error: str | None = None
 
 
 class QAService:
     def __init__(self, settings: AppSettings) -> None:
         self.settings = settings
-        self.bm25 = BM25Retriever.from_path(settings.bm25_index_path)
-        self.dense = DenseRetriever.from_path(settings.dense_index_dir, settings.embedding_model_name)
-        self.retrieval = RetrievalService(settings, self.bm25, self.dense)
-        self.answerer = RAGAnswerer(settings)
+        self.load_durations_s: Dict[str, float] = {}
+        self.llm_state = "loading"
+        self.llm_error: str | None = None
+        configure_tracing(
+            settings.tracing_enabled,
+            settings.tracing_path,
+            settings.tracing_max_bytes,
+            settings.tracing_backup_count,
+        )
+        self.admission = AdmissionController(settings)
+        self.degradation = DegradationPolicy(settings, self.admission.queue_depth)
+        self._fallback_llm: LocalLLM | None = None
+        self.single_flight: SingleFlight | None = SingleFlight() if settings.coalesce_requests else None
+        self.slow_query_log: SlowQueryLog | None = SlowQueryLog(settings) if settings.slow_query_enabled else None
+        self.profiler = RequestProfiler(settings.profiler_max_seconds, settings.profiler_sample_interval_ms / 1000.0)
+
+        self.semantic_cache: SemanticCache | None = None
+        self.answerer: RAGAnswerer | None = None
+        self.indices = IndexManager(settings, on_swap=self._on_index_swap)
+        self.load_durations_s.update(self.indices.current.load_durations_s)
+        self.indices_loaded = True
+        self._record_index_size(self.indices.current)
+
+        if settings.llm_backend == "transformers" and settings.llm_background_load:
+            # Serve heuristic answers until the model is loaded, then swap it in.
+            self.answerer = RAGAnswerer(settings, llm=build_llm(settings, backend="heuristic"))
+            self._llm_loader = Thread(target=self._load_llm, name="llm-loader", daemon=True)
+            self._llm_loader.start()
+        else:
+            started = time.perf_counter()
+            self.answerer = RAGAnswerer(settings, llm=None)
+            self._record_llm_loaded(self.answerer.llm.backend, time.perf_counter() - started)
+        if self.answerer.cache is not None:
+            self.answerer.cache.set_index_version(self.indices.current.version)
+        if settings.semantic_cache_enabled:
+            self.semantic_cache = SemanticCache(
+                backend=self.indices.backend,
+                capacity=settings.semantic_cache_size,
+                threshold=settings.semantic_cache_threshold,
+            )
+        self.indices.start_watching(settings.index_watch_interval_s)
+        self.ingestion_watcher: IngestionWatcher | None = None
+        if settings.ingestion_watch_enabled:
+            self.ingestion_watcher = IngestionWatcher(settings, on_publish=lambda _: self.indices.reload_now())
+            self.ingestion_watcher.start()
+
+    # The current generation's indices. Requests should pin one generation with
+    # self.indices.use() instead, so a hot reload cannot switch it mid-request.
+    @property
+    def bm25(self) -> BM25Retriever:
+        return self.indices.current.bm25
+
+    @property
+    def dense(self) -> DenseRetriever:
+        return self.indices.current.dense
+
+    @property
+    def retrieval(self) -> RetrievalService:
+        return self.indices.current.retrieval
+
+    @staticmethod
+    def _record_index_size(generation: IndexGeneration) -> None:
+        INDEX_SIZE.set(len(generation.chunks), index="bm25", unit="chunks")
+        INDEX_SIZE.set(len(generation.chunks), index="dense", unit="vectors")
+        INDEX_SIZE.set(generation.embedding_dim, index="dense", unit="dimensions")
+
+    def _on_index_swap(self, generation: IndexGeneration) -> None:
+        # Cached answers were grounded in the previous version's chunks.
+        self._record_index_size(generation)
+        if self.answerer is not None and self.answerer.cache is not None:
+            self.answerer.cache.set_index_version(generation.version)
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+
+    def _record_llm_loaded(self, backend: str, duration_s: float) -> None:
+        self.load_durations_s["llm"] = duration_s
+        if backend != self.settings.llm_backend:
+            self.llm_state = "failed"
+            self.llm_error = f"{self.settings.llm_backend} backend unavailable, serving {backend}"
+        else:
+            self.llm_state = "ready"
+
+    def _load_llm(self) -> None:
+        started = time.perf_counter()
+        try:
+            llm = build_llm(self.settings)
+        except Exception as exc:
+            self.load_durations_s["llm"] = time.perf_counter() - started
+            self.llm_state = "failed"
+            self.llm_error = str(exc)
+            return
+        self.answerer.llm = llm
+        self._record_llm_loaded(llm.backend, time.perf_counter() - started)
 
     def health(self) -> HealthStatus:
-        llm_loaded = self.answerer.llm.backend in {"heuristic", "transformers"}
+        version = self.indices.current.version
         return HealthStatus(
             status="ok",
             version=self.settings.version,
-            indices_loaded=True,
-            llm_loaded=llm_loaded,
+            indices_loaded=self.indices_loaded,
+            llm_loaded=self.llm_state == "ready",
+            index_version=version,
+            freshness_lag_s=freshness_lag_s(read_ingestion_status(self.settings.ingestion_status_path), version),
         )
 
-    def search(self, query: str, top_k: int, department_filter: str | None, access_level: str | None, debug: bool = False) -> dict:
-        hits, retrieval_debug = self.retrieval.retrieve(
-            query=query,
-            top_k=top_k,
-            department_filter=department_filter,
-            access_level=access_level,
+    def readiness(self) -> ReadinessStatus:
+        # /ask can always be served once indices are loaded: a loading or failed
+        # model only means answers come from the heuristic backend.
+        return ReadinessStatus(
+            ready=self.indices_loaded,
+            indices_loaded=self.indices_loaded,
+            llm_state=self.llm_state,
+            llm_backend=self.answerer.llm.backend,
+            load_durations_s=dict(self.load_durations_s),
+            error=self.llm_error,
         )
 
+    @staticmethod
+    def _format_hits(hits: List[RetrievalHit]) -> List[dict]:
         response_hits = []
         for h in hits:
             chunk = h.chunk_ref
@@ -57,25 +182,169 @@ class QAService:
                     "snippet": chunk.text[:250],
                 }
             )
+        return response_hits
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "llm_scheduler": self.answerer.llm.scheduler_stats(),
+            "llm_prefix_cache": self.answerer.llm.prefix_cache_stats(),
+            "answer_cache": self.answerer.cache.stats() if self.answerer.cache is not None else {},
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache is not None else {},
+            "admission": self.admission.stats(),
+            "degradation": self.degradation.stats(),
+            "single_flight": self.single_flight.stats() if self.single_flight is not None else {},
+            "slow_query_log": self.slow_query_log.stats() if self.slow_query_log is not None else {},
+            "indices": self.indices.stats(),
+        }
+
+    def _answer_llm(self, decision: DegradationDecision) -> LocalLLM | None:
+        if not decision.use_fallback_llm or self.answerer.llm.backend == "heuristic":
+            return None
+        if self._fallback_llm is None:
+            self._fallback_llm = build_llm(self.settings, backend="heuristic")
+        return self._fallback_llm
+
+    def _deadline(self, timeout_ms: float | None) -> Deadline:
+        return Deadline.from_timeout_ms(timeout_ms if timeout_ms is not None else self.settings.request_timeout_ms)
+
+    def _batch_deadline(self, requests: List[Dict[str, Any]]) -> Deadline:
+        # A batch shares one pass through retrieval and generation, so it runs
+        # under the most generous budget of its items.
+        timeouts = [req.get("timeout_ms") or self.settings.request_timeout_ms for req in requests]
+        if any(timeout <= 0 for timeout in timeouts):
+            return Deadline(None)
+        return Deadline.from_timeout_ms(max(timeouts))
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None,
+        access_level: str | None,
+        debug: bool = False,
+        timeout_ms: float | None = None,
+    ) -> dict:
+        search_span = start_span("qa.search", top_k=top_k, department_filter=department_filter, access_level=access_level)
+        with search_span as span, request_timings() as timings, self.indices.use() as indices:
+            started = time.perf_counter()
+            decision = self.degradation.decide("search")
+            deadline = self._deadline(timeout_ms)
+            hits, retrieval_debug = indices.retrieval.retrieve(
+                query=query,
+                top_k=top_k,
+                department_filter=department_filter,
+                access_level=access_level,
+                use_dense=decision.use_dense,
+                max_candidate_size=decision.max_candidate_size,
+                deadline=deadline,
+            )
+            span.set_attributes(hits=len(hits), degraded=decision.name, timed_out=deadline.timed_out_stage)
+            payload = self._search_payload(hits, retrieval_debug, top_k, debug, decision, deadline)
+            total_s = time.perf_counter() - started
+            self.degradation.record_latency("search", total_s)
+            if self.slow_query_log is not None:
+                reasons = self.slow_query_log.reasons(total_s, timings)
+                if reasons:
+                    request = {
+                        "query": query,
+                        "top_k": top_k,
+                        "department_filter": department_filter,
+                        "access_level": access_level,
+                        "timeout_ms": timeout_ms,
+                    }
+                    details = {
+                        "degraded": decision.name,
+                        "timed_out": deadline.timed_out_stage,
+                        "retrieval": {**self._retrieval_debug(retrieval_debug, top_k), "thresholds": self._search_thresholds()},
+                        "hits": self._slow_query_hits(hits),
+                    }
+                    self.slow_query_log.capture("search", reasons, total_s, timings, request, details)
+            return payload
+
+    def search_many(self, requests: List[Dict[str, Any]]) -> List[dict | BaseException]:
+        # Each request dict carries query, top_k, department_filter, access_level,
+        # debug and timeout_ms. Retrieval runs as one vectorized batch; a failure
+        # there fails every item, since the batch shares one embedding and scoring pass.
+        decision = self.degradation.decide("search")
+        deadline = self._batch_deadline(requests)
+        try:
+            with self.indices.use() as indices:
+                results = indices.retrieval.retrieve_many(
+                    [self._retrieval_request(req, "query") for req in requests],
+                    use_dense=decision.use_dense,
+                    max_candidate_size=decision.max_candidate_size,
+                    deadline=deadline,
+                )
+        except Exception as exc:
+            return [exc for _ in requests]
+        return [
+            self._search_payload(hits, retrieval_debug, req["top_k"], req.get("debug", False), decision, deadline)
+            for req, (hits, retrieval_debug) in zip(requests, results)
+        ]
+
+    @staticmethod
+    def _retrieval_request(req: Dict[str, Any], text_key: str) -> RetrievalRequest:
+        return RetrievalRequest(
+            query=req[text_key],
+            top_k=req["top_k"],
+            department_filter=req.get("department_filter"),
+            access_level=req.get("access_level"),
+        )
 
-        payload = {"hits": response_hits}
+    def _search_payload(
+        self,
+        hits: List[RetrievalHit],
+        retrieval_debug: RetrievalDebug,
+        top_k: int,
+        debug: bool,
+        decision: DegradationDecision,
+        deadline: Deadline,
+    ) -> dict:
+        payload = {"hits": self._format_hits(hits), "degraded": decision.name, "timed_out": deadline.timed_out_stage}
         if debug:
-            payload["debug"] = {
-                "bm25": [{"chunk_id": h.chunk_ref.chunk_id, "score": h.score} for h in retrieval_debug.bm25_hits[:top_k]],
-                "dense": [{"chunk_id": h.chunk_ref.chunk_id, "score": h.score} for h in retrieval_debug.dense_hits[:top_k]],
-                "fusion": {
-                    "lexical_weight": retrieval_debug.lexical_weight,
-                    "dense_weight": retrieval_debug.dense_weight,
-                    "candidate_size": retrieval_debug.candidate_size,
-                },
-                "thresholds": {
-                    "min_score_threshold": self.settings.min_score_threshold,
-                    "min_relative_score": self.settings.min_relative_score,
-                    "min_query_token_overlap": self.settings.min_query_token_overlap,
-                },
-            }
+            payload["debug"] = {**self._retrieval_debug(retrieval_debug, top_k), "thresholds": self._search_thresholds()}
         return payload
 
+    @staticmethod
+    def _retrieval_debug(retrieval_debug: RetrievalDebug, top_k: int) -> Dict[str, Any]:
+        return {
+            "bm25": [{"chunk_id": h.chunk_ref.chunk_id, "score": h.score} for h in retrieval_debug.bm25_hits[:top_k]],
+            "dense": [{"chunk_id": h.chunk_ref.chunk_id, "score": h.score} for h in retrieval_debug.dense_hits[:top_k]],
+            "fusion": {
+                "lexical_weight": retrieval_debug.lexical_weight,
+                "dense_weight": retrieval_debug.dense_weight,
+                "candidate_size": retrieval_debug.candidate_size,
+            },
+        }
+
+    def _search_thresholds(self) -> Dict[str, float]:
+        return {
+            "min_score_threshold": self.settings.min_score_threshold,
+            "min_relative_score": self.settings.min_relative_score,
+            "min_query_token_overlap": self.settings.min_query_token_overlap,
+        }
+
+    def _ask_thresholds(self) -> Dict[str, float]:
+        return {
+            **self._search_thresholds(),
+            "min_citation_relevance": self.settings.min_citation_relevance,
+            "min_top_relevance": self.settings.min_top_relevance,
+            "min_yesno_relevance": self.settings.min_yesno_relevance,
+            "min_open_query_token_coverage": self.settings.min_open_query_token_coverage,
+            "top_doc_token_coverage_min": 0.5,
+        }
+
+    def _attach_ask_debug(self, answer: AnswerPackage, retrieval_debug: RetrievalDebug, top_k: int) -> None:
+        answer.debug.update(self._retrieval_debug(retrieval_debug, top_k))
+        answer.debug["thresholds"] = self._ask_thresholds()
+
+    @staticmethod
+    def _slow_query_hits(hits: List[RetrievalHit]) -> List[Dict[str, Any]]:
+        return [
+            {"chunk_id": h.chunk_ref.chunk_id, "doc_id": h.chunk_ref.doc_id, "score": h.score, "retrieval_source": h.retrieval_source}
+            for h in hits
+        ]
+
     def ask(
         self,
         question: str,
@@ -83,31 +352,208 @@ class QAService:
         department_filter: str | None,
         access_level: str | None,
         debug: bool = False,
+        use_semantic_cache: bool = True,
+        timeout_ms: float | None = None,
     ) -> AnswerPackage:
-        hits, retrieval_debug = self.retrieval.retrieve(
-            query=question,
-            top_k=top_k,
-            department_filter=department_filter,
-            access_level=access_level,
-        )
-        answer = self.answerer.answer(question, hits, debug=debug)
+        # Identical concurrent questions share one retrieval + generation pass.
+        with start_span("qa.ask", top_k=top_k, department_filter=department_filter, access_level=access_level) as span:
+            if self.single_flight is None:
+                answer = self._ask(question, top_k, department_filter, access_level, debug, use_semantic_cache, timeout_ms)
+            else:
+                key = (normalize_question(question), top_k, department_filter, access_level, debug, use_semantic_cache, timeout_ms)
+                answer = self.single_flight.do(
+                    key,
+                    lambda: self._ask(question, top_k, department_filter, access_level, debug, use_semantic_cache, timeout_ms),
+                )
+            span.set_attributes(status=answer.status, degraded=answer.degraded, timed_out=answer.timed_out)
+            return answer
+
+    def _ask(
+        self,
+        question: str,
+        top_k: int,
+        department_filter: str | None,
+        access_level: str | None,
+        debug: bool,
+        use_semantic_cache: bool,
+        timeout_ms: float | None,
+    ) -> AnswerPackage:
+        scope = (top_k, department_filter, access_level, debug)
+        if self.semantic_cache is not None and use_semantic_cache:
+            cached = self.semantic_cache.lookup(question, scope)
+            if cached is not None:
+                return cached
+
+        with request_timings() as timings, self.indices.use() as indices:
+            started = time.perf_counter()
+            decision = self.degradation.decide("ask")
+            deadline = self._deadline(timeout_ms)
+            hits, retrieval_debug = indices.retrieval.retrieve(
+                query=question,
+                top_k=top_k,
+                department_filter=department_filter,
+                access_level=access_level,
+                use_dense=decision.use_dense,
+                max_candidate_size=decision.max_candidate_size,
+                deadline=deadline,
+            )
+            answer = self.answerer.answer(
+                question,
+                hits,
+                debug=debug,
+                llm=self._answer_llm(decision),
+                deadline=deadline,
+                degraded=decision.level > 0,
+            )
+            answer.degraded = decision.name
+            answer.timed_out = deadline.timed_out_stage
+            total_s = time.perf_counter() - started
+        self.degradation.record_latency("ask", total_s)
+        if self.slow_query_log is not None:
+            reasons = self.slow_query_log.reasons(total_s, timings)
+            if reasons:
+                request = {
+                    "question": question,
+                    "top_k": top_k,
+                    "department_filter": department_filter,
+                    "access_level": access_level,
+                    "timeout_ms": timeout_ms,
+                }
+                details = {
+                    "degraded": decision.name,
+                    "timed_out": deadline.timed_out_stage,
+                    "retrieval": {**self._retrieval_debug(retrieval_debug, top_k), "thresholds": self._ask_thresholds()},
+                    "hits": self._slow_query_hits(hits),
+                    "answer": {
+                        "status": answer.status,
+                        "confidence": answer.confidence,
+                        "citations": answer.citations,
+                        "signals": answer.signals,
+                    },
+                }
+                self.slow_query_log.capture("ask", reasons, total_s, timings, request, details)
 
         if debug:
-            answer.debug["bm25"] = [{"chunk_id": h.chunk_ref.chunk_id, "score": h.score} for h in retrieval_debug.bm25_hits[:top_k]]
-            answer.debug["dense"] = [{"chunk_id": h.chunk_ref.chunk_id, "score": h.score} for h in retrieval_debug.dense_hits[:top_k]]
-            answer.debug["fusion"] = {
-                "lexical_weight": retrieval_debug.lexical_weight,
-                "dense_weight": retrieval_debug.dense_weight,
-                "candidate_size": retrieval_debug.candidate_size,
-            }
-            answer.debug["thresholds"] = {
-                "min_score_threshold": self.settings.min_score_threshold,
-                "min_relative_score": self.settings.min_relative_score,
-                "min_query_token_overlap": self.settings.min_query_token_overlap,
-                "min_citation_relevance": self.settings.min_citation_relevance,
-                "min_top_relevance": self.settings.min_top_relevance,
-                "min_yesno_relevance": self.settings.min_yesno_relevance,
-                "min_open_query_token_coverage": self.settings.min_open_query_token_coverage,
-                "top_doc_token_coverage_min": 0.5,
-            }
+            self._attach_ask_debug(answer, retrieval_debug, top_k)
+        if self.semantic_cache is not None and use_semantic_cache and decision.name is None and answer.timed_out is None and not answer.fallback:
+            self.semantic_cache.store(question, scope, answer)
         return answer
+
+    def ask_many(self, requests: List[Dict[str, Any]], use_semantic_cache: bool = True) -> List[AnswerPackage | BaseException]:
+        # Each request dict carries question, top_k, department_filter,
+        # access_level and debug. Semantic cache hits are answered directly; the
+        # rest share one retrieval batch and one batched generation pass.
+        results: List[AnswerPackage | BaseException | None] = [None] * len(requests)
+        scopes = [
+            (req["top_k"], req.get("department_filter"), req.get("access_level"), req.get("debug", False))
+            for req in requests
+        ]
+        pending: List[int] = []
+        for i, req in enumerate(requests):
+            if self.semantic_cache is not None and use_semantic_cache:
+                cached = self.semantic_cache.lookup(req["question"], scopes[i])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+        if not pending:
+            return results
+
+        decision = self.degradation.decide("ask")
+        deadline = self._batch_deadline([requests[i] for i in pending])
+        try:
+            with self.indices.use() as indices:
+                retrieved = indices.retrieval.retrieve_many(
+                    [self._retrieval_request(requests[i], "question") for i in pending],
+                    use_dense=decision.use_dense,
+                    max_candidate_size=decision.max_candidate_size,
+                    deadline=deadline,
+                )
+        except Exception as exc:
+            for i in pending:
+                results[i] = exc
+            return results
+
+        answers = self.answerer.answer_many(
+            [requests[i]["question"] for i in pending],
+            [hits for hits, _ in retrieved],
+            debug=[requests[i].get("debug", False) for i in pending],
+            llm=self._answer_llm(decision),
+            deadline=deadline,
+            degraded=decision.level > 0,
+        )
+        for i, (_, retrieval_debug), answer in zip(pending, retrieved, answers):
+            results[i] = answer
+            if isinstance(answer, BaseException):
+                continue
+            answer.degraded = decision.name
+            answer.timed_out = deadline.timed_out_stage
+            if requests[i].get("debug", False):
+                self._attach_ask_debug(answer, retrieval_debug, requests[i]["top_k"])
+            if self.semantic_cache is not None and use_semantic_cache and decision.name is None and answer.timed_out is None and not answer.fallback:
+                self.semantic_cache.store(requests[i]["question"], scopes[i], answer)
+        return results
+
+    def ask_stream(
+        self,
+        question: str,
+        top_k: int,
+        department_filter: str | None,
+        access_level: str | None,
+        debug: bool = False,
+        timeout_ms: float | None = None,
+    ) -> Iterator[Dict[str, Any]]:
+        # Events: one "retrieval" event, zero or more "token" events, then a final
+        # "answer" event. The final answer is authoritative: guardrails may replace
+        # the streamed text with NOT_FOUND or rewrite it from the cited evidence.
+        # The events are produced while the response body is sent, so qa.ask
+        # spans the body rather than the handler call.
+        events = self._ask_stream(question, top_k, department_filter, access_level, debug, timeout_ms)
+        return trace_stream("qa.ask", events, top_k=top_k, department_filter=department_filter, access_level=access_level, stream=True)
+
+    def _ask_stream(
+        self,
+        question: str,
+        top_k: int,
+        department_filter: str | None,
+        access_level: str | None,
+        debug: bool,
+        timeout_ms: float | None,
+    ) -> Iterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        decision = self.degradation.decide("ask")
+        deadline = self._deadline(timeout_ms)
+        with self.indices.use() as indices:
+            hits, retrieval_debug = indices.retrieval.retrieve(
+                query=question,
+                top_k=top_k,
+                department_filter=department_filter,
+                access_level=access_level,
+                use_dense=decision.use_dense,
+                max_candidate_size=decision.max_candidate_size,
+                deadline=deadline,
+            )
+        yield {
+            "event": "retrieval",
+            "data": {"hits": self._format_hits(hits), "degraded": decision.name, "timed_out": deadline.timed_out_stage},
+        }
+
+        answer_events = self.answerer.answer_stream(
+            question,
+            hits,
+            debug=debug,
+            llm=self._answer_llm(decision),
+            deadline=deadline,
+            degraded=decision.level > 0,
+        )
+        for event in answer_events:
+            if event["event"] != "answer":
+                yield event
+                continue
+            self.degradation.record_latency("ask", time.perf_counter() - started)
+            answer: AnswerPackage = event["data"]
+            answer.degraded = decision.name
+            answer.timed_out = deadline.timed_out_stage
+            if debug:
+                self._attach_ask_debug(answer, retrieval_debug, top_k)
+            yield {"event": "answer", "data": answer.to_dict()}
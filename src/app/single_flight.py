@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable
+
+
+@dataclass
+class _Call:
+    done: Event = field(default_factory=Event)
+    result: Any = None
+    error: BaseException | None = None
+    waiters: int = 0
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first caller
+    # runs fn, later callers block until it finishes and get a deep copy of its
+    # result (or its exception). The key is forgotten as soon as the call ends,
+    # so this only covers the window before a cache could have the answer.
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn()
+            return result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                has_waiters = call.waiters > 0
+            if has_waiters and call.error is None:
+                # Followers copy from a snapshot, so the leader's caller is free to
+                # mutate the object it got back.
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+            }
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List
+
+from src.common.io import RotatingJsonlWriter
+from src.common.tracing import current_trace_id
+from src.config.settings import AppSettings
+
+
+class SlowQueryLog:
+    # Checked once per request against its total latency and per-stage timings.
+    # Only a slow request builds a debug record; serializing and writing it
+    # happen on the writer's background thread, with the file rotating at
+    # max_bytes and records dropped when the writer falls behind.
+    def __init__(self, settings: AppSettings) -> None:
+        self.total_ms = settings.slow_query_total_ms
+        self.stage_ms = dict(settings.slow_query_stage_ms)
+        self._writer = RotatingJsonlWriter(
+            settings.slow_query_path,
+            settings.slow_query_max_bytes,
+            settings.slow_query_backup_count,
+            max_queue=1000,
+            name="slow-query-log",
+        )
+        self.captured = 0
+
+    def reasons(self, total_s: float, timings: Dict[str, float]) -> List[str]:
+        reasons: List[str] = []
+        if self.total_ms > 0 and total_s * 1000.0 >= self.total_ms:
+            reasons.append("total")
+        for stage, limit_ms in self.stage_ms.items():
+            if stage in timings and timings[stage] * 1000.0 >= limit_ms:
+                reasons.append(stage)
+        return reasons
+
+    def capture(
+        self,
+        endpoint: str,
+        reasons: List[str],
+        total_s: float,
+        timings: Dict[str, float],
+        request: Dict[str, Any],
+        details: Dict[str, Any],
+    ) -> None:
+        self.captured += 1
+        self._writer.write(
+            {
+                "timestamp": time.time(),
+                "trace_id": current_trace_id(),
+                "endpoint": endpoint,
+                "reasons": reasons,
+                "total_ms": round(total_s * 1000.0, 3),
+                "stage_ms": {stage: round(seconds * 1000.0, 3) for stage, seconds in timings.items()},
+                "request": request,
+                **details,
+            }
+        )
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "captured": self.captured,
+            "written": self._writer.written,
+            "dropped": self._writer.dropped,
+        }
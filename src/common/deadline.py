@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import time
+
+
+class Deadline:
+    # Time budget for one request, shared by every stage it passes through.
+    # Stages call exceeded(stage) at their checkpoints and return whatever
+    # partial result they have; the first stage that ran out is recorded so the
+    # response can report where the budget was spent.
+    def __init__(self, timeout_s: float | None = None) -> None:
+        self.timeout_s = timeout_s
+        self.expires_at = None if timeout_s is None else time.monotonic() + timeout_s
+        self.timed_out_stage: str | None = None
+
+    @classmethod
+    def from_timeout_ms(cls, timeout_ms: float | None) -> "Deadline":
+        if timeout_ms is None or timeout_ms <= 0:
+            return cls(None)
+        return cls(timeout_ms / 1000.0)
+
+    def remaining_s(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def exceeded(self, stage: str) -> bool:
+        if not self.expired():
+            return False
+        if self.timed_out_stage is None:
+            self.timed_out_stage = stage
+        return True
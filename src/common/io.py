@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import json
+import os
+import queue
 from pathlib import Path
-from typing import Iterable, List, TypeVar, Callable
+from threading import Thread
+from typing import Any, Dict, Iterable, List, Optional, TypeVar, Callable
 
 T = TypeVar("T")
 
@@ -27,3 +30,75 @@ def read_jsonl(path: Path) -> List[dict]:
 
 def read_jsonl_typed(path: Path, factory: Callable[[dict], T]) -> List[T]:
     return [factory(item) for item in read_jsonl(path)]
+
+
+class RotatingJsonlWriter:
+    # Rows are queued by request threads and written by one background thread,
+    # one JSON object per line. The file is opened on the first write and
+    # rotates at max_bytes into path.1 .. path.N. When the queue is full new
+    # rows are dropped rather than blocking a request.
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = 10_000_000,
+        backup_count: int = 3,
+        max_queue: int = 10000,
+        name: str = "jsonl-writer",
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max(1, max_bytes)
+        self.backup_count = max(0, backup_count)
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._worker = Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return self.path.open("a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backup_count > 0:
+            for idx in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{idx}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{idx + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._file = self._open()
+
+    def _run(self) -> None:
+        while True:
+            row = self._queue.get()
+            try:
+                if row is None:
+                    if self._file is not None:
+                        self._file.close()
+                    return
+                if self._file is None:
+                    self._file = self._open()
+                self._file.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+                self.written += 1
+                if self._queue.empty():
+                    self._file.flush()
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join(timeout=5.0)
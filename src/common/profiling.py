@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import cProfile
+import importlib
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import FrameType, ModuleType
+from typing import Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+
+class StartupProfile:
+    # Collects wall-clock timings for imports and component loads. A disabled
+    # profile still runs every stage, it just records nothing.
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._started = time.perf_counter()
+        self.timings: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.timings.append((name, time.perf_counter() - started))
+
+    def record(self, name: str, seconds: float | None) -> None:
+        if self.enabled and seconds is not None:
+            self.timings.append((name, seconds))
+
+    def record_many(self, prefix: str, durations: Dict[str, float]) -> None:
+        for name, seconds in durations.items():
+            self.record(f"{prefix}{name}", seconds)
+
+    def import_module(self, name: str) -> ModuleType:
+        with self.stage(f"import {name}"):
+            return importlib.import_module(name)
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self._started
+        width = max([len(name) for name, _ in self.timings] + [len("elapsed")])
+        lines = ["Startup profile (seconds):"]
+        for name, seconds in self.timings:
+            lines.append(f"  {name.ljust(width)}  {seconds:8.4f}")
+        lines.append(f"  {'elapsed'.ljust(width)}  {elapsed:8.4f}")
+        return "\n".join(lines)
+
+    def print_report(self) -> None:
+        if self.enabled:
+            print(self.report(), file=sys.stderr)
+
+
+def record_service_loads(profile: StartupProfile, service) -> None:
+    profile.record_many("load ", service.load_durations_s)
+    profile.record("load embedding_model (lazy)", service.dense.backend.load_duration_s)
+    # Sharded retrievers search in the shards and have no local faiss index.
+    dense_index = getattr(service.dense, "index", None)
+    profile.record("load faiss_index (lazy)", dense_index.faiss_build_s if dense_index is not None else None)
+
+
+PROFILE_MODES = ("sample", "cprofile")
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+T = TypeVar("T")
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class _ProfileSession:
+    def __init__(self, mode: str, max_requests: int | None) -> None:
+        self.mode = mode
+        self.max_requests = max_requests
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.stats: pstats.Stats | None = None
+        self.threads: Counter = Counter()
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+
+    def start_thread(self) -> None:
+        with self._lock:
+            self.threads[threading.get_ident()] += 1
+
+    def active_threads(self) -> set:
+        with self._lock:
+            return set(self.threads)
+
+    def finish_thread(self) -> None:
+        with self._lock:
+            thread_id = threading.get_ident()
+            self.threads[thread_id] -= 1
+            if self.threads[thread_id] <= 0:
+                del self.threads[thread_id]
+
+    def finish_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            if self.max_requests is not None and self.requests >= self.max_requests:
+                self.done.set()
+
+    @contextmanager
+    def attach(self) -> Iterator[None]:
+        # Profiles the current thread for the duration of the block.
+        if self.mode != "cprofile":
+            self.start_thread()
+            try:
+                yield
+            finally:
+                self.finish_thread()
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this thread.
+            yield
+            return
+        self.start_thread()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.add_profile(profile)
+            self.finish_thread()
+
+
+# The session open in this process, for threads that work on behalf of requests
+# without being request threads themselves; see profile_worker().
+_open_session: _ProfileSession | None = None
+
+
+@contextmanager
+def profile_worker() -> Iterator[None]:
+    # Wraps work that a helper thread does for requests, such as the LLM batch
+    # collector running a batch or a streaming generate thread: while a session
+    # is open the thread is profiled for the block, without counting as a
+    # request.
+    session = _open_session
+    if session is None or session.done.is_set():
+        yield
+        return
+    with session.attach():
+        yield
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_SOURCE_ROOT):
+        filename = os.path.relpath(filename, os.path.dirname(_SOURCE_ROOT))
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class RequestProfiler:
+    # On-demand profiling of a live worker, one session at a time and never
+    # longer than max_seconds. "sample" reads the stacks of threads currently
+    # serving a request from a separate thread at a fixed interval and returns
+    # collapsed stacks ready for flamegraph.pl or speedscope; the request
+    # threads themselves run untouched. "cprofile" enables cProfile only around
+    # requests that start while the session is open, since a cProfile hook
+    # covers just its own thread; the result is a marshalled pstats file. Helper
+    # threads join through profile_worker(). Outside a session, request() costs
+    # a single attribute read.
+    def __init__(self, max_seconds: float = 60.0, sample_interval_s: float = 0.01) -> None:
+        self.max_seconds = max_seconds
+        self.sample_interval_s = max(0.001, sample_interval_s)
+        self._session: _ProfileSession | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        session = self._session
+        if session is None or session.done.is_set():
+            yield
+            return
+        try:
+            with session.attach():
+                yield
+        finally:
+            session.finish_request()
+
+    def request_stream(self, items: Iterable[T]) -> Iterator[T]:
+        # request() for a streaming response body, which runs after the handler
+        # returns and is pulled one item at a time from threadpool threads: each
+        # step is profiled on the thread that runs it, and the request counts
+        # once the body is exhausted or closed.
+        session = self._session
+        if session is None or session.done.is_set():
+            yield from items
+            return
+        iterator = iter(items)
+        try:
+            while True:
+                with session.attach():
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            session.finish_request()
+
+    def run(self, mode: str, seconds: float | None = None, requests: int | None = None) -> Tuple[bytes, _ProfileSession]:
+        # Blocks until the time budget runs out or the requested number of
+        # requests has finished, whichever comes first.
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        duration_s = min(seconds or self.max_seconds, self.max_seconds)
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusy("A profile is already running on this worker")
+            session = _ProfileSession(mode, requests)
+            self._session = session
+        global _open_session
+        _open_session = session
+        try:
+            if mode == "sample":
+                self._sample(session, time.monotonic() + duration_s)
+            else:
+                session.done.wait(duration_s)
+        finally:
+            with self._lock:
+                self._session = None
+            if _open_session is session:
+                _open_session = None
+            session.done.set()
+        return self._render(session), session
+
+    def _sample(self, session: _ProfileSession, stop_at: float) -> None:
+        while time.monotonic() < stop_at and not session.done.is_set():
+            threads = session.active_threads()
+            if threads:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id not in threads:
+                        continue
+                    labels: List[str] = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    session.stacks[";".join(reversed(labels))] += 1
+                session.samples += 1
+            session.done.wait(self.sample_interval_s)
+
+    @staticmethod
+    def _render(session: _ProfileSession) -> bytes:
+        if session.mode == "sample":
+            lines = [f"{stack} {count}" for stack, count in session.stacks.most_common()]
+            return ("\n".join(lines) + "\n" if lines else "").encode("utf-8")
+        return marshal.dumps(session.stats.stats if session.stats is not None else {})
@@ -42,6 +42,15 @@ class AnswerPackage:
     status: str
     clarifying_question: Optional[str] = None
     debug: Dict[str, Any] = field(default_factory=dict)
+    degraded: Optional[str] = None
+    timed_out: Optional[str] = None
+    # Guardrail signals behind the decision, always filled in and kept by the
+    # answer cache but never serialized; debug carries a copy when the client
+    # asks for it.
+    signals: Dict[str, Any] = field(default_factory=dict, repr=False)
+    # Built from the heuristic fallback after the configured model failed; kept
+    # out of every cache so the next request retries the model.
+    fallback: bool = field(default=False, repr=False)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -51,4 +60,6 @@ class AnswerPackage:
             "status": self.status,
             "clarifying_question": self.clarifying_question,
             "debug": self.debug,
+            "degraded": self.degraded,
+            "timed_out": self.timed_out,
         }
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, Optional, TypeVar
+
+from src.common.io import RotatingJsonlWriter
+
+# Request-scoped spans kept in a contextvar, so nested stages (and the FastAPI
+# threadpool, which copies the context) attach to the right parent. With no
+# tracer configured start_span() yields a shared no-op span and costs one
+# global read.
+
+_TRACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+T = TypeVar("T")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration_s: float = 0.0
+    status: str = "ok"
+    started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_s * 1000.0, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    trace_id: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    # Finished spans go through a background RotatingJsonlWriter; when its queue
+    # is full spans are dropped rather than blocking a request.
+    def __init__(self, path: Path, max_bytes: int = 10_000_000, backup_count: int = 3, max_queue: int = 10000) -> None:
+        self.path = Path(path)
+        self._writer = RotatingJsonlWriter(path, max_bytes, backup_count, max_queue, name="span-exporter")
+
+    @property
+    def dropped(self) -> int:
+        return self._writer.dropped
+
+    def export(self, span: Span) -> None:
+        self._writer.write(span.to_dict())
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class Tracer:
+    def __init__(self, exporter: JsonlSpanExporter) -> None:
+        self.exporter = exporter
+
+    def export(self, span: Span) -> None:
+        self.exporter.export(span)
+
+
+_TRACER: Optional[Tracer] = None
+_TRACER_LOCK = Lock()
+_CURRENT_SPAN: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def configure_tracing(enabled: bool, path: Path, max_bytes: int = 10_000_000, backup_count: int = 3) -> Optional[Tracer]:
+    global _TRACER
+    with _TRACER_LOCK:
+        previous = _TRACER
+        _TRACER = Tracer(JsonlSpanExporter(path, max_bytes, backup_count)) if enabled else None
+    if previous is not None:
+        previous.exporter.close()
+    return _TRACER
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _TRACER
+
+
+def valid_trace_id(value: Optional[str]) -> Optional[str]:
+    if value and _TRACE_ID_RE.match(value.strip().lower()):
+        return value.strip().lower()
+    return None
+
+
+def current_trace_id() -> Optional[str]:
+    span = _CURRENT_SPAN.get()
+    return span.trace_id if span is not None else None
+
+
+def begin_span(name: str, trace_id: Optional[str] = None, **attributes: Any) -> Span | _NoopSpan:
+    # A span that outlives the block that opened it, e.g. one covering a
+    # streaming response body. Its parent is the current span; it is not made
+    # current itself (see use_span) and is exported by end_span().
+    if _TRACER is None:
+        return NOOP_SPAN
+    parent = _CURRENT_SPAN.get()
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent is not None else (trace_id or uuid.uuid4().hex),
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent is not None else None,
+        start_time=time.time(),
+        attributes=dict(attributes),
+    )
+
+
+def end_span(span: Span | _NoopSpan, error: Optional[BaseException] = None) -> None:
+    tracer = _TRACER
+    if not isinstance(span, Span) or tracer is None:
+        return
+    if error is not None:
+        span.status = "error"
+        span.attributes["error"] = repr(error)
+    span.duration_s = time.perf_counter() - span.started
+    tracer.export(span)
+
+
+@contextmanager
+def use_span(span: Span | _NoopSpan) -> Iterator[Span | _NoopSpan]:
+    # Makes span the parent of spans opened inside the block.
+    if not isinstance(span, Span):
+        yield span
+        return
+    token = _CURRENT_SPAN.set(span)
+    try:
+        yield span
+    finally:
+        _CURRENT_SPAN.reset(token)
+
+
+def trace_stream(name: str, items: Iterable[T], **attributes: Any) -> Iterator[T]:
+    # start_span() around a lazily consumed iterator such as a streaming
+    # response body. The body is pulled one step at a time from threadpool
+    # threads, each in a fresh copy of the request context, so the span is
+    # made current around every step and ends when the iterator is exhausted
+    # or closed.
+    if _TRACER is None:
+        yield from items
+        return
+    span = begin_span(name, **attributes)
+    iterator = iter(items)
+    error = None
+    try:
+        while True:
+            with use_span(span):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    except GeneratorExit:
+        span.set_attribute("closed_early", True)
+        raise
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        end_span(span, error)
+
+
+@contextmanager
+def start_span(name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    span = begin_span(name, trace_id, **attributes)
+    if span is NOOP_SPAN:
+        yield span
+        return
+    error = None
+    try:
+        with use_span(span):
+            yield span
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        end_span(span, error)
@@ -14,6 +14,7 @@ class AppSettings:
     chunk_output_path: Path
     bm25_index_path: Path
     dense_index_dir: Path
+    index_store_dir: Path | None
     eval_dataset_path: Path
     chunk_size_tokens: int
     overlap_tokens: int
@@ -27,16 +28,75 @@ class AppSettings:
     retrieval_candidate_size: int
     recency_weight: float
     metadata_boost_weight: float
+    dense_search_backend: str
     embedding_model_name: str
     llm_backend: str
     llm_model_name: str
     max_new_tokens: int
+    llm_max_batch_size: int
+    llm_batch_max_wait_ms: float
+    llm_prefix_cache: bool
+    llm_http_url: str
+    llm_http_timeout_s: float
+    llm_http_retries: int
+    llm_http_pool_size: int
+    llm_server_backend: str
+    llm_background_load: bool
     min_citation_coverage: float
     min_citation_relevance: float
     min_top_relevance: float
     min_yesno_relevance: float
     min_open_query_token_coverage: float
     max_citations: int
+    answer_cache_size: int
+    answer_cache_path: Path | None
+    answer_cache_max_disk_entries: int
+    semantic_cache_enabled: bool
+    semantic_cache_size: int
+    semantic_cache_threshold: float
+    coalesce_requests: bool
+    admission_enabled: bool
+    admission_search_max_concurrency: int
+    admission_search_max_queue: int
+    admission_ask_max_concurrency: int
+    admission_ask_max_queue: int
+    admission_queue_timeout_ms: float
+    admission_retry_after_s: float
+    request_timeout_ms: float
+    tracing_enabled: bool
+    tracing_path: Path
+    tracing_max_bytes: int
+    tracing_backup_count: int
+    slow_query_enabled: bool
+    slow_query_total_ms: float
+    slow_query_stage_ms: Dict[str, float]
+    slow_query_path: Path
+    slow_query_max_bytes: int
+    slow_query_backup_count: int
+    profiler_enabled: bool
+    profiler_max_seconds: float
+    profiler_sample_interval_ms: float
+    index_keep_versions: int
+    index_warmup_queries: tuple[str, ...]
+    index_watch_interval_s: float
+    serving_workers: int
+    serving_mmap_indices: bool
+    retrieval_shards: int
+    retrieval_shard_executor: str
+    ingestion_workers: int
+    ingestion_max_pending: int
+    ingestion_report_path: Path | None
+    ingestion_manifest_path: Path | None
+    ingestion_watch_enabled: bool
+    ingestion_watch_interval_s: float
+    ingestion_debounce_s: float
+    ingestion_status_path: Path | None
+    degradation_enabled: bool
+    degradation_ladder: tuple[str, ...]
+    degradation_queue_depths: tuple[int, ...]
+    degradation_latency_ms: tuple[float, ...]
+    degradation_latency_window: int
+    degradation_reduced_candidate_size: int
 
 
 _REQUIRED_PATHS = (
@@ -71,12 +131,19 @@ def load_settings(config_path: str | Path) -> AppSettings:
     for key in _REQUIRED_PATHS:
         _get(cfg, key)
 
+    answer_cache_path = _get_optional(cfg, "cache.answer_cache_path", None)
+    index_store_dir = _get_optional(cfg, "paths.index_store_dir", None)
+    ingestion_report_path = _get_optional(cfg, "ingestion.report_path", None)
+    ingestion_manifest_path = _get_optional(cfg, "ingestion.manifest_path", None)
+    ingestion_status_path = _get_optional(cfg, "ingestion.status_path", None)
+
     settings = AppSettings(
         version=str(_get(cfg, "app.version")),
         raw_data_dir=Path(_get(cfg, "paths.raw_data_dir")),
         chunk_output_path=Path(_get(cfg, "paths.chunk_output_path")),
         bm25_index_path=Path(_get(cfg, "paths.bm25_index_path")),
         dense_index_dir=Path(_get(cfg, "paths.dense_index_dir")),
+        index_store_dir=Path(index_store_dir) if index_store_dir else None,
         eval_dataset_path=Path(_get(cfg, "paths.eval_dataset_path")),
         chunk_size_tokens=int(_get(cfg, "chunking.chunk_size_tokens")),
         overlap_tokens=int(_get(cfg, "chunking.overlap_tokens")),
@@ -90,16 +157,79 @@ def load_settings(config_path: str | Path) -> AppSettings:
         retrieval_candidate_size=int(_get_optional(cfg, "retrieval.candidate_size", 20)),
         recency_weight=float(_get_optional(cfg, "retrieval.recency_weight", 0.08)),
         metadata_boost_weight=float(_get_optional(cfg, "retrieval.metadata_boost_weight", 0.18)),
+        dense_search_backend=str(_get_optional(cfg, "retrieval.dense_search_backend", "auto")),
         embedding_model_name=str(_get(cfg, "models.embedding_model_name")),
         llm_backend=str(_get(cfg, "models.llm_backend")),
         llm_model_name=str(_get(cfg, "models.llm_model_name")),
         max_new_tokens=int(_get(cfg, "models.max_new_tokens")),
+        llm_max_batch_size=int(_get_optional(cfg, "models.max_batch_size", 1)),
+        llm_batch_max_wait_ms=float(_get_optional(cfg, "models.batch_max_wait_ms", 10.0)),
+        llm_prefix_cache=bool(_get_optional(cfg, "models.prefix_cache", True)),
+        llm_http_url=str(_get_optional(cfg, "models.llm_http_url", "http://127.0.0.1:8100")),
+        llm_http_timeout_s=float(_get_optional(cfg, "models.llm_http_timeout_s", 60.0)),
+        llm_http_retries=int(_get_optional(cfg, "models.llm_http_retries", 2)),
+        llm_http_pool_size=int(_get_optional(cfg, "models.llm_http_pool_size", 8)),
+        llm_server_backend=str(_get_optional(cfg, "models.llm_server_backend", "transformers")),
+        llm_background_load=bool(_get_optional(cfg, "models.llm_background_load", True)),
         min_citation_coverage=float(_get(cfg, "guardrails.min_citation_coverage")),
         min_citation_relevance=float(_get_optional(cfg, "guardrails.min_citation_relevance", 0.08)),
         min_top_relevance=float(_get_optional(cfg, "guardrails.min_top_relevance", 0.08)),
         min_yesno_relevance=float(_get_optional(cfg, "guardrails.min_yesno_relevance", 0.6)),
         min_open_query_token_coverage=float(_get_optional(cfg, "guardrails.min_open_query_token_coverage", 0.34)),
         max_citations=int(_get_optional(cfg, "guardrails.max_citations", 3)),
+        answer_cache_size=int(_get_optional(cfg, "cache.answer_cache_size", 512)),
+        answer_cache_path=Path(answer_cache_path) if answer_cache_path else None,
+        answer_cache_max_disk_entries=int(_get_optional(cfg, "cache.answer_cache_max_disk_entries", 10000)),
+        semantic_cache_enabled=bool(_get_optional(cfg, "cache.semantic_cache_enabled", False)),
+        semantic_cache_size=int(_get_optional(cfg, "cache.semantic_cache_size", 256)),
+        semantic_cache_threshold=float(_get_optional(cfg, "cache.semantic_cache_threshold", 0.92)),
+        coalesce_requests=bool(_get_optional(cfg, "cache.coalesce_requests", True)),
+        admission_enabled=bool(_get_optional(cfg, "admission.enabled", True)),
+        admission_search_max_concurrency=int(_get_optional(cfg, "admission.search_max_concurrency", 8)),
+        admission_search_max_queue=int(_get_optional(cfg, "admission.search_max_queue", 16)),
+        admission_ask_max_concurrency=int(_get_optional(cfg, "admission.ask_max_concurrency", 4)),
+        admission_ask_max_queue=int(_get_optional(cfg, "admission.ask_max_queue", 8)),
+        admission_queue_timeout_ms=float(_get_optional(cfg, "admission.queue_timeout_ms", 2000.0)),
+        admission_retry_after_s=float(_get_optional(cfg, "admission.retry_after_s", 1.0)),
+        request_timeout_ms=float(_get_optional(cfg, "admission.request_timeout_ms", 30000.0)),
+        tracing_enabled=bool(_get_optional(cfg, "tracing.enabled", False)),
+        tracing_path=Path(_get_optional(cfg, "tracing.path", "data/traces/spans.jsonl")),
+        tracing_max_bytes=int(_get_optional(cfg, "tracing.max_bytes", 10_000_000)),
+        tracing_backup_count=int(_get_optional(cfg, "tracing.backup_count", 3)),
+        slow_query_enabled=bool(_get_optional(cfg, "slow_query_log.enabled", True)),
+        slow_query_total_ms=float(_get_optional(cfg, "slow_query_log.total_ms", 2000)),
+        slow_query_stage_ms={
+            str(stage): float(limit) for stage, limit in (_get_optional(cfg, "slow_query_log.stage_ms", None) or {}).items()
+        },
+        slow_query_path=Path(_get_optional(cfg, "slow_query_log.path", "data/logs/slow_queries.jsonl")),
+        slow_query_max_bytes=int(_get_optional(cfg, "slow_query_log.max_bytes", 5_000_000)),
+        slow_query_backup_count=int(_get_optional(cfg, "slow_query_log.backup_count", 3)),
+        profiler_enabled=bool(_get_optional(cfg, "profiler.enabled", False)),
+        profiler_max_seconds=float(_get_optional(cfg, "profiler.max_seconds", 60)),
+        profiler_sample_interval_ms=float(_get_optional(cfg, "profiler.sample_interval_ms", 10)),
+        index_keep_versions=int(_get_optional(cfg, "index.keep_versions", 3)),
+        index_warmup_queries=tuple(str(q) for q in _get_optional(cfg, "index.warmup_queries", None) or []),
+        index_watch_interval_s=float(_get_optional(cfg, "index.watch_interval_s", 0)),
+        serving_workers=int(_get_optional(cfg, "serving.workers", 1)),
+        serving_mmap_indices=bool(_get_optional(cfg, "serving.mmap_indices", True)),
+        retrieval_shards=int(_get_optional(cfg, "retrieval.shards", 0)),
+        retrieval_shard_executor=str(_get_optional(cfg, "retrieval.shard_executor", "process")),
+        ingestion_workers=int(_get_optional(cfg, "ingestion.workers", 1)),
+        ingestion_max_pending=int(_get_optional(cfg, "ingestion.max_pending", 0)),
+        ingestion_report_path=Path(ingestion_report_path) if ingestion_report_path else None,
+        ingestion_manifest_path=Path(ingestion_manifest_path) if ingestion_manifest_path else None,
+        ingestion_watch_enabled=bool(_get_optional(cfg, "ingestion.watch_enabled", False)),
+        ingestion_watch_interval_s=float(_get_optional(cfg, "ingestion.watch_interval_s", 5)),
+        ingestion_debounce_s=float(_get_optional(cfg, "ingestion.debounce_s", 2)),
+        ingestion_status_path=Path(ingestion_status_path) if ingestion_status_path else None,
+        degradation_enabled=bool(_get_optional(cfg, "degradation.enabled", True)),
+        degradation_ladder=tuple(
+            str(step) for step in _get_optional(cfg, "degradation.ladder", ["heuristic_llm", "bm25_only", "reduced_candidates"])
+        ),
+        degradation_queue_depths=tuple(int(v) for v in _get_optional(cfg, "degradation.queue_depths", [2, 4, 6])),
+        degradation_latency_ms=tuple(float(v) for v in _get_optional(cfg, "degradation.latency_ms", [8000, 15000, 25000])),
+        degradation_latency_window=int(_get_optional(cfg, "degradation.latency_window", 50)),
+        degradation_reduced_candidate_size=int(_get_optional(cfg, "degradation.reduced_candidate_size", 10)),
     )
 
     return settings
@@ -114,3 +244,5 @@ def ensure_directories(settings: AppSettings) -> None:
         settings.eval_dataset_path.parent,
     ):
         path.mkdir(parents=True, exist_ok=True)
+    if settings.index_store_dir is not None:
+        settings.index_store_dir.mkdir(parents=True, exist_ok=True)
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import dataclasses
 from pathlib import Path
 from typing import Dict, List
 
+from src.app.semantic_cache import SemanticCacheHit
 from src.app.service import QAService
-from src.config.settings import load_settings
+from src.common.profiling import StartupProfile, record_service_loads
+from src.config.settings import AppSettings, load_settings
 from src.eval.dataset import EvalItem, load_eval_dataset
 from src.eval.metrics import aggregate_retrieval_metrics, mrr, recall_at_k
 from src.retrieval.hybrid import fuse_hits
 
 
+def eval_settings(settings: AppSettings) -> AppSettings:
+    # A slow local model pushes the recent p95 past the degradation thresholds,
+    # and later questions would then be answered by the fallback ladder. Eval
+    # metrics must describe the configured system, so the ladder is off.
+    return dataclasses.replace(settings, degradation_enabled=False)
+
+
 def _retrieve_ids(service: QAService, question: str, top_k: int, mode: str) -> List[str]:
     if mode == "bm25":
         hits = service.bm25.retrieve(question, top_k=top_k, department_filter=None, access_level="restricted")
@@ -71,8 +81,27 @@ def run_answer_eval(service: QAService, items: List[EvalItem], top_k: int = 5) -
     fp_not_found = 0
     fn_not_found = 0
     negative_items = 0
+    semantic_hits: List[SemanticCacheHit] = []
+    semantic_false_hits = 0
+    if service.semantic_cache is not None:
+        service.semantic_cache.add_hit_listener(semantic_hits.append)
     for item in items:
+        hits_before = len(semantic_hits)
         answer = service.ask(item.question, top_k=top_k, department_filter=None, access_level="restricted", debug=False)
+        if len(semantic_hits) > hits_before:
+            # Audit the near-duplicate hit against a fresh answer for this exact question.
+            reference = service.ask(
+                item.question,
+                top_k=top_k,
+                department_filter=None,
+                access_level="restricted",
+                debug=False,
+                use_semantic_cache=False,
+            )
+            cited = [c.get("chunk_id") for c in answer.citations]
+            if reference.status != answer.status or [c.get("chunk_id") for c in reference.citations] != cited:
+                service.semantic_cache.record_false_hit(semantic_hits[-1])
+                semantic_false_hits += 1
         expected_not_found = len(item.gold_chunk_ids) == 0 or item.query_type == "negative"
         predicted_not_found = answer.status == "NOT_FOUND"
         if expected_not_found:
@@ -108,12 +137,24 @@ def run_answer_eval(service: QAService, items: List[EvalItem], top_k: int = 5) -
         "no_answer_recall": recall,
         "no_answer_f1": f1,
     }
+    if service.semantic_cache is not None:
+        service.semantic_cache.remove_hit_listener(semantic_hits.append)
+        summary["semantic_cache_hits"] = len(semantic_hits)
+        summary["semantic_cache_false_hits"] = semantic_false_hits
     return {"summary": summary, "rows": rows}
 
 
-def run_full_eval(config_path: str, top_k: int = 5, dataset_path: str | None = None) -> Dict:
-    settings = load_settings(config_path)
-    service = QAService(settings)
+def run_full_eval(
+    config_path: str,
+    top_k: int = 5,
+    dataset_path: str | None = None,
+    profile: StartupProfile | None = None,
+) -> Dict:
+    profile = profile or StartupProfile(enabled=False)
+    with profile.stage("load settings"):
+        settings = eval_settings(load_settings(config_path))
+    with profile.stage("construct QAService"):
+        service = QAService(settings)
     eval_path = Path(dataset_path) if dataset_path else Path(settings.eval_dataset_path)
     items = load_eval_dataset(eval_path)
 
@@ -123,4 +164,6 @@ def run_full_eval(config_path: str, top_k: int = 5, dataset_path: str | None = N
         "hybrid": run_retrieval_eval(service, items, top_k=top_k, mode="hybrid"),
     }
     answer = run_answer_eval(service, items, top_k=top_k)
+    # Recorded after the run so lazily loaded components (embedding model, faiss) are included.
+    record_service_loads(profile, service)
     return {"retrieval": retrieval, "answer": answer}
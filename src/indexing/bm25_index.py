@@ -1,15 +1,208 @@
 from __future__ import annotations
 
+import json
 import pickle
 import re
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Mapping, Sequence, Tuple
 
 import numpy as np
 
 from src.common.schemas import DocumentChunk, RetrievalHit
 
 
+class _MappedVocab:
+    # Term -> id lookup over the sorted vocabulary stored as one UTF-8 blob
+    # plus offsets. Ids are assigned in sorted term order and UTF-8 byte order
+    # matches code point order, so a binary search over the mapped bytes
+    # replaces the per-process dict.
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    def _term(self, term_id: int) -> bytes:
+        return self.blob[int(self.offsets[term_id]) : int(self.offsets[term_id + 1])].tobytes()
+
+    def get(self, tok: str, default: int | None = None) -> int | None:
+        key = tok.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self._term(lo) == key:
+            return lo
+        return default
+
+    def __len__(self) -> int:
+        return int(self.offsets.shape[0]) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        for term_id in range(len(self)):
+            yield self._term(term_id).decode("utf-8")
+
+
+class BM25Postings:
+    # Term -> (doc ids, term frequencies) in CSR form plus per-term idf and
+    # per-doc length, all flat numpy arrays. Saved as separate .npy files so
+    # they can be memory-mapped read-only: every worker process then shares
+    # the same page-cache pages instead of holding its own copy of the corpus
+    # statistics. Scoring matches BM25Okapi.get_scores (or the simple tf-idf
+    # fallback) exactly.
+    def __init__(
+        self,
+        vocab: Mapping[str, int] | _MappedVocab,
+        term_offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        idf: np.ndarray,
+        doc_len: np.ndarray,
+        scoring: str,
+        k1: float = 1.5,
+        b: float = 0.75,
+        avgdl: float = 1.0,
+    ) -> None:
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.idf = idf
+        self.doc_len = doc_len
+        self.scoring = scoring
+        self.k1 = k1
+        self.b = b
+        self.avgdl = avgdl
+
+    _ARRAYS = ("term_offsets", "doc_ids", "term_freqs", "idf", "doc_len")
+
+    @classmethod
+    def from_index(cls, index: "BM25Index") -> "BM25Postings":
+        if index._postings is not None:
+            return index._postings
+        if index._use_rank_bm25 and index._bm25 is not None:
+            doc_freqs = index._bm25.doc_freqs
+            idf_map = index._bm25.idf
+        else:
+            doc_freqs = []
+            for tokens in index.corpus_tokens:
+                counts: Dict[str, int] = {}
+                for tok in tokens:
+                    counts[tok] = counts.get(tok, 0) + 1
+                doc_freqs.append(counts)
+            idf_map = index._idf
+        vocab = {tok: i for i, tok in enumerate(sorted({tok for counts in doc_freqs for tok in counts}))}
+        entries = [(vocab[tok], doc, tf) for doc, counts in enumerate(doc_freqs) for tok, tf in counts.items()]
+        entries.sort()
+        term_ids = np.array([e[0] for e in entries], dtype=np.int64)
+        term_offsets = np.searchsorted(term_ids, np.arange(len(vocab) + 1)).astype(np.int64)
+        terms = sorted(vocab, key=vocab.get)
+        if index._use_rank_bm25 and index._bm25 is not None:
+            bm25 = index._bm25
+            return cls(
+                vocab=vocab,
+                term_offsets=term_offsets,
+                doc_ids=np.array([e[1] for e in entries], dtype=np.int32),
+                term_freqs=np.array([e[2] for e in entries], dtype=np.float64),
+                idf=np.array([idf_map.get(tok) or 0.0 for tok in terms], dtype=np.float64),
+                doc_len=np.array(bm25.doc_len, dtype=np.float64),
+                scoring="okapi",
+                k1=bm25.k1,
+                b=bm25.b,
+                avgdl=bm25.avgdl,
+            )
+        return cls(
+            vocab=vocab,
+            term_offsets=term_offsets,
+            doc_ids=np.array([e[1] for e in entries], dtype=np.int32),
+            term_freqs=np.array([e[2] for e in entries], dtype=np.float64),
+            idf=np.array([idf_map.get(tok, 1.0) for tok in terms], dtype=np.float64),
+            doc_len=np.array([len(tokens) for tokens in index.corpus_tokens], dtype=np.float64),
+            scoring="simple",
+        )
+
+    @property
+    def n_docs(self) -> int:
+        return int(self.doc_len.shape[0])
+
+    def token_postings(self, tok: str) -> Tuple[np.ndarray, np.ndarray] | None:
+        term_id = self.vocab.get(tok)
+        if term_id is None:
+            return None
+        start, end = int(self.term_offsets[term_id]), int(self.term_offsets[term_id + 1])
+        docs = self.doc_ids[start:end]
+        tf = self.term_freqs[start:end]
+        if self.scoring == "okapi":
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avgdl)
+            return docs, self.idf[term_id] * (tf * (self.k1 + 1) / (tf + norm))
+        return docs, tf * self.idf[term_id]
+
+    def token_scores(self, tok: str) -> np.ndarray:
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        found = self.token_postings(tok)
+        if found is not None:
+            scores[found[0]] = found[1]
+        return scores
+
+    def scores(self, query_tokens: List[str]) -> np.ndarray:
+        total = np.zeros(self.n_docs, dtype=np.float64)
+        for tok in query_tokens:
+            found = self.token_postings(tok)
+            if found is not None:
+                total[found[0]] += found[1]
+        return total
+
+    def partition(self, doc_ids: np.ndarray) -> "BM25Postings":
+        # Postings restricted to doc_ids (sorted global ids), renumbered 0..n-1.
+        # idf, avgdl and the vocabulary stay those of the whole collection, so
+        # scores on a shard equal scores in the full index.
+        keep = np.zeros(self.n_docs, dtype=bool)
+        keep[doc_ids] = True
+        local_ids = np.full(self.n_docs, -1, dtype=np.int64)
+        local_ids[doc_ids] = np.arange(len(doc_ids))
+        mask = keep[self.doc_ids]
+        term_of_posting = np.repeat(np.arange(len(self.vocab)), np.diff(self.term_offsets))
+        return BM25Postings(
+            vocab=self.vocab,
+            term_offsets=np.searchsorted(term_of_posting[mask], np.arange(len(self.vocab) + 1)).astype(np.int64),
+            doc_ids=local_ids[self.doc_ids[mask]].astype(np.int32),
+            term_freqs=np.asarray(self.term_freqs[mask]),
+            idf=np.asarray(self.idf),
+            doc_len=np.asarray(self.doc_len[doc_ids]),
+            scoring=self.scoring,
+            k1=self.k1,
+            b=self.b,
+            avgdl=self.avgdl,
+        )
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        meta = {"scoring": self.scoring, "k1": self.k1, "b": self.b, "avgdl": self.avgdl}
+        (directory / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        terms = sorted(self.vocab, key=self.vocab.get)
+        (directory / "vocab.json").write_text(json.dumps(terms, ensure_ascii=False), encoding="utf-8")
+        encoded = [tok.encode("utf-8") for tok in terms]
+        np.save(directory / "vocab_blob.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(directory / "vocab_offsets.npy", np.cumsum([0] + [len(tok) for tok in encoded], dtype=np.int64))
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = False) -> "BM25Postings":
+        # Versions built before the mapped vocabulary only have vocab.json.
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None) for name in cls._ARRAYS}
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        if mmap and (directory / "vocab_offsets.npy").exists():
+            vocab = _MappedVocab(
+                np.load(directory / "vocab_blob.npy", mmap_mode="r"),
+                np.load(directory / "vocab_offsets.npy", mmap_mode="r"),
+            )
+            return cls(vocab=vocab, **arrays, **meta)
+        terms = json.loads((directory / "vocab.json").read_text(encoding="utf-8"))
+        return cls(vocab={tok: i for i, tok in enumerate(terms)}, **arrays, **meta)
+
+
 class BM25Index:
     _TOKEN_RE = re.compile(r"[0-9A-Za-zÀ-ỹà-ỹ_]+", flags=re.UNICODE)
     _TOKEN_ALIASES = {
@@ -18,8 +211,13 @@ class BM25Index:
         "thuat": "engineering",
     }
 
+    # Set when loaded from BM25Postings arrays; older pickles fall back to the
+    # class default.
+    _postings: BM25Postings | None = None
+
     def __init__(self, chunks: List[DocumentChunk]) -> None:
         self.chunks = chunks
+        self._postings = None
         self.corpus_tokens = [self._tokenize(self._index_text(chunk)) for chunk in chunks]
         self._bm25 = None
         self._use_rank_bm25 = False
@@ -65,20 +263,30 @@ class BM25Index:
             scores[i] = score
         return scores
 
-    def search(
+    def _token_scores(self, tok: str) -> np.ndarray:
+        # Per-token contribution to every document score; summing these over the
+        # query tokens reproduces BM25Okapi.get_scores / _simple_scores exactly.
+        if self._postings is not None:
+            return self._postings.token_scores(tok)
+        if self._use_rank_bm25 and self._bm25 is not None:
+            bm25 = self._bm25
+            q_freq = np.array([(doc.get(tok) or 0) for doc in bm25.doc_freqs])
+            doc_len = np.array(bm25.doc_len)
+            return (bm25.idf.get(tok) or 0) * (
+                q_freq * (bm25.k1 + 1) / (q_freq + bm25.k1 * (1 - bm25.b + bm25.b * doc_len / bm25.avgdl))
+            )
+        tf = np.array([tokens.count(tok) for tokens in self.corpus_tokens], dtype=np.float64)
+        return tf * self._idf.get(tok, 1.0)
+
+    def _collect_hits(
         self,
-        query: str,
+        scores: np.ndarray,
         top_k: int,
-        department_filter: str | None = None,
-        access_level: str | None = None,
+        department_filter: str | None,
+        access_level: str | None,
     ) -> List[RetrievalHit]:
-        query_tokens = self._tokenize(query)
-        if self._use_rank_bm25 and self._bm25 is not None:
-            scores = np.array(self._bm25.get_scores(query_tokens), dtype=np.float32)
-        else:
-            scores = self._simple_scores(query_tokens)
-
-        ranked_idx = np.argsort(scores)[::-1]
+        # Ties keep index order, which is also the shard merge order.
+        ranked_idx = np.argsort(-scores, kind="stable")
         hits: List[RetrievalHit] = []
 
         for idx in ranked_idx:
@@ -102,6 +310,41 @@ class BM25Index:
                 break
         return hits
 
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+    ) -> List[RetrievalHit]:
+        query_tokens = self._tokenize(query)
+        if self._postings is not None:
+            scores = self._postings.scores(query_tokens).astype(np.float32)
+        elif self._use_rank_bm25 and self._bm25 is not None:
+            scores = np.array(self._bm25.get_scores(query_tokens), dtype=np.float32)
+        else:
+            scores = self._simple_scores(query_tokens)
+        return self._collect_hits(scores, top_k, department_filter, access_level)
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+    ) -> List[List[RetrievalHit]]:
+        # Postings for a term are scanned once per batch, however many queries share it.
+        token_scores: Dict[str, np.ndarray] = {}
+        results: List[List[RetrievalHit]] = []
+        for query, top_k, department_filter, access_level in zip(queries, top_ks, department_filters, access_levels):
+            total = np.zeros(len(self.chunks), dtype=np.float64)
+            for tok in self._tokenize(query):
+                if tok not in token_scores:
+                    token_scores[tok] = self._token_scores(tok)
+                total += token_scores[tok]
+            results.append(self._collect_hits(total.astype(np.float32), top_k, department_filter, access_level))
+        return results
+
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
         with path.open("wb") as f:
@@ -111,3 +354,23 @@ class BM25Index:
     def load(path: Path) -> "BM25Index":
         with path.open("rb") as f:
             return pickle.load(f)
+
+    def save_arrays(self, directory: Path) -> None:
+        # Chunks are not written here; they are shared with the dense index.
+        BM25Postings.from_index(self).save(directory)
+
+    @classmethod
+    def load_arrays(cls, directory: Path, chunks: Sequence[DocumentChunk], mmap: bool = False) -> "BM25Index":
+        return cls.from_postings(chunks, BM25Postings.load(directory, mmap=mmap))
+
+    @classmethod
+    def from_postings(cls, chunks: Sequence[DocumentChunk], postings: BM25Postings) -> "BM25Index":
+        if postings.n_docs != len(chunks):
+            raise ValueError(f"BM25 arrays cover {postings.n_docs} docs but {len(chunks)} chunks were given")
+        index = cls.__new__(cls)
+        index.chunks = chunks
+        index.corpus_tokens = []
+        index._bm25 = None
+        index._use_rank_bm25 = False
+        index._postings = postings
+        return index
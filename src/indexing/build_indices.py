@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+from pathlib import Path
 from typing import List
 
 from src.common.io import read_jsonl
@@ -7,6 +9,8 @@ from src.common.schemas import DocumentChunk
 from src.config.settings import AppSettings
 from src.indexing.bm25_index import BM25Index
 from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+from src.indexing.index_store import BM25_DIR, DENSE_DIR, IndexLocation, IndexStore
+from src.ingestion.manifest import ChangeSet
 
 
 def load_chunks(settings: AppSettings) -> List[DocumentChunk]:
@@ -14,12 +18,82 @@ def load_chunks(settings: AppSettings) -> List[DocumentChunk]:
     return [DocumentChunk(**row) for row in rows]
 
 
-def build_all_indices(settings: AppSettings) -> None:
+def resolve_index_location(settings: AppSettings) -> IndexLocation:
+    # The CURRENT version of the index store when one has been published,
+    # otherwise the flat paths.bm25_index_path / paths.dense_index_dir layout.
+    if settings.index_store_dir is not None:
+        store = IndexStore(settings.index_store_dir)
+        version = store.current_version()
+        if version is not None:
+            return store.location(version)
+    return IndexLocation(
+        version=_file_version(settings.bm25_index_path, settings.dense_index_dir),
+        bm25_path=settings.bm25_index_path,
+        dense_dir=settings.dense_index_dir,
+    )
+
+
+def _previous_dense(location: IndexLocation) -> DenseIndex | None:
+    if not (location.dense_dir / "embeddings.npy").exists():
+        return None
+    try:
+        return DenseIndex.load(location.dense_dir, search_backend="numpy")
+    except Exception:
+        return None
+
+
+def build_all_indices(settings: AppSettings, changes: ChangeSet | None = None) -> IndexLocation:
+    # changes comes from an incremental ingest: when nothing changed the live
+    # indices are kept as they are, otherwise embeddings of chunks the live
+    # dense index already holds are reused. BM25 is always rebuilt, since idf
+    # and average length depend on the whole corpus and are cheap to recount.
     chunks = load_chunks(settings)
+    previous = None
+    if changes is not None:
+        location = resolve_index_location(settings)
+        previous = _previous_dense(location)
+        # The ids check catches an earlier ingest whose index build never ran.
+        if (
+            changes.is_empty
+            and previous is not None
+            and location.bm25_path.exists()
+            and [c.chunk_id for c in previous.chunks] == [c.chunk_id for c in chunks]
+        ):
+            return location
 
     bm25 = BM25Index(chunks)
-    bm25.save(settings.bm25_index_path)
-
     backend = EmbeddingBackend(settings.embedding_model_name)
-    dense = DenseIndex.build(chunks, backend)
-    dense.save(settings.dense_index_dir)
+    dense = DenseIndex.build(chunks, backend, previous=previous)
+
+    if settings.index_store_dir is None:
+        bm25.save(settings.bm25_index_path)
+        dense.save(settings.dense_index_dir)
+        return resolve_index_location(settings)
+
+    store = IndexStore(settings.index_store_dir)
+    staging = store.staging_dir()
+    bm25.save_arrays(staging / BM25_DIR)
+    dense.save(staging / DENSE_DIR)
+    version = store.commit(staging)
+    store.publish(version)
+    store.prune(settings.index_keep_versions)
+    return store.location(version)
+
+
+def _file_version(bm25_path: Path, dense_dir: Path) -> str:
+    parts = []
+    for path in (
+        bm25_path,
+        dense_dir / "embeddings.npy",
+        dense_dir / "chunks.jsonl",
+    ):
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        else:
+            parts.append(f"{path.name}:missing")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def index_version(settings: AppSettings) -> str:
+    return resolve_index_location(settings).version
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+import mmap
+from pathlib import Path
+from typing import Iterator, List, Sequence
+
+import numpy as np
+
+from src.common.schemas import DocumentChunk
+
+
+def offsets_path(chunks_path: Path) -> Path:
+    return chunks_path.with_name(f"{chunks_path.name}.offsets.npy")
+
+
+def write_offsets(chunks_path: Path) -> None:
+    # Byte offset of every line of a chunks JSONL file, plus the file size, so
+    # line i is blob[offsets[i]:offsets[i + 1]].
+    offsets = [0]
+    with chunks_path.open("rb") as f:
+        for line in f:
+            offsets.append(offsets[-1] + len(line))
+    np.save(offsets_path(chunks_path), np.array(offsets, dtype=np.int64))
+
+
+class ChunkStore(Sequence[DocumentChunk]):
+    # Read-only chunk list over a chunks JSONL file and its line offsets, both
+    # memory-mapped, so worker processes share one copy of the chunk text and
+    # metadata through the page cache. A DocumentChunk is only built when a
+    # hit or filter reads it, and is not kept: two reads of the same row give
+    # equal, not identical, objects.
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.offsets = np.load(offsets_path(self.path), mmap_mode="r")
+        with self.path.open("rb") as f:
+            size = f.seek(0, 2)
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if int(self.offsets[-1]) != size:
+            raise ValueError(f"{self.path} does not match its line offsets")
+
+    @classmethod
+    def available(cls, path: Path) -> bool:
+        return offsets_path(Path(path)).exists()
+
+    def __len__(self) -> int:
+        return int(self.offsets.shape[0]) - 1
+
+    def __getitem__(self, idx: int | slice) -> DocumentChunk | List[DocumentChunk]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        n = len(self)
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError("chunk index out of range")
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return DocumentChunk(**json.loads(self._blob[start:end]))
+
+    def __iter__(self) -> Iterator[DocumentChunk]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __reduce__(self):
+        # A pickled store reopens the same files instead of copying them.
+        return (ChunkStore, (self.path,))
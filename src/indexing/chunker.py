@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import hashlib
 from dataclasses import dataclass
-from typing import Iterable, List, Tuple
+from itertools import chain, groupby
+from typing import Iterable, Iterator, List, Tuple
 
 from src.common.schemas import DocumentChunk
 
@@ -13,27 +14,24 @@ class SectionBlock:
     text: str
 
 
-def extract_section_blocks(text: str) -> List[SectionBlock]:
-    lines = text.splitlines()
+def iter_section_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str, str]]:
+    # (section number, section path, line) for every non-empty body line.
+    # Every heading starts a new section number, so two sections with the
+    # same path are still chunked separately.
     stack: List[str] = []
-    buffer: List[str] = []
-    blocks: List[SectionBlock] = []
-
-    def flush() -> None:
-        if not buffer:
-            return
-        section_path = " > ".join(stack) if stack else "General"
-        block_text = "\n".join(buffer).strip()
-        if block_text:
-            blocks.append(SectionBlock(section_path=section_path, text=block_text))
-        buffer.clear()
+    section = 0
+    # Kept only until the first body line: a document of headings alone
+    # becomes a single "General" section.
+    leading: List[str] | None = []
 
     for line in lines:
         stripped = line.strip()
         if not stripped:
             continue
         if stripped.startswith("#"):
-            flush()
+            section += 1
+            if leading is not None:
+                leading.append(stripped)
             level = len(stripped) - len(stripped.lstrip("#"))
             heading = stripped[level:].strip()
             if not heading:
@@ -42,66 +40,101 @@ def extract_section_blocks(text: str) -> List[SectionBlock]:
                 stack.pop()
             stack.append(heading)
             continue
-        buffer.append(stripped)
-
-    flush()
-    if not blocks and text.strip():
-        blocks.append(SectionBlock(section_path="General", text=text.strip()))
-    return blocks
-
-
-def _window_tokens(tokens: List[str], chunk_size: int, overlap: int) -> Iterable[List[str]]:
-    if chunk_size <= 0:
-        raise ValueError("chunk_size must be > 0")
-    if overlap >= chunk_size:
-        raise ValueError("overlap must be smaller than chunk_size")
+        leading = None
+        yield section, " > ".join(stack) if stack else "General", stripped
 
-    step = chunk_size - overlap
-    for start in range(0, len(tokens), step):
-        part = tokens[start : start + chunk_size]
-        if part:
-            yield part
-        if start + chunk_size >= len(tokens):
-            break
+    for stripped in leading or []:
+        yield section + 1, "General", stripped
 
 
-def build_chunks(
+def extract_section_blocks(text: str) -> List[SectionBlock]:
+    return [
+        SectionBlock(section_path=section_path, text="\n".join(line for _, _, line in group))
+        for (_, section_path), group in groupby(iter_section_lines(text.splitlines()), key=lambda item: item[:2])
+    ]
+
+
+class _TokenWindows:
+    # Overlapping windows over a token stream. Only the current window is
+    # buffered; a window is emitted once tokens past its end arrive, and the
+    # last one by finish().
+    def __init__(self, chunk_size: int, overlap: int) -> None:
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be > 0")
+        if overlap >= chunk_size:
+            raise ValueError("overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.step = chunk_size - overlap
+        self.tokens: List[str] = []
+
+    def add(self, tokens: List[str]) -> Iterator[List[str]]:
+        self.tokens.extend(tokens)
+        while len(self.tokens) > self.chunk_size:
+            yield self.tokens[: self.chunk_size]
+            del self.tokens[: self.step]
+
+    def finish(self) -> Iterator[List[str]]:
+        if self.tokens:
+            yield self.tokens
+            self.tokens = []
+
+
+def iter_chunks(
     doc_id: str,
     title: str,
-    text: str,
+    lines: Iterable[str],
     department: str,
     updated_at: str,
     access_level: str,
     chunk_size_tokens: int,
     overlap_tokens: int,
-) -> List[DocumentChunk]:
-    blocks = extract_section_blocks(text)
-    chunks: List[DocumentChunk] = []
+) -> Iterator[DocumentChunk]:
+    # Streaming build_chunks over the lines of a document: memory is bounded
+    # by one window of tokens, not by the document or section size.
     idx = 0
-
-    for block in blocks:
-        tokens = block.text.split()
-        for token_window in _window_tokens(tokens, chunk_size_tokens, overlap_tokens):
+    for (_, section_path), group in groupby(iter_section_lines(lines), key=lambda item: item[:2]):
+        windows = _TokenWindows(chunk_size_tokens, overlap_tokens)
+        token_windows = chain((window for _, _, line in group for window in windows.add(line.split())), windows.finish())
+        for token_window in token_windows:
             chunk_text = " ".join(token_window).strip()
             if not chunk_text:
                 continue
             digest = hashlib.md5(f"{doc_id}:{idx}:{chunk_text}".encode("utf-8")).hexdigest()[:8]
-            chunk_id = f"{doc_id}-{idx}-{digest}"
-            chunks.append(
-                DocumentChunk(
-                    doc_id=doc_id,
-                    chunk_id=chunk_id,
-                    text=chunk_text,
-                    title=title,
-                    section_path=block.section_path,
-                    department=department,
-                    updated_at=updated_at,
-                    access_level=access_level,
-                )
+            yield DocumentChunk(
+                doc_id=doc_id,
+                chunk_id=f"{doc_id}-{idx}-{digest}",
+                text=chunk_text,
+                title=title,
+                section_path=section_path,
+                department=department,
+                updated_at=updated_at,
+                access_level=access_level,
             )
             idx += 1
 
-    return chunks
+
+def build_chunks(
+    doc_id: str,
+    title: str,
+    text: str,
+    department: str,
+    updated_at: str,
+    access_level: str,
+    chunk_size_tokens: int,
+    overlap_tokens: int,
+) -> List[DocumentChunk]:
+    return list(
+        iter_chunks(
+            doc_id=doc_id,
+            title=title,
+            lines=text.splitlines(),
+            department=department,
+            updated_at=updated_at,
+            access_level=access_level,
+            chunk_size_tokens=chunk_size_tokens,
+            overlap_tokens=overlap_tokens,
+        )
+    )
 
 
 def chunk_from_rows(rows: List[Tuple[str, str, str, str, str, str]], chunk_size_tokens: int, overlap_tokens: int) -> List[DocumentChunk]:
@@ -4,13 +4,18 @@ import json
 import os
 import hashlib
 import re
+import time
 from pathlib import Path
-from typing import List
+from threading import Lock
+from typing import List, Sequence
 
 import numpy as np
 
+from src.common.deadline import Deadline
 from src.common.io import write_jsonl, read_jsonl
+from src.common.metrics import stage_timer
 from src.common.schemas import DocumentChunk, RetrievalHit
+from src.indexing.chunk_store import ChunkStore, write_offsets
 
 
 class EmbeddingBackend:
@@ -24,16 +29,27 @@ class EmbeddingBackend:
     def __init__(self, model_name: str) -> None:
         self.model_name = model_name
         self._st_model = None
-        if model_name.startswith("hash://"):
-            return
-        if os.getenv("DISABLE_EXTERNAL_MODELS", "").strip() == "1":
+        self._load_lock = Lock()
+        self.load_duration_s: float | None = None
+        # hash:// and DISABLE_EXTERNAL_MODELS never import sentence_transformers;
+        # other models are loaded on the first encode() call.
+        self._model_loaded = model_name.startswith("hash://") or os.getenv("DISABLE_EXTERNAL_MODELS", "").strip() == "1"
+
+    def _ensure_model(self) -> None:
+        if self._model_loaded:
             return
-        try:
-            from sentence_transformers import SentenceTransformer
+        with self._load_lock:
+            if self._model_loaded:
+                return
+            started = time.perf_counter()
+            try:
+                from sentence_transformers import SentenceTransformer
 
-            self._st_model = SentenceTransformer(model_name)
-        except Exception:
-            self._st_model = None
+                self._st_model = SentenceTransformer(self.model_name)
+            except Exception:
+                self._st_model = None
+            self.load_duration_s = time.perf_counter() - started
+            self._model_loaded = True
 
     @staticmethod
     def _hash_embed(texts: List[str], dim: int = 384) -> np.ndarray:
@@ -50,6 +66,7 @@ class EmbeddingBackend:
         return arr
 
     def encode(self, texts: List[str]) -> np.ndarray:
+        self._ensure_model()
         if self._st_model is not None:
             vec = self._st_model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
             vec = vec.astype(np.float32)
@@ -66,47 +83,91 @@ class EmbeddingBackend:
 
 
 class DenseIndex:
-    def __init__(self, chunks: List[DocumentChunk], embeddings: np.ndarray, embedding_model_name: str) -> None:
+    def __init__(
+        self,
+        chunks: Sequence[DocumentChunk],
+        embeddings: np.ndarray,
+        embedding_model_name: str,
+        search_backend: str = "auto",
+    ) -> None:
         self.chunks = chunks
         self.embeddings = embeddings
         self.embedding_model_name = embedding_model_name
+        self.search_backend = search_backend
         self._faiss_index = None
-        try:
-            import faiss  # type: ignore
+        self._faiss_lock = Lock()
+        self._faiss_checked = search_backend == "numpy"
+        self.faiss_build_s: float | None = None
 
-            self._faiss_index = faiss.IndexFlatIP(self.embeddings.shape[1])
-            self._faiss_index.add(self.embeddings)
-        except Exception:
-            self._faiss_index = None
+    def _get_faiss_index(self):
+        # faiss is imported and the flat index built on the first search, so
+        # loading the index (and "numpy" search) never pays for the import.
+        if self._faiss_checked:
+            return self._faiss_index
+        with self._faiss_lock:
+            if self._faiss_checked:
+                return self._faiss_index
+            started = time.perf_counter()
+            try:
+                import faiss  # type: ignore
+
+                self._faiss_index = faiss.IndexFlatIP(self.embeddings.shape[1])
+                self._faiss_index.add(self.embeddings)
+            except Exception:
+                self._faiss_index = None
+            self.faiss_build_s = time.perf_counter() - started
+            self._faiss_checked = True
+        return self._faiss_index
 
     @classmethod
-    def build(cls, chunks: List[DocumentChunk], backend: EmbeddingBackend) -> "DenseIndex":
-        embeddings = backend.encode([cls._index_text(c) for c in chunks])
+    def build(cls, chunks: List[DocumentChunk], backend: EmbeddingBackend, previous: "DenseIndex | None" = None) -> "DenseIndex":
+        # With a previous index from the same model, chunks whose id and indexed
+        # text are unchanged reuse its embeddings and only the rest are encoded.
+        texts = [cls._index_text(c) for c in chunks]
+        reusable = {}
+        if previous is not None and previous.embedding_model_name == backend.model_name:
+            reusable = {chunk.chunk_id: (row, cls._index_text(chunk)) for row, chunk in enumerate(previous.chunks)}
+        rows = [reusable.get(chunk.chunk_id, (None, None)) for chunk in chunks]
+        missing = [i for i, (row, text) in enumerate(rows) if row is None or text != texts[i]]
+        if len(missing) == len(chunks):
+            embeddings = backend.encode(texts)
+        else:
+            embeddings = np.empty((len(chunks), previous.embeddings.shape[1]), dtype=np.float32)
+            for i, (row, _) in enumerate(rows):
+                if row is not None:
+                    embeddings[i] = previous.embeddings[row]
+            if missing:
+                embeddings[missing] = backend.encode([texts[i] for i in missing])
         return cls(chunks=chunks, embeddings=embeddings, embedding_model_name=backend.model_name)
 
     @staticmethod
     def _index_text(chunk: DocumentChunk) -> str:
         return f"{chunk.title} {chunk.section_path} {chunk.text}"
 
-    def search(
-        self,
-        query: str,
-        top_k: int,
-        backend: EmbeddingBackend,
-        department_filter: str | None = None,
-        access_level: str | None = None,
-    ) -> List[RetrievalHit]:
-        q = backend.encode([query])
+    def _ranked_candidates(self, q: np.ndarray, limits: List[int]) -> List[tuple[List[int], List[float]]]:
+        faiss_index = self._get_faiss_index()
+        if faiss_index is not None:
+            distances, indices = faiss_index.search(q, max(limits))
+            return [(indices[i].tolist()[:limit], distances[i].tolist()[:limit]) for i, limit in enumerate(limits)]
 
-        if self._faiss_index is not None:
-            distances, indices = self._faiss_index.search(q, top_k * 4)
-            idxs = indices[0].tolist()
-            vals = distances[0].tolist()
+        if len(limits) == 1:
+            sims = (self.embeddings @ q[0]).astype(np.float32)[None, :]
         else:
-            sims = (self.embeddings @ q[0]).astype(np.float32)
-            idxs = np.argsort(sims)[::-1].tolist()[: top_k * 4]
-            vals = [float(sims[i]) for i in idxs]
+            sims = (q @ self.embeddings.T).astype(np.float32)
+        rows = []
+        for row, limit in zip(sims, limits):
+            idxs = np.argsort(-row, kind="stable").tolist()[:limit]
+            rows.append((idxs, [float(row[i]) for i in idxs]))
+        return rows
 
+    def _collect_hits(
+        self,
+        idxs: List[int],
+        vals: List[float],
+        top_k: int,
+        department_filter: str | None,
+        access_level: str | None,
+    ) -> List[RetrievalHit]:
         hits: List[RetrievalHit] = []
         for idx, score in zip(idxs, vals):
             if idx < 0:
@@ -128,17 +189,73 @@ class DenseIndex:
                 break
         return hits
 
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        backend: EmbeddingBackend,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[RetrievalHit]:
+        if deadline is not None and deadline.exceeded("dense_encode"):
+            return []
+        with stage_timer("query_encode"):
+            q = backend.encode([query])
+        if deadline is not None and deadline.exceeded("dense_search"):
+            return []
+        with stage_timer("dense_search"):
+            idxs, vals = self._ranked_candidates(q, [top_k * 4])[0]
+        return self._collect_hits(idxs, vals, top_k, department_filter, access_level)
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        backend: EmbeddingBackend,
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        # One encode call and one matrix-matrix product (or one faiss search) for
+        # the whole batch; filtering stays per query.
+        if not queries:
+            return []
+        if deadline is not None and deadline.exceeded("dense_encode"):
+            return [[] for _ in queries]
+        with stage_timer("query_encode"):
+            q = backend.encode(queries)
+        if deadline is not None and deadline.exceeded("dense_search"):
+            return [[] for _ in queries]
+        with stage_timer("dense_search"):
+            ranked = self._ranked_candidates(q, [top_k * 4 for top_k in top_ks])
+        return [
+            self._collect_hits(idxs, vals, top_k, department_filter, access_level)
+            for (idxs, vals), top_k, department_filter, access_level in zip(ranked, top_ks, department_filters, access_levels)
+        ]
+
     def save(self, index_dir: Path) -> None:
         index_dir.mkdir(parents=True, exist_ok=True)
         np.save(index_dir / "embeddings.npy", self.embeddings)
         write_jsonl(index_dir / "chunks.jsonl", [c.to_dict() for c in self.chunks])
+        write_offsets(index_dir / "chunks.jsonl")
         metadata = {"embedding_model_name": self.embedding_model_name}
         (index_dir / "meta.json").write_text(json.dumps(metadata), encoding="utf-8")
 
     @staticmethod
-    def load(index_dir: Path) -> "DenseIndex":
-        embeddings = np.load(index_dir / "embeddings.npy")
-        rows = read_jsonl(index_dir / "chunks.jsonl")
-        chunks = [DocumentChunk(**row) for row in rows]
+    def load(index_dir: Path, search_backend: str = "auto", mmap: bool = False) -> "DenseIndex":
+        # mmap maps embeddings.npy and the chunks file read-only, so worker
+        # processes share their pages; chunks are then parsed on access.
+        embeddings = np.load(index_dir / "embeddings.npy", mmap_mode="r" if mmap else None)
+        chunks: Sequence[DocumentChunk]
+        if mmap and ChunkStore.available(index_dir / "chunks.jsonl"):
+            chunks = ChunkStore(index_dir / "chunks.jsonl")
+        else:
+            chunks = [DocumentChunk(**row) for row in read_jsonl(index_dir / "chunks.jsonl")]
         meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
-        return DenseIndex(chunks=chunks, embeddings=embeddings, embedding_model_name=meta["embedding_model_name"])
+        return DenseIndex(
+            chunks=chunks,
+            embeddings=embeddings,
+            embedding_model_name=meta["embedding_model_name"],
+            search_backend=search_backend,
+        )
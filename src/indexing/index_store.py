@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Set
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LEASES_DIR = "leases"
+BM25_DIR = "bm25"
+DENSE_DIR = "dense"
+
+
+@dataclass(frozen=True)
+class IndexLocation:
+    # bm25_path is a pickled BM25Index (flat layout) or a BM25Postings array
+    # directory (versioned store). Only immutable locations may be mmapped:
+    # the flat layout is rewritten in place by the next build.
+    version: str
+    bm25_path: Path
+    dense_dir: Path
+    immutable: bool = False
+
+
+class IndexStore:
+    # Immutable, versioned index directories: root/versions/<version>/ holds one
+    # complete build and root/CURRENT names the live one. A build is written to
+    # a hidden staging directory and renamed into place, and CURRENT is replaced
+    # atomically, so a reader sees either the old version or the new one and
+    # never a half-written index.
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.versions_dir = self.root / VERSIONS_DIR
+
+    def current_version(self) -> str | None:
+        path = self.root / CURRENT_FILE
+        if not path.exists():
+            return None
+        version = path.read_text(encoding="utf-8").strip()
+        return version if version and (self.versions_dir / version).is_dir() else None
+
+    def location(self, version: str) -> IndexLocation:
+        version_dir = self.versions_dir / version
+        return IndexLocation(
+            version=version,
+            bm25_path=version_dir / BM25_DIR,
+            dense_dir=version_dir / DENSE_DIR,
+            immutable=True,
+        )
+
+    def versions(self) -> List[str]:
+        if not self.versions_dir.exists():
+            return []
+        return sorted(p.name for p in self.versions_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+    def staging_dir(self) -> Path:
+        path = self.versions_dir / f".staging-{uuid.uuid4().hex[:8]}"
+        path.mkdir(parents=True)
+        return path
+
+    def commit(self, staging: Path) -> str:
+        # Version names sort by build time.
+        version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+        os.replace(staging, self.versions_dir / version)
+        return version
+
+    def publish(self, version: str) -> None:
+        if not (self.versions_dir / version).is_dir():
+            raise FileNotFoundError(f"Unknown index version: {version}")
+        tmp = self.root / f".{CURRENT_FILE}.{uuid.uuid4().hex[:8]}"
+        tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(tmp, self.root / CURRENT_FILE)
+
+    def lease(self, version: str) -> Path:
+        # Marks version as in use by this process until release(). A loaded
+        # version is read through memory maps and reopened by path (shard
+        # processes, ChunkStore pickles), so prune must not delete it.
+        path = self.root / LEASES_DIR / f"{version}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        return path
+
+    @staticmethod
+    def release(lease: Path) -> None:
+        Path(lease).unlink(missing_ok=True)
+
+    def leased_versions(self) -> Set[str]:
+        # Leases left behind by processes that have exited are removed.
+        leases_dir = self.root / LEASES_DIR
+        if not leases_dir.exists():
+            return set()
+        versions = set()
+        for path in leases_dir.iterdir():
+            try:
+                version, pid, _ = path.name.rsplit(".", 2)
+                alive = _pid_alive(int(pid))
+            except ValueError:
+                continue
+            if alive:
+                versions.add(version)
+            else:
+                path.unlink(missing_ok=True)
+        return versions
+
+    def prune(self, keep: int) -> List[str]:
+        # Keeps the newest `keep` versions, the current one and any version a
+        # serving process still has loaded.
+        keep_versions = self.leased_versions() | {self.current_version()}
+        removed = []
+        for version in self.versions()[: -max(1, keep)]:
+            if version not in keep_versions:
+                shutil.rmtree(self.versions_dir / version, ignore_errors=True)
+                removed.append(version)
+        return removed
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -2,17 +2,23 @@ from __future__ import annotations
 
 import re
 import unicodedata
+from typing import Iterable, Iterator
 
 
 _WHITESPACE_RE = re.compile(r"\s+")
 
 
+def iter_normalized_lines(blocks: Iterable[str]) -> Iterator[str]:
+    # Blocks end at line breaks, so normalizing them one at a time gives the
+    # same lines as normalizing the joined text.
+    for block in blocks:
+        normalized = unicodedata.normalize("NFC", block)
+        normalized = normalized.replace("\x00", " ")
+        for line in normalized.splitlines():
+            compact = _WHITESPACE_RE.sub(" ", line).strip()
+            if compact:
+                yield compact
+
+
 def normalize_text(text: str) -> str:
-    normalized = unicodedata.normalize("NFC", text)
-    normalized = normalized.replace("\x00", " ")
-    cleaned_lines = []
-    for line in normalized.splitlines():
-        compact = _WHITESPACE_RE.sub(" ", line).strip()
-        if compact:
-            cleaned_lines.append(compact)
-    return "\n".join(cleaned_lines).strip()
+    return "\n".join(iter_normalized_lines([text]))
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+MANIFEST_FORMAT = 1
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    sha1: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ChangeSet:
+    # Source paths (relative to raw_data_dir) by outcome of one ingestion run,
+    # plus the chunk ids that left and entered the corpus.
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    added_chunk_ids: List[str] = field(default_factory=list)
+    removed_chunk_ids: List[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.modified or self.deleted)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "modified": len(self.modified),
+            "deleted": len(self.deleted),
+            "unchanged": len(self.unchanged),
+            "added_chunks": len(self.added_chunk_ids),
+            "removed_chunks": len(self.removed_chunk_ids),
+        }
+
+
+def file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_entry(path: Path) -> ManifestEntry:
+    # Taken before a file is parsed: if it is edited while being ingested, the
+    # recorded stat and hash are the old ones and the next run re-parses it.
+    stat = path.stat()
+    return ManifestEntry(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha1=file_sha1(path))
+
+
+class IngestionManifest:
+    # What the last run produced from each source file. A file whose size and
+    # mtime are unchanged is trusted without reading it; otherwise its content
+    # hash decides. The manifest also records the chunking parameters and the
+    # chunks file it describes: if either no longer matches, every file is
+    # treated as added and the run rebuilds from scratch.
+    def __init__(self, path: Path, params: Dict[str, int]) -> None:
+        self.path = Path(path)
+        self.params = dict(params)
+        self.entries: Dict[str, ManifestEntry] = {}
+
+    @classmethod
+    def load(cls, path: Path, params: Dict[str, int], chunk_output_path: Path) -> "IngestionManifest":
+        manifest = cls(path, params)
+        try:
+            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return manifest
+        if payload.get("format") != MANIFEST_FORMAT or payload.get("params") != manifest.params:
+            return manifest
+        if payload.get("chunks_stat") != _stat(chunk_output_path):
+            return manifest
+        manifest.entries = {key: ManifestEntry(**entry) for key, entry in payload.get("files", {}).items()}
+        return manifest
+
+    def diff(self, root: Path, files: List[Path]) -> ChangeSet:
+        changes = ChangeSet()
+        seen = set()
+        for path in files:
+            key = path.relative_to(root).as_posix()
+            seen.add(key)
+            entry = self.entries.get(key)
+            if entry is None:
+                changes.added.append(key)
+                continue
+            stat = path.stat()
+            if stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns:
+                changes.unchanged.append(key)
+            elif file_sha1(path) == entry.sha1:
+                # Touched but identical: keep the chunks, remember the new stat.
+                entry.size, entry.mtime_ns = stat.st_size, stat.st_mtime_ns
+                changes.unchanged.append(key)
+            else:
+                changes.modified.append(key)
+        changes.deleted = sorted(key for key in self.entries if key not in seen)
+        for key in changes.modified + changes.deleted:
+            changes.removed_chunk_ids.extend(self.entries[key].chunk_ids)
+        return changes
+
+    def record(self, key: str, entry: ManifestEntry, chunk_ids: List[str]) -> None:
+        self.entries[key] = dataclasses.replace(entry, chunk_ids=chunk_ids)
+
+    def forget(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def chunk_owners(self) -> Dict[str, str]:
+        return {chunk_id: key for key, entry in self.entries.items() for chunk_id in entry.chunk_ids}
+
+    @property
+    def chunk_count(self) -> int:
+        return sum(len(entry.chunk_ids) for entry in self.entries.values())
+
+    def save(self, chunk_output_path: Path) -> None:
+        payload = {
+            "format": MANIFEST_FORMAT,
+            "params": self.params,
+            "chunks_stat": _stat(chunk_output_path),
+            "files": {key: asdict(entry) for key, entry in sorted(self.entries.items())},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex[:8]}")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _stat(path: Path) -> List[int] | None:
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
 
 
 @dataclass
@@ -11,15 +12,31 @@ class ParsedDocument:
     text: str
 
 
-def _parse_pdf(path: Path) -> str:
+@dataclass
+class DocumentStream:
+    # blocks are consecutive pieces of the document text (PDF pages, lines of
+    # text files) that each end at a line break, so consumers can normalize
+    # and chunk them one at a time.
+    doc_id: str
+    title: str
+    blocks: Iterator[str]
+
+
+def _pdf_reader(path: Path):
     try:
         from pypdf import PdfReader
     except Exception as exc:
         raise RuntimeError("pypdf is required to parse PDF files") from exc
+    return PdfReader(str(path))
+
 
-    reader = PdfReader(str(path))
-    pages = [page.extract_text() or "" for page in reader.pages]
-    return "\n".join(pages)
+def _iter_pdf_pages(path: Path) -> Iterator[str]:
+    for page in _pdf_reader(path).pages:
+        yield page.extract_text() or ""
+
+
+def _parse_pdf(path: Path) -> str:
+    return "\n".join(_iter_pdf_pages(path))
 
 
 def _parse_docx(path: Path) -> str:
@@ -30,10 +47,24 @@ def _parse_docx(path: Path) -> str:
     return docx2txt.process(str(path)) or ""
 
 
+def _iter_docx(path: Path) -> Iterator[str]:
+    # docx2txt only returns the whole text.
+    yield _parse_docx(path)
+
+
 def _parse_text_like(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="ignore")
 
 
+def _iter_text_lines(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from f
+
+
+def _title(path: Path) -> str:
+    return path.stem.replace("_", " ").strip() or path.name
+
+
 def parse_document(path: Path) -> ParsedDocument:
     suffix = path.suffix.lower()
     if suffix == ".pdf":
@@ -45,5 +76,20 @@ def parse_document(path: Path) -> ParsedDocument:
     else:
         raise ValueError(f"Unsupported document type: {path.suffix}")
 
-    title = path.stem.replace("_", " ").strip() or path.name
-    return ParsedDocument(doc_id=path.stem, title=title, text=text)
+    return ParsedDocument(doc_id=path.stem, title=_title(path), text=text)
+
+
+def stream_document(path: Path) -> DocumentStream:
+    # Like parse_document, but the text is produced lazily, one page or line
+    # at a time, instead of as one string for the whole file.
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        blocks = _iter_pdf_pages(path)
+    elif suffix == ".docx":
+        blocks = _iter_docx(path)
+    elif suffix in {".md", ".markdown", ".txt", ".html", ".htm"}:
+        blocks = _iter_text_lines(path)
+    else:
+        raise ValueError(f"Unsupported document type: {path.suffix}")
+
+    return DocumentStream(doc_id=path.stem, title=_title(path), blocks=blocks)
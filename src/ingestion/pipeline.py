@@ -1,20 +1,59 @@
 from __future__ import annotations
 
+import json
+import logging
+import multiprocessing
+import os
 import re
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Deque, Dict, Iterable, Iterator, List, Set, Tuple
 
 from src.common.io import write_jsonl
-from src.common.schemas import DocumentChunk
 from src.config.settings import AppSettings
-from src.ingestion.cleaning import normalize_text
-from src.ingestion.parsers import parse_document
-from src.indexing.chunker import build_chunks
+from src.ingestion.cleaning import iter_normalized_lines
+from src.ingestion.manifest import ChangeSet, IngestionManifest, ManifestEntry, file_entry
+from src.ingestion.parsers import stream_document
+from src.indexing.chunker import iter_chunks
 
 
 SUPPORTED_SUFFIXES = {".pdf", ".docx", ".md", ".markdown", ".txt", ".html", ".htm"}
 _DATE_RE = re.compile(r"(20\\d{2}-\\d{2}-\\d{2})")
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileReport:
+    path: str
+    doc_id: str
+    chunks: int = 0
+    parse_s: float = 0.0
+    chunk_s: float = 0.0
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class IngestionReport:
+    chunk_output_path: Path
+    files: List[FileReport] = field(default_factory=list)
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    # None for a run without a manifest (ingestion.manifest_path unset).
+    changes: ChangeSet | None = None
+
+    @property
+    def failed(self) -> List[FileReport]:
+        return [item for item in self.files if item.error is not None]
+
 
 def _infer_department(file_name: str) -> str:
     low = file_name.lower()
@@ -43,30 +82,205 @@ def _infer_updated_at(file_name: str) -> str:
     return "1970-01-01"
 
 
-def ingest_and_chunk(settings: AppSettings) -> List[DocumentChunk]:
-    chunks: List[DocumentChunk] = []
-    files = sorted([p for p in settings.raw_data_dir.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES])
-
-    for path in files:
-        parsed = parse_document(path)
-        normalized = normalize_text(parsed.text)
-        if not normalized:
-            continue
-
-        department = _infer_department(path.name)
-        access_level = _infer_access_level(path.name)
-        updated_at = _infer_updated_at(path.name)
-        file_chunks = build_chunks(
-            doc_id=parsed.doc_id,
-            title=parsed.title,
-            text=normalized,
-            department=department,
-            updated_at=updated_at,
-            access_level=access_level,
-            chunk_size_tokens=settings.chunk_size_tokens,
-            overlap_tokens=settings.overlap_tokens,
-        )
-        chunks.extend(file_chunks)
-
-    write_jsonl(settings.chunk_output_path, [chunk.to_dict() for chunk in chunks])
-    return chunks
+def _timed_blocks(blocks: Iterable[str], report: FileReport) -> Iterator[str]:
+    # Adds the time spent inside the parser to report.parse_s; the rest of
+    # the per-file time is normalization and chunking.
+    blocks = iter(blocks)
+    while True:
+        started = time.perf_counter()
+        block = next(blocks, None)
+        report.parse_s += time.perf_counter() - started
+        if block is None:
+            return
+        yield block
+
+
+def _ingest_file(
+    path: Path,
+    part_path: Path,
+    chunk_size_tokens: int,
+    overlap_tokens: int,
+    with_entry: bool,
+) -> Tuple[FileReport, List[str], ManifestEntry | None]:
+    # Runs in a worker process. The document is parsed, normalized and chunked
+    # as a stream of pages/lines, and each chunk row is appended to part_path
+    # as soon as it is produced, so the worker holds one page and one chunk
+    # window at a time. Returns the chunk ids and, with with_entry, the
+    # manifest entry of the file as it was before parsing; errors are part of
+    # the report (and the partial part file is removed) so one unreadable file
+    # never aborts the run.
+    report = FileReport(path=str(path), doc_id=path.stem)
+    chunk_ids: List[str] = []
+    try:
+        entry = file_entry(path) if with_entry else None
+        started = time.perf_counter()
+        with part_path.open("w", encoding="utf-8") as f:
+            document = stream_document(path)
+            report.parse_s = time.perf_counter() - started
+            for chunk in iter_chunks(
+                doc_id=document.doc_id,
+                title=document.title,
+                lines=iter_normalized_lines(_timed_blocks(document.blocks, report)),
+                department=_infer_department(path.name),
+                updated_at=_infer_updated_at(path.name),
+                access_level=_infer_access_level(path.name),
+                chunk_size_tokens=chunk_size_tokens,
+                overlap_tokens=overlap_tokens,
+            ):
+                f.write(json.dumps(chunk.to_dict(), ensure_ascii=False) + "\n")
+                chunk_ids.append(chunk.chunk_id)
+    except Exception as exc:
+        part_path.unlink(missing_ok=True)
+        report.error = f"{type(exc).__name__}: {exc}"
+        return report, [], None
+    report.chunk_s = max(0.0, time.perf_counter() - started - report.parse_s)
+    report.chunks = len(chunk_ids)
+    return report, chunk_ids, entry
+
+
+def _ingest_files(
+    settings: AppSettings,
+    files: List[Path],
+    parts_dir: Path,
+    with_entries: bool,
+) -> Iterator[Tuple[FileReport, List[str], ManifestEntry | None, Path]]:
+    # Yields (report, chunk ids, manifest entry, part file) in input order. At most
+    # max_pending files are in flight, and their chunks wait on disk rather
+    # than in memory until the caller copies them into the output.
+    workers = settings.ingestion_workers if settings.ingestion_workers > 0 else os.cpu_count() or 1
+    workers = min(workers, len(files))
+    args = (settings.chunk_size_tokens, settings.overlap_tokens, with_entries)
+    parts = [parts_dir / f"{i}.jsonl" for i in range(len(files))]
+    if workers <= 1:
+        for path, part in zip(files, parts):
+            yield (*_ingest_file(path, part, *args), part)
+        return
+
+    max_pending = settings.ingestion_max_pending if settings.ingestion_max_pending > 0 else 2 * workers
+    # spawn, not fork: the calling process may be running background threads.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending: Deque[Tuple[Future, Path]] = deque()
+        for path, part in zip(files, parts):
+            pending.append((pool.submit(_ingest_file, path, part, *args), part))
+            if len(pending) >= max_pending:
+                future, part = pending.popleft()
+                yield (*future.result(), part)
+        while pending:
+            future, part = pending.popleft()
+            yield (*future.result(), part)
+
+
+def source_files(settings: AppSettings) -> List[Path]:
+    return sorted([p for p in settings.raw_data_dir.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES])
+
+
+def _kept_chunk_groups(chunk_path: Path, owners: Dict[str, str], keep: Set[str]) -> Iterator[Tuple[str, List[str]]]:
+    # Lines of the previous chunks file grouped by source file, for the files
+    # in keep. Groups come out in file order, which is the order they are
+    # needed in, so only one file's chunks are held at a time.
+    key, lines = None, []
+    with chunk_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            owner = owners.get(json.loads(line)["chunk_id"])
+            if owner not in keep:
+                continue
+            if owner != key and lines:
+                yield key, lines
+                lines = []
+            key = owner
+            lines.append(line)
+    if lines:
+        yield key, lines
+
+
+def ingest_and_chunk(settings: AppSettings, full: bool = False) -> IngestionReport:
+    # Chunks stream to a temporary file as each document finishes, in sorted
+    # file order, and replace chunk_output_path only once the run completes.
+    # With ingestion.manifest_path set, only added and modified files are
+    # parsed; chunks of unchanged files are copied from the previous chunks
+    # file and those of deleted files dropped. full=True ignores the manifest.
+    started = time.perf_counter()
+    root = settings.raw_data_dir
+    files = source_files(settings)
+    report = IngestionReport(chunk_output_path=settings.chunk_output_path)
+    output_path = settings.chunk_output_path
+
+    manifest = None
+    reparse = {path.relative_to(root).as_posix() for path in files}
+    if settings.ingestion_manifest_path is not None:
+        params = {"chunk_size_tokens": settings.chunk_size_tokens, "overlap_tokens": settings.overlap_tokens}
+        if full:
+            manifest = IngestionManifest(settings.ingestion_manifest_path, params)
+        else:
+            manifest = IngestionManifest.load(settings.ingestion_manifest_path, params, output_path)
+        report.changes = manifest.diff(root, files)
+        reparse = set(report.changes.added + report.changes.modified)
+        if report.changes.is_empty and manifest.entries and output_path.exists():
+            manifest.save(output_path)
+            report.chunks = manifest.chunk_count
+            report.elapsed_s = time.perf_counter() - started
+            return report
+
+    kept = None
+    if manifest is not None and report.changes.unchanged:
+        kept = _kept_chunk_groups(output_path, manifest.chunk_owners(), set(report.changes.unchanged))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    parts_dir = Path(tempfile.mkdtemp(prefix=f".{output_path.name}.parts.", dir=output_path.parent))
+    results = _ingest_files(
+        settings,
+        [path for path in files if path.relative_to(root).as_posix() in reparse],
+        parts_dir,
+        with_entries=manifest is not None,
+    )
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for path in files:
+                key = path.relative_to(root).as_posix()
+                if key not in reparse:
+                    if not manifest.entries[key].chunk_ids:
+                        continue
+                    group_key, lines = next(kept, (None, []))
+                    if group_key != key:
+                        raise RuntimeError(f"{output_path} does not match the ingestion manifest; rerun with a full ingest")
+                    f.writelines(lines)
+                    report.chunks += len(lines)
+                    continue
+
+                file_report, chunk_ids, entry, part = next(results)
+                if file_report.error is None:
+                    with part.open("r", encoding="utf-8") as chunks:
+                        shutil.copyfileobj(chunks, f)
+                    part.unlink()
+                report.files.append(file_report)
+                report.chunks += file_report.chunks
+                if file_report.error is not None:
+                    logger.warning("Skipped %s: %s", file_report.path, file_report.error)
+                if manifest is None:
+                    continue
+                report.changes.added_chunk_ids.extend(chunk_ids)
+                if file_report.error is None:
+                    manifest.record(key, entry, chunk_ids)
+                else:
+                    # Not recorded, so the next run retries the file.
+                    manifest.forget(key)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        results.close()
+        if kept is not None:
+            kept.close()
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    if manifest is not None:
+        for key in report.changes.deleted:
+            manifest.forget(key)
+        manifest.save(output_path)
+    report.elapsed_s = time.perf_counter() - started
+    if settings.ingestion_report_path is not None:
+        write_jsonl(settings.ingestion_report_path, [item.to_dict() for item in report.files])
+    return report
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from threading import Event, Thread
+from typing import Any, Callable, Dict, Tuple
+
+from src.config.settings import AppSettings
+from src.indexing.build_indices import build_all_indices
+from src.indexing.index_store import IndexLocation
+from src.ingestion.pipeline import ingest_and_chunk, source_files
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def read_ingestion_status(path: Path | None) -> Dict[str, Any] | None:
+    if path is None:
+        return None
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def freshness_lag_s(status: Dict[str, Any] | None, live_version: str, now: float | None = None) -> float | None:
+    # Seconds since the oldest source change that is not searchable yet in the
+    # process asking: pending in the watcher, or published as a version this
+    # process has not reloaded. None without a watcher status.
+    if status is None:
+        return None
+    now = time.time() if now is None else now
+    if status.get("pending_since") is not None:
+        return max(0.0, now - status["pending_since"])
+    if status.get("last_version") not in (None, live_version) and status.get("last_detected_at") is not None:
+        return max(0.0, now - status["last_detected_at"])
+    return 0.0
+
+
+class IngestionWatcher:
+    # Polls raw_data_dir (size and mtime of every supported file) and, once a
+    # burst of changes has been quiet for debounce_s, runs the incremental
+    # ingest and publishes a new index version. Indices are immutable
+    # versions, so changes reach the live service through a hot reload:
+    # on_publish in-process, index.watch_interval_s in other workers. State is
+    # written to status_path so every API worker can report freshness.
+    def __init__(
+        self,
+        settings: AppSettings,
+        on_publish: Callable[[IndexLocation], Any] | None = None,
+    ) -> None:
+        self.settings = settings
+        self.on_publish = on_publish
+        self.poll_interval_s = max(0.01, settings.ingestion_watch_interval_s)
+        self.debounce_s = max(0.0, settings.ingestion_debounce_s)
+        self.status_path = settings.ingestion_status_path
+        self.pending_since: float | None = None
+        self.last_detected_at: float | None = None
+        self.last_applied_at: float | None = None
+        self.last_lag_s: float | None = None
+        self.last_version: str | None = None
+        self.last_error: str | None = None
+        self.runs = 0
+        self._applied: Snapshot | None = None
+        self._seen: Snapshot | None = None
+        self._seen_at = 0.0
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def scan(self) -> Snapshot:
+        snapshot: Snapshot = {}
+        for path in source_files(self.settings):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path.relative_to(self.settings.raw_data_dir).as_posix()] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self) -> bool:
+        # One watch step; returns True when it ran an ingest.
+        snapshot = self.scan()
+        now = time.time()
+        if snapshot == self._applied:
+            if self.pending_since is not None:
+                self.pending_since = None
+                self._write_status()
+            self._seen = snapshot
+            return False
+        if self.pending_since is None:
+            self.pending_since = now
+            self._write_status()
+        if snapshot != self._seen:
+            self._seen, self._seen_at = snapshot, now
+            return False
+        if now - self._seen_at < self.debounce_s:
+            return False
+        self.run_once(snapshot)
+        return True
+
+    def run_once(self, snapshot: Snapshot | None = None) -> IndexLocation | None:
+        snapshot = self.scan() if snapshot is None else snapshot
+        detected_at = self.pending_since if self.pending_since is not None else time.time()
+        self.runs += 1
+        try:
+            report = ingest_and_chunk(self.settings)
+            location = build_all_indices(self.settings, changes=report.changes)
+            if self.on_publish is not None:
+                self.on_publish(location)
+        except Exception as exc:
+            # The snapshot stays unapplied, so the next poll retries.
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Ingestion run failed")
+            self._write_status()
+            return None
+        if report.changes is not None and not report.changes.is_empty:
+            logger.info("Ingested changes %s as index version %s", report.changes.summary(), location.version)
+        self._applied = self._seen = snapshot
+        self.pending_since = None
+        self.last_detected_at = detected_at
+        self.last_applied_at = time.time()
+        self.last_lag_s = self.last_applied_at - detected_at
+        self.last_version = location.version
+        self.last_error = None
+        self._write_status()
+        return location
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_since": self.pending_since,
+            "last_detected_at": self.last_detected_at,
+            "last_applied_at": self.last_applied_at,
+            "last_lag_s": self.last_lag_s,
+            "last_version": self.last_version,
+            "last_error": self.last_error,
+            "runs": self.runs,
+        }
+
+    def _write_status(self) -> None:
+        if self.status_path is None:
+            return
+        self.status_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.status_path.with_name(f".{self.status_path.name}.{uuid.uuid4().hex[:8]}")
+        tmp.write_text(json.dumps(self.stats()), encoding="utf-8")
+        os.replace(tmp, self.status_path)
+
+    def run(self) -> None:
+        # Blocks until stop(). Catches up on changes made while nothing was watching.
+        self.run_once()
+        while not self._stop.wait(self.poll_interval_s):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Ingestion watch step failed")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = Thread(target=self.run, name="ingestion-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
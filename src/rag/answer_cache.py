@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+from src.common.metrics import CACHE_LOOKUPS_TOTAL
+from src.common.schemas import AnswerPackage, RetrievalHit
+from src.config.settings import AppSettings
+
+
+def normalize_question(question: str) -> str:
+    # Case is kept on purpose: the guardrails read quoted phrases and upper-case
+    # acronyms, so "SLA" and "sla" can produce different answers.
+    return " ".join(unicodedata.normalize("NFC", question).split())
+
+
+# Settings that can change a cached answer for the same question and evidence:
+# retrieval scoring (hit scores feed the guardrails), guardrail thresholds and
+# the model. Serving knobs such as admission, tracing or logging are left out so
+# tuning them does not invalidate the cache.
+_ANSWER_SETTINGS = (
+    "version",
+    "fusion_method",
+    "lexical_weight",
+    "dense_weight",
+    "min_score_threshold",
+    "min_relative_score",
+    "min_query_token_overlap",
+    "retrieval_candidate_size",
+    "recency_weight",
+    "metadata_boost_weight",
+    "dense_search_backend",
+    "embedding_model_name",
+    "llm_backend",
+    "llm_model_name",
+    "llm_server_backend",
+    "max_new_tokens",
+    "min_citation_coverage",
+    "min_citation_relevance",
+    "min_top_relevance",
+    "min_yesno_relevance",
+    "min_open_query_token_coverage",
+    "max_citations",
+)
+
+
+def settings_fingerprint(settings: AppSettings) -> str:
+    payload = {key: str(getattr(settings, key)) for key in _ANSWER_SETTINGS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def package_to_row(package: AnswerPackage) -> dict:
+    row = {
+        "answer_text": package.answer_text,
+        "citations": package.citations,
+        "confidence": package.confidence,
+        "status": package.status,
+        "clarifying_question": package.clarifying_question,
+        "debug": package.debug,
+        "signals": package.signals,
+    }
+    return json.loads(json.dumps(row))
+
+
+def package_from_row(row: dict) -> AnswerPackage:
+    return AnswerPackage(**json.loads(json.dumps(row)))
+
+
+class AnswerCache:
+    # Two-tier cache of guardrailed answers: a bounded in-memory LRU in front of
+    # an optional SQLite file. Keys embed the index version, so a rebuilt index
+    # never serves stale answers; rows from older versions are purged on open.
+    def __init__(self, max_entries: int, index_version: str, db_path: Optional[Path] = None, max_disk_entries: int = 10000) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.index_version = index_version
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, index_version TEXT, payload TEXT, last_access REAL)"
+            )
+            self._db.execute("DELETE FROM answers WHERE index_version != ?", (index_version,))
+            self._db.commit()
+
+    def set_index_version(self, index_version: str) -> None:
+        # Called after an index hot reload: entries for other versions can no
+        # longer be hit, so drop them instead of waiting for eviction.
+        with self._lock:
+            if index_version == self.index_version:
+                return
+            self.index_version = index_version
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers WHERE index_version != ?", (index_version,))
+                self._db.commit()
+
+    def make_key(self, question: str, evidence_hits: List[RetrievalHit], context: str, debug: bool) -> str:
+        parts = [
+            normalize_question(question),
+            ",".join(hit.chunk_ref.chunk_id for hit in evidence_hits),
+            context,
+            self.index_version,
+            "debug" if debug else "",
+        ]
+        return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[AnswerPackage]:
+        with self._lock:
+            row = self._memory.get(key)
+            if row is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                found = self._db.execute("SELECT payload FROM answers WHERE key = ?", (key,)).fetchone()
+                if found is not None:
+                    row = json.loads(found[0])
+                    self._db.execute("UPDATE answers SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row)
+            if row is None:
+                self.misses += 1
+                CACHE_LOOKUPS_TOTAL.inc(cache="answer", result="miss")
+                return None
+            self.hits += 1
+        CACHE_LOOKUPS_TOTAL.inc(cache="answer", result="hit")
+        return package_from_row(row)
+
+    def put(self, key: str, package: AnswerPackage) -> None:
+        row = package_to_row(package)
+        with self._lock:
+            self._remember(key, row)
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (key, index_version, payload, last_access) VALUES (?, ?, ?, ?)",
+                (key, self.index_version, json.dumps(row, ensure_ascii=False), time.time()),
+            )
+            self._db.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, row: dict) -> None:
+        self._memory[key] = row
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import re
-from typing import List
+import time
+from typing import Any, Dict, Iterator, List
 
+from src.common.deadline import Deadline
+from src.common.metrics import ANSWERS_TOTAL, observe_stage, stage_timer
 from src.common.schemas import AnswerPackage, RetrievalHit
+from src.common.tracing import start_span
 from src.config.settings import AppSettings
 from src.guardrails.policy import (
     build_clarifying_question,
@@ -17,22 +21,191 @@ from src.guardrails.policy import (
     query_chunk_overlap_score,
     should_return_not_found,
 )
-from src.rag.local_llm import LocalLLM
-from src.rag.prompt import build_prompt
+from src.indexing.build_indices import index_version
+from src.rag.answer_cache import AnswerCache, settings_fingerprint
+from src.rag.local_llm import GeneratedAnswer, LocalLLM
+from src.rag.prompt import PROMPT_PREAMBLE, PROMPT_TEMPLATE_VERSION, build_prompt
+
+
+def build_llm(settings: AppSettings, backend: str | None = None) -> LocalLLM:
+    return LocalLLM(
+        backend=backend or settings.llm_backend,
+        model_name=settings.llm_model_name,
+        max_new_tokens=settings.max_new_tokens,
+        max_batch_size=settings.llm_max_batch_size,
+        batch_max_wait_ms=settings.llm_batch_max_wait_ms,
+        prompt_prefix=PROMPT_PREAMBLE if settings.llm_prefix_cache else None,
+        http_url=settings.llm_http_url,
+        http_timeout_s=settings.llm_http_timeout_s,
+        http_retries=settings.llm_http_retries,
+        http_pool_size=settings.llm_http_pool_size,
+    )
 
 
 class RAGAnswerer:
-    def __init__(self, settings: AppSettings) -> None:
+    def __init__(self, settings: AppSettings, llm: LocalLLM | None = None) -> None:
         self.settings = settings
-        self.llm = LocalLLM(
-            backend=settings.llm_backend,
-            model_name=settings.llm_model_name,
-            max_new_tokens=settings.max_new_tokens,
-        )
+        self.llm = llm if llm is not None else build_llm(settings)
+        self.cache: AnswerCache | None = None
+        if settings.answer_cache_size > 0:
+            self.cache = AnswerCache(
+                max_entries=settings.answer_cache_size,
+                index_version=index_version(settings),
+                db_path=settings.answer_cache_path,
+                max_disk_entries=settings.answer_cache_max_disk_entries,
+            )
+        self._cache_context = f"{settings_fingerprint(settings)}|{PROMPT_TEMPLATE_VERSION}"
+
+    def _cache_key(self, question: str, evidence_hits: List[RetrievalHit], debug: bool, llm: LocalLLM) -> str | None:
+        if self.cache is None:
+            return None
+        context = f"{llm.backend}|{llm.model_name}|{self._cache_context}"
+        return self.cache.make_key(question, evidence_hits, context, debug)
+
+    @staticmethod
+    def _timed_out(deadline: Deadline | None) -> bool:
+        return deadline is not None and deadline.timed_out_stage is not None
+
+    def _cacheable(self, package: AnswerPackage, deadline: Deadline | None, degraded: bool) -> bool:
+        return not degraded and not package.fallback and not self._timed_out(deadline)
+
+    def answer(
+        self,
+        question: str,
+        evidence_hits: List[RetrievalHit],
+        debug: bool = False,
+        llm: LocalLLM | None = None,
+        deadline: Deadline | None = None,
+        degraded: bool = False,
+    ) -> AnswerPackage:
+        # llm overrides the configured model for this call, e.g. the heuristic
+        # fallback when the service is degraded under load. Answers built after
+        # the deadline expired are partial and, like heuristic fallbacks after a
+        # model failure and answers over degraded retrieval (degraded=True), are
+        # never cached: their scores and guardrail outcome differ from a
+        # normal-load answer to the same question.
+        llm = llm or self.llm
+        with start_span("answer", evidence=len(evidence_hits)) as span:
+            cache_key = self._cache_key(question, evidence_hits, debug, llm)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                span.set_attribute("cache_hit", cached is not None)
+                if cached is not None:
+                    return cached
+
+            prompt = build_prompt(question, evidence_hits)
+            with stage_timer("llm_generation"), start_span("answer.generation", backend=llm.backend) as gen_span:
+                if gen_span.trace_id is not None:
+                    gen_span.set_attribute("prompt_tokens", llm.count_tokens(prompt))
+                generation = llm.generate(question=question, prompt=prompt, hits=evidence_hits, deadline=deadline)
+            package = self._guarded_package(question, evidence_hits, generation, debug, llm)
+            if cache_key is not None and self._cacheable(package, deadline, degraded):
+                self.cache.put(cache_key, package)
+            return package
+
+    def answer_many(
+        self,
+        questions: List[str],
+        evidence_lists: List[List[RetrievalHit]],
+        debug: bool | List[bool] = False,
+        llm: LocalLLM | None = None,
+        deadline: Deadline | None = None,
+        degraded: bool = False,
+    ) -> List[AnswerPackage | BaseException]:
+        llm = llm or self.llm
+        debug_flags = debug if isinstance(debug, list) else [debug] * len(questions)
+        results: List[AnswerPackage | BaseException | None] = [None] * len(questions)
+        cache_keys: List[str | None] = []
+        pending: List[int] = []
+        for i, (question, hits, item_debug) in enumerate(zip(questions, evidence_lists, debug_flags)):
+            cache_key = self._cache_key(question, hits, item_debug, llm)
+            cache_keys.append(cache_key)
+            cached = self.cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        prompts = [build_prompt(questions[i], evidence_lists[i]) for i in pending]
+        with stage_timer("llm_generation"), start_span("answer.generation", backend=llm.backend, batch_size=len(pending)):
+            generations = llm.generate_many(
+                [questions[i] for i in pending],
+                prompts,
+                [evidence_lists[i] for i in pending],
+                deadline=deadline,
+            )
+        for i, generation in zip(pending, generations):
+            if isinstance(generation, BaseException):
+                results[i] = generation
+                continue
+            try:
+                package = self._guarded_package(questions[i], evidence_lists[i], generation, debug_flags[i], llm)
+            except Exception as exc:
+                results[i] = exc
+                continue
+            if cache_keys[i] is not None and self._cacheable(package, deadline, degraded):
+                self.cache.put(cache_keys[i], package)
+            results[i] = package
+        return results
+
+    def answer_stream(
+        self,
+        question: str,
+        evidence_hits: List[RetrievalHit],
+        debug: bool = False,
+        llm: LocalLLM | None = None,
+        deadline: Deadline | None = None,
+        degraded: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        llm = llm or self.llm
+        cache_key = self._cache_key(question, evidence_hits, debug, llm)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield {"event": "answer", "data": cached}
+                return
 
-    def answer(self, question: str, evidence_hits: List[RetrievalHit], debug: bool = False) -> AnswerPackage:
         prompt = build_prompt(question, evidence_hits)
-        generation = self.llm.generate(question=question, prompt=prompt, hits=evidence_hits)
+        pieces: List[str] = []
+        started = time.perf_counter()
+        stream = llm.generate_stream(question=question, prompt=prompt, hits=evidence_hits, deadline=deadline)
+        try:
+            for piece in stream:
+                pieces.append(piece)
+                yield {"event": "token", "data": {"text": piece}}
+        finally:
+            # A client that disconnects closes this generator; stop generating too.
+            stream.close()
+        generation = llm.finish_stream(question, prompt, "".join(pieces), evidence_hits, fallback=stream.fallback)
+        observe_stage("llm_generation", time.perf_counter() - started)
+        package = self._guarded_package(question, evidence_hits, generation, debug, llm)
+        if cache_key is not None and self._cacheable(package, deadline, degraded):
+            self.cache.put(cache_key, package)
+        yield {"event": "answer", "data": package}
+
+    def _guarded_package(
+        self,
+        question: str,
+        evidence_hits: List[RetrievalHit],
+        generation: GeneratedAnswer,
+        debug: bool,
+        llm: LocalLLM,
+    ) -> AnswerPackage:
+        with stage_timer("guardrails"), start_span("answer.guardrails") as span:
+            package = self.package(question, evidence_hits, generation, debug=debug, llm=llm)
+            span.set_attributes(status=package.status, confidence=package.confidence, citations=len(package.citations))
+        ANSWERS_TOTAL.inc(status=package.status)
+        return package
+
+    def package(
+        self,
+        question: str,
+        evidence_hits: List[RetrievalHit],
+        generation: GeneratedAnswer,
+        debug: bool = False,
+        llm: LocalLLM | None = None,
+    ) -> AnswerPackage:
+        llm = llm or self.llm
         has_reference = has_explicit_reference(question)
         top_text_relevance = query_chunk_overlap_score(question, evidence_hits[0].chunk_ref.text) if evidence_hits else 0.0
         if evidence_hits:
@@ -117,7 +290,7 @@ class RAGAnswerer:
         if not has_reference and top_doc_support_count >= 2 and top_doc_token_coverage < 0.5:
             not_found = True
 
-        if self.llm.backend == "heuristic":
+        if llm.backend == "heuristic":
             bullets: List[str] = []
             for hit in selected_hits:
                 text = hit.chunk_ref.text.strip()
@@ -132,6 +305,17 @@ class RAGAnswerer:
             if answer_text == "NOT_FOUND":
                 not_found = True
 
+        signals = {
+            "top_score": evidence_hits[0].score if evidence_hits else 0.0,
+            "citation_coverage": citation_coverage,
+            "top_relevance": top_relevance,
+            "top_text_relevance": top_text_relevance,
+            "top_meta_relevance": top_meta_relevance,
+            "top_doc_support_count": top_doc_support_count,
+            "top_two_score_ratio": top_two_score_ratio,
+            "open_query_token_coverage": open_query_token_coverage,
+            "top_doc_token_coverage": top_doc_token_coverage,
+        }
         if not_found:
             return AnswerPackage(
                 answer_text="I couldn't find this in the current documents.",
@@ -139,19 +323,9 @@ class RAGAnswerer:
                 confidence="Low",
                 status="NOT_FOUND",
                 clarifying_question=build_clarifying_question(question),
-                debug={
-                    "top_score": evidence_hits[0].score if evidence_hits else 0.0,
-                    "citation_coverage": citation_coverage,
-                    "top_relevance": top_relevance,
-                    "top_text_relevance": top_text_relevance,
-                    "top_meta_relevance": top_meta_relevance,
-                    "top_doc_support_count": top_doc_support_count,
-                    "top_two_score_ratio": top_two_score_ratio,
-                    "open_query_token_coverage": open_query_token_coverage,
-                    "top_doc_token_coverage": top_doc_token_coverage,
-                }
-                if debug
-                else {},
+                debug=dict(signals) if debug else {},
+                signals=signals,
+                fallback=generation.fallback,
             )
 
         return AnswerPackage(
@@ -160,17 +334,7 @@ class RAGAnswerer:
             confidence=confidence,
             status="ANSWERED",
             clarifying_question=None,
-            debug={
-                "top_score": evidence_hits[0].score if evidence_hits else 0.0,
-                "citation_coverage": citation_coverage,
-                "top_relevance": top_relevance,
-                "top_text_relevance": top_text_relevance,
-                "top_meta_relevance": top_meta_relevance,
-                "top_doc_support_count": top_doc_support_count,
-                "top_two_score_ratio": top_two_score_ratio,
-                "open_query_token_coverage": open_query_token_coverage,
-                "top_doc_token_coverage": top_doc_token_coverage,
-            }
-            if debug
-            else {},
+            debug=dict(signals) if debug else {},
+            signals=signals,
+            fallback=generation.fallback,
         )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+from typing import Iterator, List, Optional
+
+from src.common.schemas import RetrievalHit
+
+
+class HTTPGenerationClient:
+    # Client for the reference generation server in src/rag/llm_server.py. One
+    # pooled keep-alive session is shared by all request threads; connection
+    # errors and 502/503/504 responses are retried with backoff.
+    def __init__(self, base_url: str, timeout_s: float = 60.0, retries: int = 2, pool_size: int = 8) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (min(5.0, timeout_s), timeout_s)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    @staticmethod
+    def _payload(question: str, prompt: str, hits: List[RetrievalHit]) -> dict:
+        return {"question": question, "prompt": prompt, "hits": [hit.to_dict() for hit in hits]}
+
+    def health(self) -> dict:
+        resp = self._session.get(f"{self.base_url}/health", timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _timeout(self, timeout_s: Optional[float]) -> tuple:
+        # A per-request deadline can only shorten the configured timeouts.
+        if timeout_s is None:
+            return self.timeout
+        return (min(self.timeout[0], timeout_s), min(self.timeout[1], timeout_s))
+
+    def generate(self, question: str, prompt: str, hits: List[RetrievalHit], timeout_s: Optional[float] = None) -> dict:
+        resp = self._session.post(
+            f"{self.base_url}/generate",
+            json=self._payload(question, prompt, hits),
+            timeout=self._timeout(timeout_s),
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    def generate_stream(
+        self,
+        question: str,
+        prompt: str,
+        hits: List[RetrievalHit],
+        timeout_s: Optional[float] = None,
+    ) -> Iterator[str]:
+        with self._session.post(
+            f"{self.base_url}/generate/stream",
+            json=self._payload(question, prompt, hits),
+            timeout=self._timeout(timeout_s),
+            stream=True,
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                text = json.loads(line).get("text", "")
+                if text:
+                    yield text
+
+    def close(self) -> None:
+        self._session.close()
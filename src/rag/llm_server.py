@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.common.schemas import DocumentChunk, RetrievalHit
+from src.config.settings import load_settings
+from src.rag.answerer import build_llm
+from src.rag.local_llm import LocalLLM
+
+
+class GenerateRequest(BaseModel):
+    question: str
+    prompt: str
+    hits: List[Dict[str, Any]] = []
+
+
+def _hit_from_dict(row: Dict[str, Any]) -> RetrievalHit:
+    payload = dict(row)
+    payload["chunk_ref"] = DocumentChunk(**payload["chunk_ref"])
+    return RetrievalHit(**payload)
+
+
+@lru_cache(maxsize=1)
+def get_llm() -> LocalLLM:
+    config_path = os.getenv("APP_CONFIG_PATH", "config/default.yaml")
+    settings = load_settings(config_path)
+    return build_llm(settings, backend=settings.llm_server_backend)
+
+
+def create_llm_app() -> FastAPI:
+    app = FastAPI(title="Local LLM Generation Server", version="0.1.0")
+
+    @app.get("/health")
+    def health() -> dict:
+        llm = get_llm()
+        return {"status": "ok", "backend": llm.backend, "model_name": llm.model_name}
+
+    @app.post("/generate")
+    def generate(req: GenerateRequest) -> dict:
+        hits = [_hit_from_dict(row) for row in req.hits]
+        generation = get_llm().generate(question=req.question, prompt=req.prompt, hits=hits)
+        return {
+            "answer": generation.answer,
+            "citations": generation.citations,
+            "raw_output": generation.raw_output,
+            "fallback": generation.fallback,
+            "backend": get_llm().backend,
+        }
+
+    @app.post("/generate/stream")
+    def generate_stream(req: GenerateRequest) -> StreamingResponse:
+        hits = [_hit_from_dict(row) for row in req.hits]
+        pieces = get_llm().generate_stream(question=req.question, prompt=req.prompt, hits=hits)
+        lines = (json.dumps({"text": piece}, ensure_ascii=False) + "\n" for piece in pieces)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return app
+
+
+app = create_llm_app()
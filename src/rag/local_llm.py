@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import copy
 import json
-from dataclasses import dataclass
-from typing import List
+import queue
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
 
+from src.common.deadline import Deadline
+from src.common.profiling import profile_worker
 from src.common.schemas import RetrievalHit
 
 
@@ -12,16 +19,377 @@ class GeneratedAnswer:
     answer: str
     citations: List[dict]
     raw_output: str
+    # Set when the configured model failed (unreachable, timed out, unparsable
+    # output) and the extractive heuristic answered instead; never cached.
+    fallback: bool = False
+
+
+# Text pieces of one streamed generation. fallback is set when the backend
+# failed before its first token and the heuristic answer was streamed instead,
+# so finish_stream can mark the answer as a fallback.
+class GenerationStream:
+    def __init__(self) -> None:
+        self.fallback = False
+        self.pieces: Iterator[str] = iter(())
+
+    def __iter__(self) -> Iterator[str]:
+        return self.pieces
+
+    def close(self) -> None:
+        close = getattr(self.pieces, "close", None)
+        if close is not None:
+            close()
+
+
+@dataclass
+class _PendingGeneration:
+    prompt: str
+    deadline: Optional[Deadline] = None
+    done: Event = field(default_factory=Event)
+    output: Optional[str] = None
+    error: Optional[BaseException] = None
+
+
+# Incremental scanner over generated text that reports when the first JSON object
+# has been closed (brace depth back to zero outside of strings) or when the output
+# opens with a bare NOT_FOUND.
+class JsonCompletionTracker:
+    _NOT_FOUND = "NOT_FOUND"
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.complete = False
+        self._lead = ""
+
+    def feed(self, text: str) -> bool:
+        if self.complete:
+            return True
+        for ch in text:
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                    continue
+                if len(self._lead) < 64:
+                    self._lead += ch
+                    if self._lead.lstrip().upper().startswith(self._NOT_FOUND):
+                        self.complete = True
+                        return True
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    return True
+        return False
+
+
+def extract_first_json_object(text: str) -> Optional[dict]:
+    start = text.find("{")
+    while start != -1:
+        tracker = JsonCompletionTracker()
+        for offset, ch in enumerate(text[start:]):
+            if tracker.feed(ch):
+                try:
+                    payload = json.loads(text[start : start + offset + 1])
+                except ValueError:
+                    break
+                if isinstance(payload, dict):
+                    return payload
+                break
+        start = text.find("{", start + 1)
+    return None
+
+
+def _json_stopping_criteria(tokenizer, deadlines: Sequence[Optional[Deadline]] = (), stop: Optional[Event] = None):
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _StopOnCompleteJson(StoppingCriteria):
+        def __init__(self) -> None:
+            self._trackers: Optional[List[JsonCompletionTracker]] = None
+
+        def __call__(self, input_ids, scores, **kwargs):
+            # Called once per generated token, so the last column is always new text.
+            if self._trackers is None:
+                self._trackers = [JsonCompletionTracker() for _ in range(input_ids.shape[0])]
+            done = [
+                tracker.feed(tokenizer.decode([token_id], skip_special_tokens=True))
+                for tracker, token_id in zip(self._trackers, input_ids[:, -1].tolist())
+            ]
+            return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    class _StopAtDeadline(StoppingCriteria):
+        # Row i belongs to deadlines[i] (a single deadline covers every row), so
+        # a batched row stops as soon as its own caller has given up.
+        def __call__(self, input_ids, scores, **kwargs):
+            rows = deadlines if len(deadlines) == input_ids.shape[0] else list(deadlines[:1]) * input_ids.shape[0]
+            expired = [deadline is not None and deadline.exceeded("generation") for deadline in rows]
+            return torch.tensor(expired, dtype=torch.bool, device=input_ids.device)
+
+    class _StopWhenAsked(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), stop.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    criteria = [_StopOnCompleteJson()]
+    if any(deadline is not None for deadline in deadlines):
+        criteria.append(_StopAtDeadline())
+    if stop is not None:
+        criteria.append(_StopWhenAsked())
+    return StoppingCriteriaList(criteria)
+
+
+def _stream_generation(generate: Callable, streamer, stop: Event) -> Iterator[str]:
+    # Runs generate(streamer=...) on a worker thread and yields its text. The
+    # streamer is always ended, so a generate that raises fails the consumer
+    # instead of leaving it blocked on the streamer; closing the iterator (client
+    # gone) sets stop, which the stopping criteria check after every token.
+    failure: List[BaseException] = []
+
+    def run() -> None:
+        try:
+            with profile_worker():
+                generate(streamer=streamer)
+        except BaseException as exc:
+            failure.append(exc)
+        finally:
+            streamer.end()
+
+    worker = Thread(target=run, name="llm-stream", daemon=True)
+    worker.start()
+    try:
+        for text in streamer:
+            if text:
+                yield text
+    finally:
+        stop.set()
+    worker.join()
+    if failure:
+        raise failure[0]
+
+
+# Groups concurrent prompts into one padded batched generate call. The collector
+# waits for a first prompt, then drains the queue until max_batch_size prompts are
+# pending or max_wait_ms has elapsed, and routes each output back to its caller.
+# generate_batch also gets each prompt's deadline so it can stop that row early;
+# prompts whose deadline has passed before their batch starts are dropped.
+class GenerationScheduler:
+    def __init__(
+        self,
+        generate_batch: Callable[[List[str], List[Optional[Deadline]]], List[str]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ) -> None:
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[_PendingGeneration]" = queue.Queue()
+        self._lock = Lock()
+        self._batches = 0
+        self._requests = 0
+        self._last_batch_size = 0
+        self._largest_batch_size = 0
+        self._worker = Thread(target=self._run, name="llm-batch-collector", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt: str, timeout_s: Optional[float] = None, deadline: Optional[Deadline] = None) -> Optional[str]:
+        # Returns None when timeout_s passes first or the prompt was dropped for
+        # its deadline. A running batch only stops a row at its deadline.
+        pending = _PendingGeneration(prompt=prompt, deadline=deadline)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout_s):
+            return None
+        if pending.error is not None:
+            raise pending.error
+        return pending.output
+
+    def submit_many(
+        self,
+        prompts: List[str],
+        timeout_s: Optional[float] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> List[str | BaseException | None]:
+        pending = [_PendingGeneration(prompt=prompt, deadline=deadline) for prompt in prompts]
+        for item in pending:
+            self._queue.put(item)
+        expires_at = None if timeout_s is None else time.monotonic() + timeout_s
+        results: List[str | BaseException | None] = []
+        for item in pending:
+            remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            if not item.done.wait(remaining):
+                results.append(None)
+                continue
+            results.append(item.error if item.error is not None else item.output)
+        return results
+
+    def _collect(self) -> List[_PendingGeneration]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            live = [item for item in batch if item.deadline is None or not item.deadline.expired()]
+            try:
+                if live:
+                    with profile_worker():
+                        outputs = self.generate_batch([item.prompt for item in live], [item.deadline for item in live])
+                    for item, output in zip(live, outputs):
+                        item.output = output or ""
+            except BaseException as exc:
+                for item in batch:
+                    item.error = exc
+            with self._lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._last_batch_size = len(batch)
+                self._largest_batch_size = max(self._largest_batch_size, len(batch))
+            for item in batch:
+                item.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "last_batch_size": self._last_batch_size,
+                "largest_batch_size": self._largest_batch_size,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+            }
+
+
+# Past-key-values for the constant prompt preamble, computed once on first use.
+# Each request gets a deep copy because generate() extends the cache in place.
+class PrefixKVCache:
+    def __init__(self, model, tokenizer, prefix: str) -> None:
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix = prefix
+        self._prefix_ids: Optional[List[int]] = None
+        self._cache = None
+        self._disabled = False
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_built(self) -> bool:
+        if self._disabled:
+            return False
+        if self._cache is not None:
+            return True
+        with self._lock:
+            if self._cache is not None:
+                return True
+            try:
+                import torch
+                from transformers import DynamicCache
+
+                encoded = self.tokenizer(self.prefix, return_tensors="pt").to(self.model.device)
+                with torch.no_grad():
+                    out = self.model(**encoded, past_key_values=DynamicCache(), use_cache=True)
+                self._prefix_ids = encoded["input_ids"][0].tolist()
+                self._cache = out.past_key_values
+            except Exception:
+                self._disabled = True
+                return False
+        return True
+
+    def prepare(self, prompt: str) -> Optional[dict]:
+        if not prompt.startswith(self.prefix) or not self._ensure_built():
+            self._count(hit=False)
+            return None
+        encoded = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        ids = encoded["input_ids"][0].tolist()
+        n_prefix = len(self._prefix_ids or [])
+        # Tokenizers may merge across the prefix/suffix boundary; only reuse the
+        # cache when the prompt tokenizes to exactly the cached prefix ids first.
+        if len(ids) <= n_prefix or ids[:n_prefix] != self._prefix_ids:
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return {**encoded, "past_key_values": copy.deepcopy(self._cache)}
+
+    def _count(self, hit: bool) -> None:
+        # prepare() runs on the scheduler, streaming and request threads at once.
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "prefix_tokens": len(self._prefix_ids or []),
+                "hits": self.hits,
+                "misses": self.misses,
+                "enabled": 0.0 if self._disabled else 1.0,
+            }
 
 
 class LocalLLM:
-    def __init__(self, backend: str, model_name: str, max_new_tokens: int = 256) -> None:
+    def __init__(
+        self,
+        backend: str,
+        model_name: str,
+        max_new_tokens: int = 256,
+        max_batch_size: int = 1,
+        batch_max_wait_ms: float = 10.0,
+        prompt_prefix: Optional[str] = None,
+        http_url: Optional[str] = None,
+        http_timeout_s: float = 60.0,
+        http_retries: int = 2,
+        http_pool_size: int = 8,
+    ) -> None:
         self.backend = backend
         self.model_name = model_name
         self.max_new_tokens = max_new_tokens
         self._pipe = None
+        self._scheduler: Optional[GenerationScheduler] = None
+        self._prefix_cache: Optional[PrefixKVCache] = None
+        self._http = None
+        self.http_fallbacks = 0
+
+        if backend == "http":
+            try:
+                from src.rag.http_llm import HTTPGenerationClient
+
+                self._http = HTTPGenerationClient(http_url or "", http_timeout_s, http_retries, http_pool_size)
+            except Exception:
+                self._http = None
+                self.backend = "heuristic"
+
+        self.load_duration_s: Optional[float] = None
 
         if backend == "transformers":
+            started = time.perf_counter()
             try:
                 from transformers import pipeline
 
@@ -29,6 +397,33 @@ class LocalLLM:
             except Exception:
                 self._pipe = None
                 self.backend = "heuristic"
+            self.load_duration_s = time.perf_counter() - started
+
+        if self._pipe is not None and max_batch_size > 1:
+            tokenizer = self._pipe.tokenizer
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            tokenizer.padding_side = "left"
+            self._scheduler = GenerationScheduler(self._transformers_generate_batch, max_batch_size, batch_max_wait_ms)
+
+        if self._pipe is not None and prompt_prefix:
+            self._prefix_cache = PrefixKVCache(self._pipe.model, self._pipe.tokenizer, prompt_prefix)
+
+    def count_tokens(self, text: str) -> int:
+        # Exact with a loaded tokenizer, otherwise a whitespace approximation.
+        if self._pipe is not None:
+            return len(self._pipe.tokenizer(text)["input_ids"])
+        return len(text.split())
+
+    def scheduler_stats(self) -> Dict[str, float]:
+        if self._scheduler is None:
+            return {}
+        return self._scheduler.stats()
+
+    def prefix_cache_stats(self) -> Dict[str, float]:
+        if self._prefix_cache is None:
+            return {}
+        return self._prefix_cache.stats()
 
     def _heuristic_generate(self, question: str, hits: List[RetrievalHit]) -> GeneratedAnswer:
         if not hits:
@@ -56,21 +451,202 @@ class LocalLLM:
             answer = "NOT_FOUND"
         return GeneratedAnswer(answer=answer, citations=citations, raw_output=answer)
 
-    def _transformers_generate(self, prompt: str, hits: List[RetrievalHit]) -> GeneratedAnswer:
+    def _fallback_generate(self, question: str, hits: List[RetrievalHit]) -> GeneratedAnswer:
+        generation = self._heuristic_generate(question, hits)
+        generation.fallback = True
+        return generation
+
+    def _parse_output(self, prompt: str, output: str, hits: List[RetrievalHit]) -> GeneratedAnswer:
+        completion = output[len(prompt) :] if output.startswith(prompt) else output
+        if completion.strip().upper().startswith("NOT_FOUND"):
+            return GeneratedAnswer(answer="NOT_FOUND", citations=[], raw_output=output)
+        payload = extract_first_json_object(completion)
+        if payload is None:
+            return self._fallback_generate(prompt, hits)
+        answer = str(payload.get("answer", "NOT_FOUND"))
+        citations = payload.get("citations", []) if isinstance(payload.get("citations", []), list) else []
+        return GeneratedAnswer(answer=answer, citations=citations, raw_output=output)
+
+    def _transformers_generate(self, prompt: str, hits: List[RetrievalHit], deadline: Optional[Deadline] = None) -> GeneratedAnswer:
         if self._pipe is None:
-            return self._heuristic_generate(prompt, hits)
+            return self._fallback_generate(prompt, hits)
+        if deadline is not None and deadline.exceeded("generation"):
+            return self._fallback_generate(prompt, hits)
+
+        if self._scheduler is not None:
+            timeout_s = deadline.remaining_s() if deadline is not None else None
+            output = self._scheduler.submit(prompt, timeout_s=timeout_s, deadline=deadline)
+            if output is None:
+                deadline.exceeded("generation")
+                return self._fallback_generate(prompt, hits)
+        else:
+            output = self._transformers_generate_one(prompt, deadline)
+        # A generation cut short by the deadline usually has no complete JSON
+        # object, in which case _parse_output answers extractively.
+        return self._parse_output(prompt, output, hits)
+
+    def _generate_kwargs(self, *deadlines: Optional[Deadline], stop: Optional[Event] = None) -> dict:
+        return {
+            "max_new_tokens": self.max_new_tokens,
+            "do_sample": False,
+            "stopping_criteria": _json_stopping_criteria(self._pipe.tokenizer, deadlines, stop),
+        }
+
+    def _transformers_generate_one(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
+        cached_inputs = self._prefix_cache.prepare(prompt) if self._prefix_cache is not None else None
+        if cached_inputs is None:
+            return self._pipe(prompt, **self._generate_kwargs(deadline))[0]["generated_text"]
+
+        output_ids = self._pipe.model.generate(**cached_inputs, **self._generate_kwargs(deadline))
+        new_ids = output_ids[0][cached_inputs["input_ids"].shape[1] :]
+        return prompt + self._pipe.tokenizer.decode(new_ids, skip_special_tokens=True)
+
+    def _transformers_generate_batch(self, prompts: List[str], deadlines: List[Optional[Deadline]]) -> List[str]:
+        # Left padding shifts the shared prefix, so the prefix cache only applies
+        # when the scheduler runs a single prompt.
+        if len(prompts) == 1:
+            return [self._transformers_generate_one(prompts[0], deadlines[0])]
+        outputs = self._pipe(prompts, batch_size=len(prompts), **self._generate_kwargs(*deadlines))
+        return [out[0]["generated_text"] for out in outputs]
+
+    def _transformers_stream(self, prompt: str, deadline: Optional[Deadline] = None) -> Iterator[str]:
+        from transformers import TextIteratorStreamer
+
+        tokenizer = self._pipe.tokenizer
+        model = self._pipe.model
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        inputs = self._prefix_cache.prepare(prompt) if self._prefix_cache is not None else None
+        if inputs is None:
+            inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        stop = Event()
+        generate = partial(model.generate, **inputs, **self._generate_kwargs(deadline, stop=stop))
+        yield from _stream_generation(generate, streamer, stop)
 
-        output = self._pipe(prompt, max_new_tokens=self.max_new_tokens, do_sample=False)[0]["generated_text"]
-        maybe_json = output.split("\n")[-1].strip()
+    def _http_generate(
+        self,
+        question: str,
+        prompt: str,
+        hits: List[RetrievalHit],
+        deadline: Optional[Deadline] = None,
+    ) -> GeneratedAnswer:
+        if deadline is not None and deadline.exceeded("generation"):
+            return self._fallback_generate(question, hits)
         try:
-            payload = json.loads(maybe_json)
-            answer = str(payload.get("answer", "NOT_FOUND"))
-            citations = payload.get("citations", []) if isinstance(payload.get("citations", []), list) else []
-            return GeneratedAnswer(answer=answer, citations=citations, raw_output=output)
+            payload = self._http.generate(question, prompt, hits, timeout_s=deadline.remaining_s() if deadline is not None else None)
         except Exception:
-            return self._heuristic_generate(prompt, hits)
+            if deadline is not None:
+                deadline.exceeded("generation")
+            self.http_fallbacks += 1
+            return self._fallback_generate(question, hits)
+        citations = payload.get("citations", [])
+        return GeneratedAnswer(
+            answer=str(payload.get("answer", "NOT_FOUND")),
+            citations=citations if isinstance(citations, list) else [],
+            raw_output=str(payload.get("raw_output", "")),
+            fallback=bool(payload.get("fallback", False)),
+        )
 
-    def generate(self, question: str, prompt: str, hits: List[RetrievalHit]) -> GeneratedAnswer:
+    def _http_stream(
+        self,
+        question: str,
+        prompt: str,
+        hits: List[RetrievalHit],
+        deadline: Optional[Deadline],
+        stream: GenerationStream,
+    ) -> Iterator[str]:
+        emitted = False
+        try:
+            timeout_s = deadline.remaining_s() if deadline is not None else None
+            for piece in self._http.generate_stream(question, prompt, hits, timeout_s=timeout_s):
+                if deadline is not None and deadline.exceeded("generation"):
+                    break
+                emitted = True
+                yield piece
+        except Exception:
+            # Once tokens have been sent the caller owns a partial answer; only a
+            # failure before the first token can fall back transparently. A read
+            # timeout caused by the request deadline just ends the stream.
+            timed_out = deadline is not None and deadline.exceeded("generation")
+            if emitted and timed_out:
+                return
+            if emitted:
+                raise
+            self.http_fallbacks += 1
+            stream.fallback = True
+            yield self._heuristic_generate(question, hits).raw_output
+
+    def generate(
+        self,
+        question: str,
+        prompt: str,
+        hits: List[RetrievalHit],
+        deadline: Optional[Deadline] = None,
+    ) -> GeneratedAnswer:
         if self.backend == "transformers":
-            return self._transformers_generate(prompt, hits)
+            return self._transformers_generate(prompt, hits, deadline)
+        if self.backend == "http":
+            return self._http_generate(question, prompt, hits, deadline)
+        return self._heuristic_generate(question, hits)
+
+    def generate_many(
+        self,
+        questions: List[str],
+        prompts: List[str],
+        hits_list: List[List[RetrievalHit]],
+        deadline: Optional[Deadline] = None,
+    ) -> List[GeneratedAnswer | BaseException]:
+        # Batch callers enqueue every prompt at once so the scheduler can pack them
+        # into padded generate calls; a failed batch only fails its own items.
+        if self.backend == "transformers" and self._scheduler is not None:
+            if deadline is not None and deadline.exceeded("generation"):
+                return [self._fallback_generate(q, hits) for q, hits in zip(questions, hits_list)]
+            timeout_s = deadline.remaining_s() if deadline is not None else None
+            outputs = self._scheduler.submit_many(prompts, timeout_s=timeout_s, deadline=deadline)
+            results: List[GeneratedAnswer | BaseException] = []
+            for question, prompt, output, hits in zip(questions, prompts, outputs, hits_list):
+                if output is None:
+                    deadline.exceeded("generation")
+                    results.append(self._fallback_generate(question, hits))
+                elif isinstance(output, BaseException):
+                    results.append(output)
+                else:
+                    results.append(self._parse_output(prompt, output, hits))
+            return results
+        results = []
+        for question, prompt, hits in zip(questions, prompts, hits_list):
+            try:
+                results.append(self.generate(question=question, prompt=prompt, hits=hits, deadline=deadline))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    def generate_stream(
+        self,
+        question: str,
+        prompt: str,
+        hits: List[RetrievalHit],
+        deadline: Optional[Deadline] = None,
+    ) -> GenerationStream:
+        stream = GenerationStream()
+        if self.backend == "transformers" and self._pipe is not None:
+            stream.pieces = self._transformers_stream(prompt, deadline)
+        elif self.backend == "http":
+            stream.pieces = self._http_stream(question, prompt, hits, deadline, stream)
+        else:
+            generation = self._heuristic_generate(question, hits)
+            stream.pieces = iter(generation.raw_output.splitlines(keepends=True))
+        return stream
+
+    def finish_stream(
+        self,
+        question: str,
+        prompt: str,
+        output: str,
+        hits: List[RetrievalHit],
+        fallback: bool = False,
+    ) -> GeneratedAnswer:
+        if fallback:
+            return self._fallback_generate(question, hits)
+        if self.backend == "http" or (self.backend == "transformers" and self._pipe is not None):
+            return self._parse_output(prompt, output, hits)
         return self._heuristic_generate(question, hits)
@@ -5,7 +5,20 @@ from typing import List
 from src.common.schemas import RetrievalHit
 
 
-def build_prompt(question: str, evidence_hits: List[RetrievalHit]) -> str:
+# Bump whenever the prompt layout changes so cached answers are not reused.
+PROMPT_TEMPLATE_VERSION = "1"
+
+# Constant instruction block shared by every prompt. Kept as a separate string so
+# the transformers backend can precompute its KV cache once and reuse it.
+PROMPT_PREAMBLE = (
+    "You are an enterprise-safe Vietnamese QA assistant.\n"
+    "Only answer from provided evidence.\n"
+    "If unsupported, output NOT_FOUND.\n"
+    "Return JSON with keys: answer, citations, confidence.\n\n"
+)
+
+
+def build_prompt_suffix(question: str, evidence_hits: List[RetrievalHit]) -> str:
     evidence_lines = []
     for i, hit in enumerate(evidence_hits, start=1):
         chunk = hit.chunk_ref
@@ -15,10 +28,10 @@ def build_prompt(question: str, evidence_hits: List[RetrievalHit]) -> str:
     evidence_text = "\n\n".join(evidence_lines)
 
     return (
-        "You are an enterprise-safe Vietnamese QA assistant.\n"
-        "Only answer from provided evidence.\n"
-        "If unsupported, output NOT_FOUND.\n"
-        "Return JSON with keys: answer, citations, confidence.\n\n"
         f"QUESTION:\n{question}\n\n"
         f"EVIDENCE:\n{evidence_text}\n"
     )
+
+
+def build_prompt(question: str, evidence_hits: List[RetrievalHit]) -> str:
+    return PROMPT_PREAMBLE + build_prompt_suffix(question, evidence_hits)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import List
 
+from src.common.deadline import Deadline
 from src.common.schemas import RetrievalHit
 from src.indexing.bm25_index import BM25Index
 
@@ -15,5 +16,26 @@ class BM25Retriever:
     def from_path(cls, index_path: Path) -> "BM25Retriever":
         return cls(BM25Index.load(index_path))
 
-    def retrieve(self, query: str, top_k: int, department_filter: str | None = None, access_level: str | None = None) -> List[RetrievalHit]:
+    def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[RetrievalHit]:
+        if deadline is not None and deadline.exceeded("bm25"):
+            return []
         return self.index.search(query=query, top_k=top_k, department_filter=department_filter, access_level=access_level)
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        if deadline is not None and deadline.exceeded("bm25"):
+            return [[] for _ in queries]
+        return self.index.search_many(queries, top_ks, department_filters, access_levels)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import List
 
+from src.common.deadline import Deadline
 from src.common.schemas import RetrievalHit
 from src.indexing.dense_index import DenseIndex, EmbeddingBackend
 
@@ -13,16 +14,41 @@ class DenseRetriever:
         self.backend = backend
 
     @classmethod
-    def from_path(cls, index_dir: Path, embedding_model_name: str) -> "DenseRetriever":
-        index = DenseIndex.load(index_dir)
+    def from_path(cls, index_dir: Path, embedding_model_name: str, search_backend: str = "auto") -> "DenseRetriever":
+        index = DenseIndex.load(index_dir, search_backend=search_backend)
         backend = EmbeddingBackend(embedding_model_name)
         return cls(index=index, backend=backend)
 
-    def retrieve(self, query: str, top_k: int, department_filter: str | None = None, access_level: str | None = None) -> List[RetrievalHit]:
+    def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[RetrievalHit]:
         return self.index.search(
             query=query,
             top_k=top_k,
             backend=self.backend,
             department_filter=department_filter,
             access_level=access_level,
+            deadline=deadline,
+        )
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        return self.index.search_many(
+            queries=queries,
+            top_ks=top_ks,
+            backend=self.backend,
+            department_filters=department_filters,
+            access_levels=access_levels,
+            deadline=deadline,
         )
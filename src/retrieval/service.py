@@ -4,7 +4,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List
 
+from src.common.deadline import Deadline
+from src.common.metrics import stage_timer
 from src.common.schemas import RetrievalHit
+from src.common.tracing import start_span
 from src.config.settings import AppSettings
 from src.guardrails.policy import extract_query_targets, filter_retrieval_hits, max_phrase_match_score, tokenize_for_overlap
 from src.retrieval.bm25_retriever import BM25Retriever
@@ -21,6 +24,14 @@ class RetrievalDebug:
     candidate_size: int
 
 
+@dataclass
+class RetrievalRequest:
+    query: str
+    top_k: int
+    department_filter: str | None = None
+    access_level: str | None = None
+
+
 class RetrievalService:
     def __init__(self, settings: AppSettings, bm25: BM25Retriever, dense: DenseRetriever) -> None:
         self.settings = settings
@@ -101,36 +112,59 @@ class RetrievalService:
         total = lexical + dense
         return lexical / total, dense / total
 
-    def retrieve(
+    def _candidate_size(self, top_k: int, max_candidate_size: int | None = None) -> int:
+        size = max(self.settings.retrieval_candidate_size, top_k * 3, 10)
+        if max_candidate_size is not None:
+            size = max(top_k, min(size, max_candidate_size))
+        return size
+
+    def _rank(
         self,
         query: str,
         top_k: int,
-        department_filter: str | None = None,
-        access_level: str | None = None,
+        candidate_size: int,
+        bm25_hits: List[RetrievalHit],
+        dense_hits: List[RetrievalHit],
+        use_dense: bool = True,
     ) -> tuple[List[RetrievalHit], RetrievalDebug]:
-        candidate_size = max(self.settings.retrieval_candidate_size, top_k * 3, 10)
-        bm25_hits = self.bm25.retrieve(query, candidate_size, department_filter, access_level)
-        dense_hits = self.dense.retrieve(query, candidate_size, department_filter, access_level)
-        lexical_weight, dense_weight = self._compute_query_weights(query)
-
-        fused_candidates = fuse_hits(
-            bm25_hits=bm25_hits,
-            dense_hits=dense_hits,
-            top_k=candidate_size,
-            method=self.settings.fusion_method,
-            lexical_weight=lexical_weight,
-            dense_weight=dense_weight,
-        )
-        recency_boosted = self._apply_recency_boost(fused_candidates)
-        metadata_boosted = self._apply_metadata_boost(query, recency_boosted)
-        fused = filter_retrieval_hits(
-            query=query,
-            hits=metadata_boosted,
-            min_score_threshold=self.settings.min_score_threshold,
-            min_relative_score=self.settings.min_relative_score,
-            min_query_token_overlap=self.settings.min_query_token_overlap,
-            top_k=top_k,
-        )
+        if use_dense:
+            lexical_weight, dense_weight = self._compute_query_weights(query)
+        else:
+            # BM25-only retrieval (dense disabled): keep fused scores on the same
+            # 0..1 scale the thresholds were tuned for.
+            lexical_weight, dense_weight = 1.0, 0.0
+
+        with stage_timer("fusion"), start_span("retrieval.fusion") as span:
+            fused_candidates = fuse_hits(
+                bm25_hits=bm25_hits,
+                dense_hits=dense_hits,
+                top_k=candidate_size,
+                method=self.settings.fusion_method,
+                lexical_weight=lexical_weight,
+                dense_weight=dense_weight,
+            )
+            span.set_attributes(
+                lexical_weight=lexical_weight,
+                dense_weight=dense_weight,
+                candidates=len(fused_candidates),
+            )
+        with stage_timer("boosts"), start_span("retrieval.boosts"):
+            recency_boosted = self._apply_recency_boost(fused_candidates)
+            metadata_boosted = self._apply_metadata_boost(query, recency_boosted)
+        with stage_timer("filter_retrieval_hits"), start_span("retrieval.filter") as span:
+            fused = filter_retrieval_hits(
+                query=query,
+                hits=metadata_boosted,
+                min_score_threshold=self.settings.min_score_threshold,
+                min_relative_score=self.settings.min_relative_score,
+                min_query_token_overlap=self.settings.min_query_token_overlap,
+                top_k=top_k,
+            )
+            span.set_attributes(
+                input=len(metadata_boosted),
+                output=len(fused),
+                selectivity=len(fused) / len(metadata_boosted) if metadata_boosted else 0.0,
+            )
         return fused, RetrievalDebug(
             bm25_hits=bm25_hits,
             dense_hits=dense_hits,
@@ -138,3 +172,55 @@ class RetrievalService:
             dense_weight=dense_weight,
             candidate_size=candidate_size,
         )
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+        use_dense: bool = True,
+        max_candidate_size: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[List[RetrievalHit], RetrievalDebug]:
+        # A deadline that expires mid-way leaves later retrievers empty; fusion and
+        # filtering still run on whatever candidates were found.
+        candidate_size = self._candidate_size(top_k, max_candidate_size)
+        with start_span("retrieval.retrieve", top_k=top_k, candidate_size=candidate_size, use_dense=use_dense) as root:
+            with stage_timer("bm25_search"), start_span("retrieval.bm25") as span:
+                bm25_hits = self.bm25.retrieve(query, candidate_size, department_filter, access_level, deadline)
+                span.set_attribute("candidates", len(bm25_hits))
+            dense_hits: List[RetrievalHit] = []
+            if use_dense:
+                with start_span("retrieval.dense") as span:
+                    dense_hits = self.dense.retrieve(query, candidate_size, department_filter, access_level, deadline)
+                    span.set_attribute("candidates", len(dense_hits))
+            hits, retrieval_debug = self._rank(query, top_k, candidate_size, bm25_hits, dense_hits, use_dense)
+            root.set_attribute("hits", len(hits))
+        return hits, retrieval_debug
+
+    def retrieve_many(
+        self,
+        requests: List[RetrievalRequest],
+        use_dense: bool = True,
+        max_candidate_size: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[tuple[List[RetrievalHit], RetrievalDebug]]:
+        if not requests:
+            return []
+        queries = [req.query for req in requests]
+        candidate_sizes = [self._candidate_size(req.top_k, max_candidate_size) for req in requests]
+        department_filters = [req.department_filter for req in requests]
+        access_levels = [req.access_level for req in requests]
+        with start_span("retrieval.retrieve_many", batch_size=len(requests), use_dense=use_dense):
+            with stage_timer("bm25_search"), start_span("retrieval.bm25"):
+                bm25_lists = self.bm25.retrieve_many(queries, candidate_sizes, department_filters, access_levels, deadline)
+            if use_dense:
+                with start_span("retrieval.dense"):
+                    dense_lists = self.dense.retrieve_many(queries, candidate_sizes, department_filters, access_levels, deadline)
+            else:
+                dense_lists = [[] for _ in requests]
+            return [
+                self._rank(req.query, req.top_k, candidate_size, bm25_hits, dense_hits, use_dense)
+                for req, candidate_size, bm25_hits, dense_hits in zip(requests, candidate_sizes, bm25_lists, dense_lists)
+            ]
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import multiprocessing
+import zlib
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.common.deadline import Deadline
+from src.common.metrics import stage_timer
+from src.common.schemas import DocumentChunk, RetrievalHit
+from src.indexing.bm25_index import BM25Index, BM25Postings
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+
+SHARD_EXECUTORS = ("process", "thread")
+
+# (global chunk index, score) pairs: shards return positions, not chunks, so
+# results cross the process boundary as a few numbers per hit.
+ShardHits = List[Tuple[int, float]]
+
+
+def shard_of(doc_id: str, n_shards: int) -> int:
+    # Stable across processes and runs (unlike hash()), and keeps every chunk
+    # of a document on the same shard.
+    return zlib.crc32(doc_id.encode("utf-8")) % n_shards
+
+
+@dataclass
+class ShardSpec:
+    shard_id: int
+    global_ids: np.ndarray
+    chunks: List[DocumentChunk]
+    postings: BM25Postings
+    embeddings: np.ndarray
+    embedding_model_name: str
+
+
+class IndexShard:
+    # One partition of the corpus. BM25 scores use the corpus-global idf and
+    # average document length carried in the postings, so a document scores
+    # the same on its shard as in the unsharded index.
+    def __init__(self, spec: ShardSpec) -> None:
+        self.shard_id = spec.shard_id
+        self.global_ids = spec.global_ids
+        self.bm25 = BM25Index.from_postings(spec.chunks, spec.postings)
+        self.dense = DenseIndex(spec.chunks, spec.embeddings, spec.embedding_model_name, search_backend="numpy")
+        # Both indices share spec.chunks, so a hit's chunk object identifies its row.
+        self._rows = {id(chunk): row for row, chunk in enumerate(spec.chunks)}
+
+    def ping(self) -> int:
+        return len(self.global_ids)
+
+    def _global_hits(self, hits: List[RetrievalHit]) -> ShardHits:
+        return [(int(self.global_ids[self._rows[id(hit.chunk_ref)]]), hit.score) for hit in hits]
+
+    def search_bm25(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+    ) -> List[ShardHits]:
+        results = self.bm25.search_many(queries, top_ks, department_filters, access_levels)
+        return [self._global_hits(hits) for hits in results]
+
+    def search_dense(
+        self,
+        query_vectors: np.ndarray,
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+    ) -> List[ShardHits]:
+        if not self.dense.chunks:
+            return [[] for _ in top_ks]
+        ranked = self.dense._ranked_candidates(query_vectors, [top_k * 4 for top_k in top_ks])
+        return [
+            self._global_hits(self.dense._collect_hits(idxs, vals, top_k, department_filter, access_level))
+            for (idxs, vals), top_k, department_filter, access_level in zip(ranked, top_ks, department_filters, access_levels)
+        ]
+
+
+# Worker-process side: each process serves exactly one shard, loaded once by
+# the first task its pool runs.
+_SHARD: IndexShard | None = None
+
+
+def _init_shard(spec: ShardSpec) -> None:
+    global _SHARD
+    _SHARD = IndexShard(spec)
+
+
+def _shard_call(method: str, *args) -> List[ShardHits]:
+    return getattr(_SHARD, method)(*args)
+
+
+class _InlineShard:
+    # Same call surface as a process-backed shard, run on a local thread.
+    def __init__(self, spec: ShardSpec) -> None:
+        self.shard = IndexShard(spec)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shard-{spec.shard_id}")
+
+    def submit(self, method: str, *args) -> Future:
+        return self.executor.submit(getattr(self.shard, method), *args)
+
+    def warm(self) -> Future:
+        return self.submit("ping")
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ProcessShard:
+    def __init__(self, spec: ShardSpec) -> None:
+        # spawn, not fork: the serving process runs background threads
+        # (batch scheduler, log writers) that fork would copy mid-state. The
+        # spec goes out as the first task rather than as initargs, which the
+        # executor would keep for its lifetime: once the shard process has
+        # loaded it, this process holds no copy of the partition. Submitting
+        # also starts the process now instead of on the first query.
+        self.executor: Executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self._loaded = self.executor.submit(_init_shard, spec)
+
+    def submit(self, method: str, *args) -> Future:
+        return self.executor.submit(_shard_call, method, *args)
+
+    def warm(self) -> Future:
+        self._loaded.result()
+        return self.submit("ping")
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ShardCoordinator:
+    # Scatter-gather over N document-partitioned shards. Every query is sent to
+    # all shards, each returns its own filtered top-k, and the coordinator keeps
+    # the best top-k overall; fusion, boosts and guardrails then run centrally
+    # on the merged lists exactly as for an unsharded index. Query embeddings
+    # are computed once here and shipped to the shards.
+    def __init__(
+        self,
+        bm25_index: BM25Index,
+        dense_index: DenseIndex,
+        backend: EmbeddingBackend,
+        n_shards: int,
+        executor: str = "process",
+    ) -> None:
+        # Only the chunk list is kept here, to turn merged positions back into
+        # chunks; the arrays live in the shards, so the caller should drop
+        # its indices once the coordinator is built.
+        if executor not in SHARD_EXECUTORS:
+            raise ValueError(f"Unknown shard executor: {executor}")
+        self.chunks = dense_index.chunks
+        self.embedding_dim = int(dense_index.embeddings.shape[1])
+        self.backend = backend
+        self.n_shards = max(1, n_shards)
+        postings = BM25Postings.from_index(bm25_index)
+        assignments = np.array([shard_of(chunk.doc_id, self.n_shards) for chunk in self.chunks], dtype=np.int64)
+        shard_cls = _ProcessShard if executor == "process" else _InlineShard
+        self.shards = []
+        self.shard_sizes: List[int] = []
+        for shard_id in range(self.n_shards):
+            global_ids = np.flatnonzero(assignments == shard_id)
+            spec = ShardSpec(
+                shard_id=shard_id,
+                global_ids=global_ids,
+                chunks=[self.chunks[i] for i in global_ids],
+                postings=postings.partition(global_ids),
+                embeddings=np.ascontiguousarray(dense_index.embeddings[global_ids]),
+                embedding_model_name=dense_index.embedding_model_name,
+            )
+            self.shards.append(shard_cls(spec))
+            self.shard_sizes.append(len(global_ids))
+
+    def _gather(self, method: str, args: tuple, n_queries: int, deadline: Deadline | None, stage: str) -> List[List[ShardHits]]:
+        # Shards that miss the deadline are left out of the merge.
+        futures = [shard.submit(method, *args) for shard in self.shards]
+        timeout = deadline.remaining_s() if deadline is not None else None
+        done, _ = wait(futures, timeout=timeout)
+        if len(done) < len(futures) and deadline is not None:
+            deadline.exceeded(stage)
+        return [future.result() if future in done else [[] for _ in range(n_queries)] for future in futures]
+
+    def _merge(self, per_shard: List[List[ShardHits]], top_ks: List[int], source: str) -> List[List[RetrievalHit]]:
+        merged: List[List[RetrievalHit]] = []
+        for query_idx, top_k in enumerate(top_ks):
+            pairs = [pair for shard_results in per_shard for pair in shard_results[query_idx]]
+            pairs.sort(key=lambda pair: (-pair[1], pair[0]))
+            hits = []
+            for global_id, score in pairs[:top_k]:
+                hit = RetrievalHit(chunk_ref=self.chunks[global_id], retrieval_source=source, score=float(score))
+                if source == "bm25":
+                    hit.bm25_score = float(score)
+                else:
+                    hit.dense_score = float(score)
+                hits.append(hit)
+            merged.append(hits)
+        return merged
+
+    def search_bm25(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        if deadline is not None and deadline.exceeded("bm25"):
+            return [[] for _ in queries]
+        per_shard = self._gather("search_bm25", (queries, top_ks, department_filters, access_levels), len(queries), deadline, "bm25")
+        return self._merge(per_shard, top_ks, "bm25")
+
+    def search_dense(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        if deadline is not None and deadline.exceeded("dense_encode"):
+            return [[] for _ in queries]
+        with stage_timer("query_encode"):
+            query_vectors = self.backend.encode(queries)
+        if deadline is not None and deadline.exceeded("dense_search"):
+            return [[] for _ in queries]
+        with stage_timer("dense_search"):
+            per_shard = self._gather(
+                "search_dense", (query_vectors, top_ks, department_filters, access_levels), len(queries), deadline, "dense_search"
+            )
+        return self._merge(per_shard, top_ks, "dense")
+
+    def warm(self) -> None:
+        # Blocks until every shard has loaded its partition and answered a
+        # no-op call, so the first real query does not wait for a shard
+        # process to start.
+        for future in [shard.warm() for shard in self.shards]:
+            future.result()
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.shutdown()
+
+    def stats(self) -> Dict[str, float]:
+        payload: Dict[str, float] = {"shards": self.n_shards}
+        for shard_id, size in enumerate(self.shard_sizes):
+            payload[f"shard_{shard_id}_chunks"] = size
+        return payload
+
+
+class ShardedBM25Retriever:
+    # BM25Retriever interface over the coordinator. There is no in-process
+    # index behind it; the shards hold the postings.
+    def __init__(self, coordinator: ShardCoordinator) -> None:
+        self.coordinator = coordinator
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[RetrievalHit]:
+        return self.coordinator.search_bm25([query], [top_k], [department_filter], [access_level], deadline)[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        return self.coordinator.search_bm25(queries, top_ks, department_filters, access_levels, deadline)
+
+
+class ShardedDenseRetriever:
+    def __init__(self, coordinator: ShardCoordinator) -> None:
+        self.coordinator = coordinator
+        self.backend = coordinator.backend
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        department_filter: str | None = None,
+        access_level: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> List[RetrievalHit]:
+        return self.coordinator.search_dense([query], [top_k], [department_filter], [access_level], deadline)[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        department_filters: List[str | None],
+        access_levels: List[str | None],
+        deadline: Deadline | None = None,
+    ) -> List[List[RetrievalHit]]:
+        return self.coordinator.search_dense(queries, top_ks, department_filters, access_levels, deadline)
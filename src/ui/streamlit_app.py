@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import os
 
 import requests
@@ -18,6 +19,7 @@ with st.sidebar:
     department_filter = st.selectbox("Department", ["", "HR", "Engineering", "Security", "General"])
     access_level = st.selectbox("Access Level", ["public", "internal", "restricted"])
     debug = st.checkbox("Debug mode", value=True)
+    stream = st.checkbox("Stream answer", value=True)
 
 question = st.text_area("Ask a question", placeholder="Example: Chinh sach nghi phep hang nam cua cong ty la gi?")
 
@@ -32,14 +34,39 @@ if st.button("Ask"):
             "access_level": access_level,
             "debug": debug,
         }
-        resp = requests.post(f"{API_BASE_URL}/ask", json=payload, timeout=60)
-        if resp.status_code != 200:
-            st.error(f"Request failed: {resp.status_code} - {resp.text}")
+        data = None
+        if stream:
+            resp = requests.post(f"{API_BASE_URL}/ask/stream", json=payload, timeout=60, stream=True)
+            if resp.status_code != 200:
+                st.error(f"Request failed: {resp.status_code} - {resp.text}")
+            else:
+                st.subheader("Answer")
+                retrieval_status = st.empty()
+                answer_box = st.empty()
+                streamed = ""
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event["event"] == "retrieval":
+                        retrieval_status.caption(f"Retrieved {len(event['data']['hits'])} evidence chunks")
+                    elif event["event"] == "token":
+                        streamed += event["data"]["text"]
+                        answer_box.markdown(streamed)
+                    elif event["event"] == "answer":
+                        data = event["data"]
+                if data is not None:
+                    answer_box.write(data["answer"])
         else:
-            data = resp.json()
-            st.subheader("Answer")
-            st.write(data["answer"])
+            resp = requests.post(f"{API_BASE_URL}/ask", json=payload, timeout=60)
+            if resp.status_code != 200:
+                st.error(f"Request failed: {resp.status_code} - {resp.text}")
+            else:
+                data = resp.json()
+                st.subheader("Answer")
+                st.write(data["answer"])
 
+        if data is not None:
             c1, c2 = st.columns(2)
             with c1:
                 st.metric("Confidence", data["confidence"])
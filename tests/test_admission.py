@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+
+from src.app.admission import AdmissionRejected, ConcurrencyLimiter
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+    def test_rejects_when_queue_full_and_times_out_waiters(self) -> None:
+        limiter = ConcurrencyLimiter("ask", max_concurrency=1, max_queue=1, queue_timeout_s=0.05, retry_after_s=2.0)
+        limiter.acquire()
+
+        errors = []
+
+        def waiter() -> None:
+            try:
+                limiter.acquire()
+            except AdmissionRejected as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        deadline = time.monotonic() + 1.0
+        while limiter.stats()["queue_depth"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        with self.assertRaises(AdmissionRejected) as ctx:
+            limiter.acquire()
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.retry_after_s, 2.0)
+
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].status_code, 503)
+
+        stats = limiter.stats()
+        self.assertEqual(stats["rejected_queue_full"], 1)
+        self.assertEqual(stats["rejected_timeout"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_waiter_is_admitted_when_slot_frees(self) -> None:
+        limiter = ConcurrencyLimiter("search", max_concurrency=1, max_queue=4, queue_timeout_s=2.0, retry_after_s=1.0)
+        limiter.acquire()
+        admitted = threading.Event()
+
+        def waiter() -> None:
+            with limiter.admit():
+                admitted.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.02)
+        self.assertFalse(admitted.is_set())
+        limiter.release()
+        thread.join()
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(limiter.stats()["admitted"], 2)
+        self.assertEqual(limiter.stats()["active"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import dataclasses
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.common.schemas import AnswerPackage, DocumentChunk, RetrievalHit
+from src.config.settings import load_settings
+from src.rag.answer_cache import AnswerCache, settings_fingerprint
+from src.rag.answerer import RAGAnswerer
+from src.rag.local_llm import LocalLLM
+
+
+def _hit(chunk_id: str) -> RetrievalHit:
+    chunk = DocumentChunk(
+        doc_id="d1",
+        chunk_id=chunk_id,
+        text="Nhan vien duoc nghi phep 12 ngay moi nam.",
+        title="hr leave internal",
+        section_path="HR > Leave",
+        department="HR",
+        updated_at="1970-01-01",
+        access_level="internal",
+    )
+    return RetrievalHit(chunk_ref=chunk, retrieval_source="hybrid", score=0.9, fused_score=0.9)
+
+
+def _package(text: str) -> AnswerPackage:
+    return AnswerPackage(answer_text=text, citations=[], confidence="Low", status="ANSWERED")
+
+
+class TestAnswerCache(unittest.TestCase):
+    def test_lru_eviction_and_whitespace_normalized_key(self) -> None:
+        cache = AnswerCache(max_entries=2, index_version="v1")
+        k1 = cache.make_key("nghi  phep?", [_hit("c1")], "ctx", debug=False)
+        self.assertEqual(k1, cache.make_key(" nghi phep? ", [_hit("c1")], "ctx", debug=False))
+        self.assertNotEqual(k1, cache.make_key("nghi phep?", [_hit("c2")], "ctx", debug=False))
+
+        cache.put("a", _package("A"))
+        cache.put("b", _package("B"))
+        self.assertEqual(cache.get("a").answer_text, "A")
+        cache.put("c", _package("C"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_sqlite_tier_survives_restart_and_drops_old_index_version(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = Path(tmp_dir) / "answers.sqlite3"
+            first = AnswerCache(max_entries=4, index_version="v1", db_path=db_path)
+            first.put("k", _package("cached"))
+
+            reopened = AnswerCache(max_entries=4, index_version="v1", db_path=db_path)
+            self.assertEqual(reopened.get("k").answer_text, "cached")
+
+            rebuilt = AnswerCache(max_entries=4, index_version="v2", db_path=db_path)
+            self.assertIsNone(rebuilt.get("k"))
+
+    def test_cached_package_keeps_guardrail_signals(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = Path(tmp_dir) / "answers.sqlite3"
+            package = _package("cached")
+            package.signals = {"top_score": 0.9, "citation_coverage": 1.0}
+            AnswerCache(max_entries=4, index_version="v1", db_path=db_path).put("k", package)
+            reopened = AnswerCache(max_entries=4, index_version="v1", db_path=db_path)
+            self.assertEqual(reopened.get("k").signals, package.signals)
+
+    def test_fingerprint_ignores_serving_settings(self) -> None:
+        settings = load_settings("config/default.yaml")
+        fingerprint = settings_fingerprint(settings)
+        tuned = dataclasses.replace(settings, admission_ask_max_concurrency=99, tracing_enabled=not settings.tracing_enabled)
+        self.assertEqual(settings_fingerprint(tuned), fingerprint)
+        stricter = dataclasses.replace(settings, min_citation_coverage=settings.min_citation_coverage + 0.1)
+        self.assertNotEqual(settings_fingerprint(stricter), fingerprint)
+
+    def test_answerer_serves_repeated_question_from_cache(self) -> None:
+        answerer = RAGAnswerer(load_settings("config/default.yaml"))
+        first = answerer.answer("Nhan vien duoc nghi phep bao nhieu ngay?", [_hit("c1")])
+        first.debug["mutated"] = True
+        second = answerer.answer("Nhan vien duoc nghi phep bao nhieu ngay?", [_hit("c1")])
+        self.assertEqual(first.answer_text, second.answer_text)
+        self.assertNotIn("mutated", second.debug)
+        self.assertEqual(answerer.cache.stats()["hits"], 1)
+
+    def test_degraded_answers_are_not_cached(self) -> None:
+        answerer = RAGAnswerer(load_settings("config/default.yaml"))
+        answerer.answer("Nhan vien duoc nghi phep bao nhieu ngay?", [_hit("c1")], degraded=True)
+        self.assertEqual(answerer.cache.stats()["entries"], 0)
+        answerer.answer("Nhan vien duoc nghi phep bao nhieu ngay?", [_hit("c1")])
+        self.assertEqual(answerer.cache.stats()["entries"], 1)
+
+    def test_fallback_answers_are_not_cached(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        llm = LocalLLM(backend="http", model_name="none", http_url=f"http://127.0.0.1:{port}", http_timeout_s=1.0, http_retries=0)
+        if llm.backend != "http":
+            self.skipTest("http client dependencies not installed")
+        answerer = RAGAnswerer(load_settings("config/default.yaml"), llm=llm)
+        for _ in range(2):
+            package = answerer.answer("Nhan vien duoc nghi phep bao nhieu ngay?", [_hit("c1")])
+            self.assertTrue(package.fallback)
+        self.assertEqual(llm.http_fallbacks, 2)
+        self.assertEqual(answerer.cache.stats()["hits"], 0)
+        self.assertEqual(answerer.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
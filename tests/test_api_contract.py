@@ -1,4 +1,6 @@
+import asyncio
 import importlib.util
+import json
 import os
 import tempfile
 import unittest
@@ -12,7 +14,7 @@ class TestAPIContract(unittest.TestCase):
     def test_health_search_ask_contract(self) -> None:
         from fastapi.testclient import TestClient
 
-        from src.api.app import create_app
+        from src.api.app import create_app, get_service
         from src.config.settings import load_settings
         from src.indexing.build_indices import build_all_indices
         from src.ingestion.pipeline import ingest_and_chunk
@@ -54,6 +56,13 @@ models:
 guardrails:
   min_score_threshold: 0.1
   min_citation_coverage: 1.0
+slow_query_log:
+  stage_ms:
+    bm25_search: 0
+  path: \"{root / 'slow.jsonl'}\"
+tracing:
+  enabled: true
+  path: \"{root / 'spans.jsonl'}\"
 """,
                 encoding="utf-8",
             )
@@ -63,13 +72,24 @@ guardrails:
             build_all_indices(settings)
 
             os.environ["APP_CONFIG_PATH"] = str(cfg)
+            get_service.cache_clear()
             app = create_app()
             client = TestClient(app)
 
             h = client.get("/health")
             self.assertEqual(h.status_code, 200)
+            self.assertRegex(h.headers["X-Trace-Id"], r"^[0-9a-f]{32}$")
+            traced = client.get("/health", headers={"X-Trace-Id": "b" * 32})
+            self.assertEqual(traced.headers["X-Trace-Id"], "b" * 32)
             self.assertIn("indices_loaded", h.json())
 
+            self.assertEqual(client.get("/health/live").status_code, 200)
+            ready = client.get("/health/ready")
+            self.assertEqual(ready.status_code, 200)
+            self.assertTrue(ready.json()["indices_loaded"])
+            self.assertEqual(ready.json()["llm_state"], "ready")
+            self.assertIn("bm25", ready.json()["load_durations_s"])
+
             s = client.post("/search", json={"query": "onboarding", "top_k": 3})
             self.assertEqual(s.status_code, 200)
             self.assertIn("hits", s.json())
@@ -78,6 +98,121 @@ guardrails:
             self.assertEqual(a.status_code, 200)
             self.assertIn("answer", a.json())
             self.assertIn("status", a.json())
+            self.assertIsNone(a.json()["degraded"])
+            self.assertIsNone(a.json()["timed_out"])
+            get_service().slow_query_log.flush()
+            slow = [json.loads(line) for line in (root / "slow.jsonl").read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(slow[-1]["endpoint"], "ask")
+            self.assertEqual(slow[-1]["reasons"], ["bm25_search"])
+            self.assertIn("bm25_search", slow[-1]["stage_ms"])
+            self.assertIn("fusion", slow[-1]["retrieval"])
+            self.assertIn("top_relevance", slow[-1]["answer"]["signals"])
+
+            st = client.post("/ask/stream", json={"question": "Onboarding can hoan thanh khi nao?", "top_k": 3})
+            self.assertEqual(st.status_code, 200)
+            events = [json.loads(line) for line in st.text.splitlines() if line.strip()]
+            self.assertEqual(events[0]["event"], "retrieval")
+            self.assertIn("hits", events[0]["data"])
+            self.assertEqual(events[-1]["event"], "answer")
+            self.assertEqual(events[-1]["data"]["status"], a.json()["status"])
+            self.assertEqual(events[-1]["data"]["answer"], a.json()["answer"])
+            # The request and qa.ask spans cover the streamed body's retrieval.
+            from src.common.tracing import get_tracer
+
+            get_tracer().exporter.flush()
+            spans = [json.loads(line) for line in (root / "spans.jsonl").read_text(encoding="utf-8").splitlines()]
+            trace = [span for span in spans if span["trace_id"] == st.headers["X-Trace-Id"]]
+            by_name = {span["name"]: span for span in trace}
+            request_span, qa_span = by_name["POST /ask/stream"], by_name["qa.ask"]
+            self.assertEqual(qa_span["parent_id"], request_span["span_id"])
+            self.assertEqual(by_name["retrieval.retrieve"]["parent_id"], qa_span["span_id"])
+            self.assertGreaterEqual(request_span["duration_ms"], qa_span["duration_ms"])
+
+            sb = client.post(
+                "/search/batch",
+                json={"requests": [{"query": "onboarding", "top_k": 3}, {"query": "checklist 7 ngay", "top_k": 2}]},
+            )
+            self.assertEqual(sb.status_code, 200)
+            batch_results = sb.json()["results"]
+            self.assertEqual([item["index"] for item in batch_results], [0, 1])
+            self.assertEqual(
+                [h["chunk_id"] for h in batch_results[0]["result"]["hits"]],
+                [h["chunk_id"] for h in s.json()["hits"]],
+            )
+            for single, batched in zip(s.json()["hits"], batch_results[0]["result"]["hits"]):
+                self.assertAlmostEqual(single["score"], batched["score"], places=5)
+
+            ab = client.post(
+                "/ask/batch",
+                json={"requests": [{"question": "Onboarding can hoan thanh khi nao?", "top_k": 3}, {"question": "Onboarding?", "top_k": 3}]},
+            )
+            self.assertEqual(ab.status_code, 200)
+            ask_results = ab.json()["results"]
+            self.assertEqual(len(ask_results), 2)
+            self.assertIsNone(ask_results[0]["error"])
+            self.assertEqual(ask_results[0]["result"]["answer"], a.json()["answer"])
+            self.assertEqual(ask_results[0]["result"]["status"], a.json()["status"])
+
+            self.assertEqual(client.post("/search/batch", json={"requests": []}).status_code, 422)
+
+            metrics = client.get("/metrics")
+            self.assertEqual(metrics.status_code, 200)
+            self.assertTrue(metrics.headers["content-type"].startswith("text/plain"))
+            for stage in ("bm25_search", "query_encode", "dense_search", "fusion", "boosts", "filter_retrieval_hits", "llm_generation", "guardrails"):
+                self.assertIn(f'rag_stage_duration_seconds_count{{stage="{stage}"}}', metrics.text)
+            self.assertIn("rag_answers_total{", metrics.text)
+            self.assertIn('rag_index_size{index="bm25",unit="chunks"}', metrics.text)
+            self.assertEqual(client.post("/admin/profile", json={"seconds": 0.01}).status_code, 404)
+            self.assertEqual(client.post("/admin/reload").status_code, 403)
+
+            self.assertIn("ask", client.get("/stats").json()["admission"])
+            limiter = get_service().admission.limiters["ask"]
+            limiter.max_queue = 0
+            for _ in range(limiter.max_concurrency):
+                limiter.acquire()
+            try:
+                rejected = client.post("/ask", json={"question": "Onboarding?", "top_k": 3})
+            finally:
+                for _ in range(limiter.max_concurrency):
+                    limiter.release()
+            self.assertEqual(rejected.status_code, 429)
+            self.assertEqual(rejected.headers["Retry-After"], "1")
+            self.assertEqual(client.get("/stats").json()["admission"]["ask"]["rejected_queue_full"], 1)
+
+            # A stream the client abandons before the body starts still gives
+            # its admission slot back.
+            body = json.dumps({"question": "Onboarding can hoan thanh khi nao?", "top_k": 3}).encode("utf-8")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0", "spec_version": "2.4"},
+                "http_version": "1.1",
+                "method": "POST",
+                "scheme": "http",
+                "path": "/ask/stream",
+                "raw_path": b"/ask/stream",
+                "query_string": b"",
+                "root_path": "",
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                "client": ("testclient", 50000),
+                "server": ("testserver", 80),
+            }
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await asyncio.sleep(0.01)
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    raise OSError("client went away")
+
+            try:
+                asyncio.run(app(scope, receive, send))
+            except Exception:
+                pass
+            self.assertEqual(get_service().admission.stats()["ask"]["active"], 0)
 
 
 if __name__ == "__main__":
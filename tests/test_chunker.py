@@ -1,6 +1,10 @@
+import tempfile
 import unittest
+from pathlib import Path
 
-from src.indexing.chunker import build_chunks, extract_section_blocks
+from src.indexing.chunker import build_chunks, extract_section_blocks, iter_chunks
+from src.ingestion.cleaning import iter_normalized_lines, normalize_text
+from src.ingestion.parsers import parse_document, stream_document
 
 
 class TestChunker(unittest.TestCase):
@@ -35,6 +39,39 @@ class TestChunker(unittest.TestCase):
         )
         self.assertEqual([c.chunk_id for c in chunks1], [c.chunk_id for c in chunks2])
 
+    def test_streamed_pages_chunk_like_the_joined_text(self) -> None:
+        pages = [
+            "# So tay\n## Nghi phep\n" + " ".join(f"ngay{i}" for i in range(70)),
+            "  tiep theo\x00 cua   trang 1\n\n## Lam them\n" + " ".join(f"gio{i}" for i in range(45)),
+            "Cafe\u0301 cuoi trang\r\n",
+        ]
+        kwargs = dict(
+            doc_id="handbook",
+            title="Handbook",
+            department="HR",
+            updated_at="2024-01-01",
+            access_level="internal",
+            chunk_size_tokens=30,
+            overlap_tokens=5,
+        )
+        normalized = normalize_text("\n".join(pages))
+        self.assertEqual(list(iter_normalized_lines(pages)), normalized.splitlines())
+        expected = build_chunks(text=normalized, **kwargs)
+        streamed = list(iter_chunks(lines=iter_normalized_lines(iter(pages)), **kwargs))
+        self.assertEqual([c.to_dict() for c in expected], [c.to_dict() for c in streamed])
+        self.assertEqual({c.section_path for c in streamed}, {"So tay > Nghi phep", "So tay > Lam them"})
+
+    def test_stream_document_yields_lines(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "hr_leave_policy.md"
+            path.write_text("# HR\n## Leave\nNhan vien nghi phep 12 ngay.\n", encoding="utf-8")
+            stream = stream_document(path)
+            parsed = parse_document(path)
+            self.assertEqual((stream.doc_id, stream.title), (parsed.doc_id, parsed.title))
+            self.assertEqual(list(stream.blocks), ["# HR\n", "## Leave\n", "Nhan vien nghi phep 12 ngay.\n"])
+            with self.assertRaises(ValueError):
+                stream_document(Path(tmp_dir) / "slides.pptx")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,66 @@
+import time
+import unittest
+
+from src.common.deadline import Deadline
+from src.common.schemas import DocumentChunk
+from src.indexing.bm25_index import BM25Index
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+from src.retrieval.bm25_retriever import BM25Retriever
+from src.retrieval.dense_retriever import DenseRetriever
+
+
+def _chunks():
+    return [
+        DocumentChunk(
+            doc_id="hr",
+            chunk_id="c1",
+            text="Nhan vien duoc nghi phep 12 ngay moi nam.",
+            title="hr leave",
+            section_path="HR > Leave",
+            department="HR",
+            updated_at="1970-01-01",
+            access_level="internal",
+        ),
+        DocumentChunk(
+            doc_id="finance",
+            chunk_id="c2",
+            text="Chi phi can hoa don hop le.",
+            title="finance expense",
+            section_path="Finance > Expense",
+            department="Finance",
+            updated_at="1970-01-01",
+            access_level="internal",
+        ),
+    ]
+
+
+class TestDeadline(unittest.TestCase):
+    def test_unbounded_deadline_never_expires(self) -> None:
+        deadline = Deadline.from_timeout_ms(None)
+        self.assertIsNone(deadline.remaining_s())
+        self.assertFalse(deadline.exceeded("bm25"))
+        self.assertIsNone(deadline.timed_out_stage)
+        self.assertIsNone(Deadline.from_timeout_ms(0).expires_at)
+
+    def test_first_expired_stage_is_recorded(self) -> None:
+        deadline = Deadline.from_timeout_ms(1)
+        time.sleep(0.005)
+        self.assertTrue(deadline.exceeded("dense_encode"))
+        self.assertTrue(deadline.exceeded("generation"))
+        self.assertEqual(deadline.timed_out_stage, "dense_encode")
+        self.assertEqual(deadline.remaining_s(), 0.0)
+
+    def test_retrievers_return_empty_once_expired(self) -> None:
+        backend = EmbeddingBackend("hash://64")
+        bm25 = BM25Retriever(BM25Index(_chunks()))
+        dense = DenseRetriever(DenseIndex.build(_chunks(), backend), backend)
+        self.assertTrue(dense.retrieve("nghi phep", 3, deadline=Deadline(60.0)))
+
+        expired = Deadline(0.0)
+        self.assertEqual(dense.retrieve("nghi phep", 3, deadline=expired), [])
+        self.assertEqual(bm25.retrieve("nghi phep", 3, deadline=expired), [])
+        self.assertEqual(expired.timed_out_stage, "dense_encode")
+
+
+if __name__ == "__main__":
+    unittest.main()
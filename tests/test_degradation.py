@@ -0,0 +1,78 @@
+import dataclasses
+import unittest
+
+from src.app.degradation import DegradationPolicy
+from src.config.settings import load_settings
+from src.eval.run_eval import eval_settings
+
+
+class TestDegradationPolicy(unittest.TestCase):
+    def _policy(self, depth: dict) -> DegradationPolicy:
+        settings = dataclasses.replace(
+            load_settings("config/default.yaml"),
+            degradation_queue_depths=(2, 4, 6),
+            degradation_latency_ms=(100.0, 200.0, 300.0),
+            degradation_latency_window=4,
+            degradation_reduced_candidate_size=7,
+        )
+        return DegradationPolicy(settings, lambda endpoint: depth["value"])
+
+    def test_queue_depth_walks_the_ladder(self) -> None:
+        depth = {"value": 0}
+        policy = self._policy(depth)
+
+        decision = policy.decide("ask")
+        self.assertIsNone(decision.name)
+        self.assertFalse(decision.use_fallback_llm)
+        self.assertTrue(decision.use_dense)
+
+        depth["value"] = 4
+        decision = policy.decide("ask")
+        self.assertEqual(decision.level, 2)
+        self.assertEqual(decision.name, "bm25_only")
+        self.assertTrue(decision.use_fallback_llm)
+        self.assertFalse(decision.use_dense)
+        self.assertIsNone(decision.max_candidate_size)
+
+        depth["value"] = 9
+        decision = policy.decide("ask")
+        self.assertEqual(decision.name, "reduced_candidates")
+        self.assertEqual(decision.max_candidate_size, 7)
+
+        stats = policy.stats()
+        self.assertEqual(stats["requests_bm25_only"], 1)
+        self.assertEqual(stats["requests_reduced_candidates"], 1)
+        self.assertEqual(stats["transitions"], 2)
+
+    def test_recent_latency_triggers_degradation(self) -> None:
+        policy = self._policy({"value": 0})
+        for _ in range(4):
+            policy.record_latency("ask", 0.15)
+        self.assertEqual(policy.decide("ask").name, "heuristic_llm")
+        for _ in range(4):
+            policy.record_latency("ask", 0.01)
+        self.assertIsNone(policy.decide("ask").name)
+
+    def test_ask_latency_does_not_degrade_search(self) -> None:
+        policy = self._policy({"value": 0})
+        for _ in range(4):
+            policy.record_latency("ask", 0.25)
+            policy.record_latency("search", 0.01)
+        self.assertEqual(policy.decide("ask").name, "bm25_only")
+        self.assertIsNone(policy.decide("search").name)
+
+        stats = policy.stats()
+        self.assertEqual(stats["level_ask"], 2)
+        self.assertEqual(stats["level_search"], 0)
+        self.assertEqual(stats["recent_p95_ms_ask"], 250.0)
+        self.assertEqual(stats["transitions"], 1)
+
+    def test_eval_runs_without_the_ladder(self) -> None:
+        policy = DegradationPolicy(eval_settings(load_settings("config/default.yaml")), lambda endpoint: 99)
+        for _ in range(10):
+            policy.record_latency("ask", 60.0)
+        self.assertEqual(policy.decide("ask").level, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -58,8 +58,9 @@ guardrails:
             )
 
             settings = load_settings(cfg)
-            chunks = ingest_and_chunk(settings)
-            self.assertGreater(len(chunks), 0)
+            report = ingest_and_chunk(settings)
+            self.assertGreater(report.chunks, 0)
+            self.assertEqual(report.failed, [])
             build_all_indices(settings)
 
             service = QAService(settings)
@@ -84,6 +85,60 @@ guardrails:
             )
             self.assertEqual(unsupported.status, "NOT_FOUND")
 
+    def test_transformers_backend_loads_in_background(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            raw = root / "raw"
+            raw.mkdir(parents=True, exist_ok=True)
+            (raw / "hr_policy_internal.md").write_text("# HR\n## Leave\nNhan vien duoc nghi phep 12 ngay moi nam.", encoding="utf-8")
+            cfg = root / "config.yaml"
+            cfg.write_text(
+                f"""
+app:
+  version: "0.1.0"
+paths:
+  raw_data_dir: "{raw}"
+  chunk_output_path: "{root / 'chunks.jsonl'}"
+  bm25_index_path: "{root / 'bm25.pkl'}"
+  dense_index_dir: "{root / 'dense'}"
+  eval_dataset_path: "{root / 'eval.jsonl'}"
+chunking:
+  chunk_size_tokens: 64
+  overlap_tokens: 10
+retrieval:
+  default_top_k: 5
+  fusion_method: "weighted"
+  lexical_weight: 0.5
+  dense_weight: 0.5
+  min_score_threshold: 0.1
+models:
+  embedding_model_name: "hash://128"
+  llm_backend: "transformers"
+  llm_model_name: "does-not-exist/model"
+  max_new_tokens: 64
+guardrails:
+  min_score_threshold: 0.1
+  min_citation_coverage: 1.0
+""",
+                encoding="utf-8",
+            )
+            settings = load_settings(cfg)
+            ingest_and_chunk(settings)
+            build_all_indices(settings)
+
+            service = QAService(settings)
+            self.assertTrue(service.readiness().ready)
+            ans = service.ask("Nhan vien duoc nghi phep bao nhieu ngay?", top_k=3, department_filter=None, access_level="internal")
+            self.assertIn(ans.status, {"ANSWERED", "NOT_FOUND"})
+
+            service._llm_loader.join(timeout=30)
+            readiness = service.readiness()
+            # The model cannot be loaded in the test environment, so the service
+            # reports the failure and keeps serving the heuristic backend.
+            self.assertEqual(readiness.llm_state, "failed")
+            self.assertEqual(readiness.llm_backend, "heuristic")
+            self.assertIn("llm", readiness.load_durations_s)
+
 
 if __name__ == "__main__":
     unittest.main()
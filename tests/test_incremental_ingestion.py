@@ -0,0 +1,120 @@
+import dataclasses
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from src.config.settings import load_settings
+from src.indexing.build_indices import build_all_indices, load_chunks
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+from src.ingestion import pipeline
+from src.ingestion.pipeline import ingest_and_chunk
+
+
+def _policy(topic: str, n: int) -> str:
+    return f"# {topic}\n## Rules\n" + " ".join(f"{topic} quy dinh so {i} ap dung cho nhan vien." for i in range(n))
+
+
+class TestIncrementalIngestion(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.raw = self.root / "raw"
+        self.raw.mkdir()
+        (self.raw / "hr_leave.md").write_text(_policy("leave", 30), encoding="utf-8")
+        (self.raw / "it_vpn.md").write_text(_policy("vpn", 20), encoding="utf-8")
+        (self.raw / "security").mkdir()
+        (self.raw / "security" / "password.md").write_text(_policy("password", 25), encoding="utf-8")
+        self.settings = dataclasses.replace(
+            load_settings("config/default.yaml"),
+            raw_data_dir=self.raw,
+            chunk_output_path=self.root / "chunks.jsonl",
+            index_store_dir=self.root / "indices",
+            embedding_model_name="hash://64",
+            chunk_size_tokens=40,
+            overlap_tokens=8,
+            ingestion_workers=1,
+            ingestion_report_path=None,
+            ingestion_manifest_path=self.root / "manifest.json",
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _full_run_chunks(self) -> bytes:
+        settings = dataclasses.replace(self.settings, chunk_output_path=self.root / "full.jsonl", ingestion_manifest_path=None)
+        report = ingest_and_chunk(settings)
+        self.assertIsNone(report.changes)
+        return settings.chunk_output_path.read_bytes()
+
+    def test_rerun_only_parses_changed_files(self) -> None:
+        first = ingest_and_chunk(self.settings)
+        self.assertEqual(first.changes.added, ["hr_leave.md", "it_vpn.md", "security/password.md"])
+        version = build_all_indices(self.settings, changes=first.changes).version
+
+        chunks_stat = self.settings.chunk_output_path.stat()
+        noop = ingest_and_chunk(self.settings)
+        self.assertTrue(noop.changes.is_empty)
+        self.assertEqual(noop.files, [])
+        self.assertEqual(noop.chunks, first.chunks)
+        self.assertEqual(self.settings.chunk_output_path.stat().st_mtime_ns, chunks_stat.st_mtime_ns)
+        self.assertEqual(build_all_indices(self.settings, changes=noop.changes).version, version)
+
+        # Same content with a new mtime is not re-parsed.
+        vpn = self.raw / "it_vpn.md"
+        os.utime(vpn, ns=(vpn.stat().st_atime_ns, vpn.stat().st_mtime_ns + 10_000_000))
+        touched = ingest_and_chunk(self.settings)
+        self.assertTrue(touched.changes.is_empty)
+        self.assertEqual(touched.files, [])
+
+        old_ids = {}
+        for chunk in load_chunks(self.settings):
+            old_ids.setdefault(chunk.doc_id, set()).add(chunk.chunk_id)
+        (self.raw / "hr_leave.md").write_text(_policy("leave", 35), encoding="utf-8")
+        (self.raw / "security" / "password.md").unlink()
+        (self.raw / "fin_expense.md").write_text(_policy("expense", 15), encoding="utf-8")
+
+        changed = ingest_and_chunk(self.settings)
+        self.assertEqual(changed.changes.added, ["fin_expense.md"])
+        self.assertEqual(changed.changes.modified, ["hr_leave.md"])
+        self.assertEqual(changed.changes.deleted, ["security/password.md"])
+        self.assertEqual(changed.changes.unchanged, ["it_vpn.md"])
+        self.assertEqual([Path(f.path).name for f in changed.files], ["fin_expense.md", "hr_leave.md"])
+        self.assertEqual(set(changed.changes.removed_chunk_ids), old_ids["hr_leave"] | old_ids["password"])
+        self.assertEqual(self.settings.chunk_output_path.read_bytes(), self._full_run_chunks())
+
+        location = build_all_indices(self.settings, changes=changed.changes)
+        self.assertNotEqual(location.version, version)
+        incremental = DenseIndex.load(location.dense_dir)
+        fresh = DenseIndex.build(load_chunks(self.settings), EmbeddingBackend("hash://64"))
+        self.assertEqual([c.chunk_id for c in incremental.chunks], [c.chunk_id for c in fresh.chunks])
+        np.testing.assert_allclose(incremental.embeddings, fresh.embeddings)
+
+    def test_file_edited_during_ingest_is_parsed_again(self) -> None:
+        vpn = self.raw / "it_vpn.md"
+        real_stream_document = pipeline.stream_document
+
+        def edit_then_stream(path):
+            if path == vpn:
+                vpn.write_text(_policy("vpn", 28), encoding="utf-8")
+            return real_stream_document(path)
+
+        with mock.patch.object(pipeline, "stream_document", side_effect=edit_then_stream):
+            ingest_and_chunk(self.settings)
+        rerun = ingest_and_chunk(self.settings)
+        self.assertEqual(rerun.changes.modified, ["it_vpn.md"])
+        self.assertEqual(self.settings.chunk_output_path.read_bytes(), self._full_run_chunks())
+
+    def test_changed_chunking_parameters_reparse_everything(self) -> None:
+        ingest_and_chunk(self.settings)
+        rechunked = ingest_and_chunk(dataclasses.replace(self.settings, chunk_size_tokens=30))
+        self.assertEqual(len(rechunked.changes.added), 3)
+        self.assertEqual(len(rechunked.files), 3)
+        self.assertEqual(len(ingest_and_chunk(self.settings, full=True).files), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.app.service import QAService
+from src.config.settings import load_settings
+from src.indexing.build_indices import build_all_indices, index_version
+from src.indexing.index_store import IndexStore
+from src.ingestion.pipeline import ingest_and_chunk
+
+
+def _write_config(root: Path, raw: Path) -> Path:
+    cfg = root / "config.yaml"
+    cfg.write_text(
+        f"""
+app:
+  version: "0.1.0"
+paths:
+  raw_data_dir: "{raw}"
+  chunk_output_path: "{root / 'chunks.jsonl'}"
+  bm25_index_path: "{root / 'bm25.pkl'}"
+  dense_index_dir: "{root / 'dense'}"
+  index_store_dir: "{root / 'indices'}"
+  eval_dataset_path: "{root / 'eval.jsonl'}"
+chunking:
+  chunk_size_tokens: 64
+  overlap_tokens: 10
+retrieval:
+  default_top_k: 5
+  fusion_method: "weighted"
+  lexical_weight: 0.5
+  dense_weight: 0.5
+  min_score_threshold: 0.1
+models:
+  embedding_model_name: "hash://128"
+  llm_backend: "heuristic"
+  llm_model_name: "none"
+  max_new_tokens: 64
+guardrails:
+  min_score_threshold: 0.1
+  min_citation_coverage: 1.0
+index:
+  keep_versions: 2
+""",
+        encoding="utf-8",
+    )
+    return cfg
+
+
+class TestIndexHotReload(unittest.TestCase):
+    def test_build_publishes_immutable_versions_and_prunes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            raw = root / "raw"
+            raw.mkdir()
+            (raw / "hr_policy.md").write_text("# HR\n## Leave\nNhan vien duoc nghi phep 12 ngay moi nam.", encoding="utf-8")
+            settings = load_settings(_write_config(root, raw))
+            ingest_and_chunk(settings)
+
+            versions = [build_all_indices(settings).version for _ in range(3)]
+            store = IndexStore(root / "indices")
+            self.assertEqual(store.current_version(), versions[-1])
+            self.assertEqual(index_version(settings), versions[-1])
+            self.assertEqual(store.versions(), sorted(versions)[-2:])
+            self.assertTrue(store.location(versions[-1]).bm25_path.exists())
+            self.assertFalse(settings.bm25_index_path.exists())
+
+    def test_reload_swaps_version_and_drains_old_generation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            raw = root / "raw"
+            raw.mkdir()
+            (raw / "hr_policy.md").write_text("# HR\n## Leave\nNhan vien duoc nghi phep 12 ngay moi nam.", encoding="utf-8")
+            settings = load_settings(_write_config(root, raw))
+            ingest_and_chunk(settings)
+            first = build_all_indices(settings)
+
+            service = QAService(settings)
+            self.assertEqual(service.indices.current.version, first.version)
+            self.assertEqual(service.indices.reload_now()["status"], "unchanged")
+
+            (raw / "it_vpn.md").write_text("# IT\n## VPN\nKet noi VPN bang ung dung GlobalProtect truoc khi truy cap.", encoding="utf-8")
+            ingest_and_chunk(settings)
+            second = build_all_indices(settings)
+
+            with service.indices.use() as pinned:
+                result = service.indices.reload_now()
+                self.assertEqual(result["status"], "reloaded")
+                self.assertEqual(result["version"], second.version)
+                # The in-flight request keeps the version it started on.
+                self.assertEqual(pinned.version, first.version)
+                self.assertIsNotNone(pinned.retrieval)
+                self.assertEqual(service.stats()["indices"]["draining_versions"], 1)
+            self.assertIsNone(pinned.retrieval)
+            self.assertEqual(service.stats()["indices"]["draining_versions"], 0)
+            self.assertEqual(service.answerer.cache.index_version, second.version)
+
+            payload = service.search("VPN GlobalProtect", top_k=3, department_filter=None, access_level=None)
+            self.assertIn("it_vpn", {hit["doc_id"] for hit in payload["hits"]})
+
+    def test_prune_keeps_versions_that_are_still_loaded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            raw = root / "raw"
+            raw.mkdir()
+            (raw / "hr_policy.md").write_text("# HR\n## Leave\nNhan vien duoc nghi phep 12 ngay moi nam.", encoding="utf-8")
+            settings = load_settings(_write_config(root, raw))
+            ingest_and_chunk(settings)
+            first = build_all_indices(settings)
+            service = QAService(settings)
+            store = IndexStore(root / "indices")
+
+            exited = subprocess.Popen([sys.executable, "-c", "pass"])
+            exited.wait()
+            stale = root / "indices" / "leases" / f"{first.version}.{exited.pid}.deadbeef"
+            stale.touch()
+
+            for _ in range(2):
+                build_all_indices(settings)
+            self.assertIn(first.version, store.versions())
+            self.assertFalse(stale.exists())
+
+            self.assertEqual(service.indices.reload_now()["status"], "reloaded")
+            build_all_indices(settings)
+            self.assertNotIn(first.version, store.versions())
+            self.assertEqual(store.leased_versions(), {service.indices.current.version})
+
+
+if __name__ == "__main__":
+    unittest.main()
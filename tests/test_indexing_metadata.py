@@ -2,6 +2,7 @@ import unittest
 
 from src.common.schemas import DocumentChunk
 from src.indexing.bm25_index import BM25Index
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
 
 
 class TestIndexingMetadata(unittest.TestCase):
@@ -44,6 +45,45 @@ class TestIndexingMetadata(unittest.TestCase):
         self.assertGreater(len(hits), 0)
         self.assertEqual(hits[0].chunk_ref.chunk_id, "c1")
 
+    def test_batched_search_matches_single_search(self) -> None:
+        chunks = [
+            DocumentChunk(
+                doc_id=f"doc{i}",
+                chunk_id=f"c{i}",
+                text=text,
+                title=f"title {i}",
+                section_path="Policy",
+                department="Engineering" if i % 2 else "Finance",
+                updated_at="1970-01-01",
+                access_level="restricted" if i == 3 else "internal",
+            )
+            for i, text in enumerate(
+                [
+                    "Chi phi can hoa don hop le.",
+                    "Pull request can reviewer phe duyet.",
+                    "Mat khau phai duoc thay dinh ky.",
+                    "Reviewer kiem tra mat khau trong code.",
+                ]
+            )
+        ]
+        queries = ["reviewer phe duyet", "mat khau", "hoa don chi phi"]
+        top_ks = [2, 3, 1]
+        departments = [None, "Engineering", None]
+        access_levels = ["internal", "internal", None]
+
+        bm25 = BM25Index(chunks)
+        backend = EmbeddingBackend("hash://64")
+        dense = DenseIndex.build(chunks, backend)
+        bm25_batch = bm25.search_many(queries, top_ks, departments, access_levels)
+        dense_batch = dense.search_many(queries, top_ks, backend, departments, access_levels)
+        for i, query in enumerate(queries):
+            single = bm25.search(query, top_ks[i], departments[i], access_levels[i])
+            self.assertEqual([h.chunk_ref.chunk_id for h in bm25_batch[i]], [h.chunk_ref.chunk_id for h in single])
+            for a, b in zip(bm25_batch[i], single):
+                self.assertAlmostEqual(a.score, b.score, places=4)
+            single = dense.search(query, top_ks[i], backend, departments[i], access_levels[i])
+            self.assertEqual([h.chunk_ref.chunk_id for h in dense_batch[i]], [h.chunk_ref.chunk_id for h in single])
+
 
 if __name__ == "__main__":
     unittest.main()
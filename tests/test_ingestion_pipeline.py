@@ -0,0 +1,61 @@
+import dataclasses
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.common.io import read_jsonl
+from src.config.settings import load_settings
+from src.ingestion.pipeline import ingest_and_chunk
+
+
+class TestIngestionPipeline(unittest.TestCase):
+    def _write_corpus(self, raw: Path) -> None:
+        for idx in range(6):
+            (raw / f"hr_policy_{idx}_internal.md").write_text(
+                f"# HR\n## Leave {idx}\n" + " ".join(f"nghi phep ngay {idx} quy dinh {n}" for n in range(60)),
+                encoding="utf-8",
+            )
+        (raw / "security_handbook.pdf").write_bytes(b"%PDF-1.4 not really a pdf")
+        (raw / "empty.txt").write_text("   \n", encoding="utf-8")
+
+    def _settings(self, root: Path, workers: int, name: str):
+        return dataclasses.replace(
+            load_settings("config/default.yaml"),
+            raw_data_dir=root / "raw",
+            chunk_output_path=root / name / "chunks.jsonl",
+            chunk_size_tokens=40,
+            overlap_tokens=8,
+            ingestion_workers=workers,
+            ingestion_max_pending=2,
+            ingestion_report_path=root / name / "report.jsonl",
+            ingestion_manifest_path=None,
+        )
+
+    def test_parallel_run_matches_serial_and_reports_failures(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "raw").mkdir()
+            self._write_corpus(root / "raw")
+
+            serial = ingest_and_chunk(self._settings(root, 1, "serial"))
+            parallel = ingest_and_chunk(self._settings(root, 2, "parallel"))
+
+            serial_bytes = (root / "serial" / "chunks.jsonl").read_bytes()
+            self.assertEqual(serial_bytes, (root / "parallel" / "chunks.jsonl").read_bytes())
+            self.assertEqual(serial.chunks, len(read_jsonl(root / "serial" / "chunks.jsonl")))
+            self.assertEqual(serial.chunks, parallel.chunks)
+            self.assertEqual([f.path for f in serial.files], [f.path for f in parallel.files])
+            self.assertEqual([f.path for f in serial.files], sorted(f.path for f in serial.files))
+
+            self.assertEqual([Path(f.path).name for f in parallel.failed], ["security_handbook.pdf"])
+            rows = read_jsonl(root / "parallel" / "report.jsonl")
+            self.assertEqual(len(rows), 8)
+            failed = next(row for row in rows if row["doc_id"] == "security_handbook")
+            self.assertEqual(failed["chunks"], 0)
+            self.assertTrue(failed["error"])
+            self.assertFalse(list((root / "parallel").glob(".*.tmp")))
+            self.assertFalse(list((root / "parallel").glob(".*.parts.*")))
+
+
+if __name__ == "__main__":
+    unittest.main()
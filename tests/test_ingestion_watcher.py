@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.app.service import QAService
+from src.config.settings import load_settings
+from src.ingestion.watcher import IngestionWatcher, freshness_lag_s, read_ingestion_status
+
+
+def _write_config(root: Path, raw: Path) -> Path:
+    cfg = root / "config.yaml"
+    cfg.write_text(
+        f"""
+app:
+  version: "0.1.0"
+paths:
+  raw_data_dir: "{raw}"
+  chunk_output_path: "{root / 'chunks.jsonl'}"
+  bm25_index_path: "{root / 'bm25.pkl'}"
+  dense_index_dir: "{root / 'dense'}"
+  index_store_dir: "{root / 'indices'}"
+  eval_dataset_path: "{root / 'eval.jsonl'}"
+chunking:
+  chunk_size_tokens: 64
+  overlap_tokens: 10
+ingestion:
+  workers: 1
+  manifest_path: "{root / 'manifest.json'}"
+  status_path: "{root / 'status.json'}"
+  debounce_s: 0
+retrieval:
+  default_top_k: 5
+  fusion_method: "weighted"
+  lexical_weight: 0.5
+  dense_weight: 0.5
+  min_score_threshold: 0.1
+models:
+  embedding_model_name: "hash://128"
+  llm_backend: "heuristic"
+  llm_model_name: "none"
+  max_new_tokens: 64
+guardrails:
+  min_score_threshold: 0.1
+  min_citation_coverage: 1.0
+""",
+        encoding="utf-8",
+    )
+    return cfg
+
+
+class TestIngestionWatcher(unittest.TestCase):
+    def test_freshness_lag(self) -> None:
+        self.assertIsNone(freshness_lag_s(None, "v1"))
+        self.assertEqual(freshness_lag_s({"pending_since": None, "last_version": "v1", "last_detected_at": 90.0}, "v1", now=100.0), 0.0)
+        self.assertEqual(freshness_lag_s({"pending_since": 95.0, "last_version": "v1"}, "v1", now=100.0), 5.0)
+        # Published but not reloaded by this process yet.
+        self.assertEqual(freshness_lag_s({"pending_since": None, "last_version": "v2", "last_detected_at": 90.0}, "v1", now=100.0), 10.0)
+
+    def test_changes_are_published_and_reloaded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            raw = root / "raw"
+            raw.mkdir()
+            (raw / "hr_policy.md").write_text("# HR\n## Leave\nNhan vien duoc nghi phep 12 ngay moi nam.", encoding="utf-8")
+            settings = load_settings(_write_config(root, raw))
+
+            watcher = IngestionWatcher(settings)
+            first = watcher.run_once()
+            self.assertEqual(read_ingestion_status(settings.ingestion_status_path)["last_version"], first.version)
+            self.assertFalse(watcher.poll())
+
+            service = QAService(settings)
+            watcher.on_publish = lambda location: service.indices.reload_now()
+            self.assertEqual(service.health().freshness_lag_s, 0.0)
+
+            (raw / "it_vpn.md").write_text("# IT\n## VPN\nKet noi VPN bang ung dung GlobalProtect truoc khi truy cap.", encoding="utf-8")
+            self.assertFalse(watcher.poll())
+            status = read_ingestion_status(settings.ingestion_status_path)
+            self.assertIsNotNone(status["pending_since"])
+            self.assertGreaterEqual(service.health().freshness_lag_s, 0.0)
+
+            self.assertTrue(watcher.poll())
+            health = service.health()
+            self.assertNotEqual(health.index_version, first.version)
+            self.assertEqual(health.index_version, watcher.last_version)
+            self.assertEqual(health.freshness_lag_s, 0.0)
+            self.assertGreaterEqual(watcher.last_lag_s, 0.0)
+            payload = service.search("VPN GlobalProtect", top_k=3, department_filter=None, access_level=None)
+            self.assertIn("it_vpn", {hit["doc_id"] for hit in payload["hits"]})
+
+            (raw / "it_vpn.md").unlink()
+            self.assertFalse(watcher.poll())
+            self.assertTrue(watcher.poll())
+            payload = service.search("VPN GlobalProtect", top_k=3, department_filter=None, access_level=None)
+            self.assertNotIn("it_vpn", {hit["doc_id"] for hit in payload["hits"]})
+            self.assertEqual(watcher.runs, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
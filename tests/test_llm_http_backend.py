@@ -0,0 +1,143 @@
+import importlib.util
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.common.schemas import DocumentChunk, RetrievalHit
+from src.rag.local_llm import LocalLLM
+
+SERVER_DEPS_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("fastapi", "uvicorn", "requests"))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _hit() -> RetrievalHit:
+    chunk = DocumentChunk(
+        doc_id="hr_leave",
+        chunk_id="hr_leave-0-abc",
+        text="Nhan vien duoc nghi phep 12 ngay moi nam. Can bao truoc 3 ngay.",
+        title="hr leave internal",
+        section_path="HR > Leave",
+        department="HR",
+        updated_at="2024-01-01",
+        access_level="internal",
+    )
+    return RetrievalHit(chunk_ref=chunk, retrieval_source="hybrid", score=0.9)
+
+
+@unittest.skipUnless(SERVER_DEPS_AVAILABLE, "fastapi/uvicorn/requests not installed")
+class TestHTTPLLMBackend(unittest.TestCase):
+    def test_http_backend_matches_reference_server(self) -> None:
+        import uvicorn
+
+        from src.rag import llm_server
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            cfg = root / "config.yaml"
+            cfg.write_text(
+                f"""
+app:
+  version: \"0.1.0\"
+paths:
+  raw_data_dir: \"{root / 'raw'}\"
+  chunk_output_path: \"{root / 'chunks.jsonl'}\"
+  bm25_index_path: \"{root / 'bm25.pkl'}\"
+  dense_index_dir: \"{root / 'dense'}\"
+  eval_dataset_path: \"{root / 'eval.jsonl'}\"
+chunking:
+  chunk_size_tokens: 64
+  overlap_tokens: 10
+retrieval:
+  default_top_k: 5
+  fusion_method: \"weighted\"
+  lexical_weight: 0.5
+  dense_weight: 0.5
+  min_score_threshold: 0.1
+models:
+  embedding_model_name: \"hash://128\"
+  llm_backend: \"http\"
+  llm_server_backend: \"heuristic\"
+  llm_model_name: \"none\"
+  max_new_tokens: 64
+guardrails:
+  min_citation_coverage: 1.0
+""",
+                encoding="utf-8",
+            )
+            os.environ["APP_CONFIG_PATH"] = str(cfg)
+            llm_server.get_llm.cache_clear()
+
+            port = _free_port()
+            server = uvicorn.Server(uvicorn.Config(llm_server.create_llm_app(), host="127.0.0.1", port=port, log_level="error"))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            try:
+                deadline = time.monotonic() + 10
+                while not server.started and time.monotonic() < deadline:
+                    time.sleep(0.02)
+
+                hits = [_hit()]
+                expected = LocalLLM(backend="heuristic", model_name="none").generate("nghi phep?", "prompt", hits)
+                client = LocalLLM(backend="http", model_name="none", http_url=f"http://127.0.0.1:{port}")
+
+                generated = client.generate("nghi phep?", "prompt", hits)
+                self.assertEqual(generated.answer, expected.answer)
+                self.assertEqual(generated.citations, expected.citations)
+                self.assertFalse(generated.fallback)
+
+                streamed = "".join(client.generate_stream("nghi phep?", "prompt", hits))
+                self.assertEqual(streamed, expected.raw_output)
+                self.assertEqual(client.http_fallbacks, 0)
+            finally:
+                server.should_exit = True
+                thread.join(timeout=5)
+                llm_server.get_llm.cache_clear()
+
+    def test_unreachable_server_falls_back_to_heuristic(self) -> None:
+        client = LocalLLM(
+            backend="http",
+            model_name="none",
+            http_url=f"http://127.0.0.1:{_free_port()}",
+            http_timeout_s=1.0,
+            http_retries=0,
+        )
+        generated = client.generate("nghi phep?", "prompt", [_hit()])
+        self.assertEqual(generated.citations[0]["chunk_id"], "hr_leave-0-abc")
+        self.assertEqual(client.http_fallbacks, 1)
+
+        stream = client.generate_stream("nghi phep?", "prompt", [_hit()])
+        output = "".join(stream)
+        self.assertTrue(stream.fallback)
+        self.assertTrue(client.finish_stream("nghi phep?", "prompt", output, [_hit()], fallback=stream.fallback).fallback)
+
+    def test_server_side_fallback_reaches_the_client(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from src.rag import llm_server
+
+        server_llm = LocalLLM(backend="heuristic", model_name="none")
+        client = LocalLLM(backend="http", model_name="none", http_url="http://testserver")
+        with mock.patch.object(llm_server, "get_llm", return_value=server_llm), mock.patch.object(
+            server_llm, "generate", side_effect=lambda question, prompt, hits: server_llm._fallback_generate(question, hits)
+        ):
+            api = TestClient(llm_server.create_llm_app())
+            client._http.generate = lambda question, prompt, hits, timeout_s=None: api.post(
+                "/generate", json=client._http._payload(question, prompt, hits)
+            ).json()
+            generated = client.generate("nghi phep?", "prompt", [_hit()])
+        self.assertTrue(generated.fallback)
+        self.assertEqual(client.http_fallbacks, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import queue
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.common.deadline import Deadline
+from src.common.schemas import DocumentChunk, RetrievalHit
+from src.rag.local_llm import (
+    GenerationScheduler,
+    JsonCompletionTracker,
+    LocalLLM,
+    PrefixKVCache,
+    _stream_generation,
+    extract_first_json_object,
+)
+from src.rag.prompt import PROMPT_PREAMBLE, build_prompt, build_prompt_suffix
+
+
+class TestGenerationScheduler(unittest.TestCase):
+    def test_concurrent_prompts_are_batched_and_routed_back(self) -> None:
+        batch_sizes = []
+
+        def generate_batch(prompts, deadlines):
+            batch_sizes.append(len(prompts))
+            time.sleep(0.01)
+            return [f"out:{p}" for p in prompts]
+
+        scheduler = GenerationScheduler(generate_batch, max_batch_size=4, max_wait_ms=50)
+        results = {}
+
+        def worker(i: int) -> None:
+            results[i] = scheduler.submit(f"p{i}")
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {i: f"out:p{i}" for i in range(8)})
+        self.assertLessEqual(max(batch_sizes), 4)
+        self.assertLess(len(batch_sizes), 8)
+        stats = scheduler.stats()
+        self.assertEqual(stats["requests"], 8)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["mean_batch_size"], 1.0)
+
+    def test_batch_error_is_raised_to_each_caller(self) -> None:
+        def generate_batch(prompts, deadlines):
+            raise RuntimeError("boom")
+
+        scheduler = GenerationScheduler(generate_batch, max_batch_size=2, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            scheduler.submit("p")
+
+    def test_submit_gives_up_after_timeout(self) -> None:
+        release = threading.Event()
+
+        def generate_batch(prompts, deadlines):
+            release.wait(1.0)
+            return [f"out:{p}" for p in prompts]
+
+        scheduler = GenerationScheduler(generate_batch, max_batch_size=2, max_wait_ms=1)
+        self.assertIsNone(scheduler.submit("slow", timeout_s=0.02))
+        release.set()
+        self.assertEqual(scheduler.submit("next", timeout_s=1.0), "out:next")
+
+    def test_deadlines_reach_the_batch_and_expired_prompts_are_dropped(self) -> None:
+        seen = []
+
+        def generate_batch(prompts, deadlines):
+            seen.append((prompts, deadlines))
+            return [f"out:{p}" for p in prompts]
+
+        scheduler = GenerationScheduler(generate_batch, max_batch_size=2, max_wait_ms=1)
+        expired = Deadline(0.0)
+        self.assertIsNone(scheduler.submit("late", timeout_s=1.0, deadline=expired))
+        live = Deadline(5.0)
+        self.assertEqual(scheduler.submit("live", timeout_s=1.0, deadline=live), "out:live")
+        self.assertEqual(seen, [(["live"], [live])])
+        self.assertEqual(scheduler.stats()["requests"], 2)
+
+
+class _QueueStreamer:
+    # TextIteratorStreamer's contract: put() text, end() once, iterate until ended.
+    def __init__(self) -> None:
+        self.queue = queue.Queue()
+        self.ends = 0
+
+    def put(self, text: str) -> None:
+        self.queue.put(text)
+
+    def end(self) -> None:
+        self.ends += 1
+        self.queue.put(None)
+
+    def __iter__(self):
+        while (text := self.queue.get(timeout=2.0)) is not None:
+            yield text
+
+
+class TestStreamGeneration(unittest.TestCase):
+    def test_generate_error_ends_the_stream_and_is_raised(self) -> None:
+        def generate(streamer):
+            streamer.put("{")
+            raise RuntimeError("cuda out of memory")
+
+        streamer = _QueueStreamer()
+        pieces = []
+        with self.assertRaises(RuntimeError):
+            for piece in _stream_generation(generate, streamer, threading.Event()):
+                pieces.append(piece)
+        self.assertEqual(pieces, ["{"])
+        self.assertEqual(streamer.ends, 1)
+
+    def test_closing_the_stream_asks_generation_to_stop(self) -> None:
+        def generate(streamer):
+            while not stop.is_set():
+                streamer.put("x")
+                time.sleep(0.001)
+
+        stop = threading.Event()
+        stream = _stream_generation(generate, _QueueStreamer(), stop)
+        self.assertEqual(next(stream), "x")
+        stream.close()
+        self.assertTrue(stop.is_set())
+
+
+class TestPrefixKVCache(unittest.TestCase):
+    def test_prompt_starts_with_shared_preamble(self) -> None:
+        chunk = DocumentChunk(
+            doc_id="d1",
+            chunk_id="c1",
+            text="Nhan vien duoc nghi phep 12 ngay.",
+            title="hr leave",
+            section_path="HR > Leave",
+            department="HR",
+            updated_at="1970-01-01",
+            access_level="internal",
+        )
+        hits = [RetrievalHit(chunk_ref=chunk, retrieval_source="hybrid", score=0.9)]
+        prompt = build_prompt("Nghi phep bao nhieu ngay?", hits)
+        self.assertTrue(prompt.startswith(PROMPT_PREAMBLE))
+        self.assertEqual(prompt[len(PROMPT_PREAMBLE) :], build_prompt_suffix("Nghi phep bao nhieu ngay?", hits))
+
+    def test_prompt_without_prefix_is_a_miss(self) -> None:
+        cache = PrefixKVCache(model=None, tokenizer=None, prefix=PROMPT_PREAMBLE)
+        self.assertIsNone(cache.prepare("QUESTION:\nabc"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_concurrent_misses_are_all_counted(self) -> None:
+        cache = PrefixKVCache(model=None, tokenizer=None, prefix=PROMPT_PREAMBLE)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(cache.prepare, ["QUESTION:\nabc"] * 2000))
+        self.assertEqual(cache.stats()["misses"], 2000)
+
+
+class TestJsonEarlyStop(unittest.TestCase):
+    def test_tracker_completes_on_closing_brace_outside_strings(self) -> None:
+        tracker = JsonCompletionTracker()
+        pieces = ['{"answer": "dung {ngoac}', ' va \\"quote\\" }"', ', "citations": [{"chunk_id": "c1"}]', "}", " trailing"]
+        states = [tracker.feed(piece) for piece in pieces]
+        self.assertEqual(states, [False, False, False, True, True])
+
+    def test_tracker_completes_on_bare_not_found(self) -> None:
+        tracker = JsonCompletionTracker()
+        self.assertFalse(tracker.feed("  NOT_"))
+        self.assertTrue(tracker.feed("FOUND"))
+
+    def test_parse_uses_first_complete_object_after_prompt(self) -> None:
+        llm = LocalLLM(backend="heuristic", model_name="none")
+        prompt = "EVIDENCE:\n{not json}\n"
+        output = prompt + '{"answer": "12 ngay", "citations": [{"chunk_id": "c1"}]}\n{"answer": "other"}'
+        parsed = llm._parse_output(prompt, output, [])
+        self.assertEqual(parsed.answer, "12 ngay")
+        self.assertEqual(parsed.citations, [{"chunk_id": "c1"}])
+
+        not_found = llm._parse_output(prompt, prompt + "NOT_FOUND", [])
+        self.assertEqual(not_found.answer, "NOT_FOUND")
+        self.assertIsNone(extract_first_json_object("no object here"))
+
+
+if __name__ == "__main__":
+    unittest.main()
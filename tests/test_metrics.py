@@ -0,0 +1,40 @@
+import unittest
+
+from src.common.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_text_format(self) -> None:
+        registry = MetricsRegistry()
+        stages = registry.histogram("stage_seconds", "Stage latency.", ("stage",), buckets=(0.01, 0.1))
+        answers = registry.counter("answers_total", "Answers.", ("status",))
+        size = registry.gauge("index_size", "Index size.", ("index",))
+
+        stages.observe(0.005, stage="bm25")
+        stages.observe(0.05, stage="bm25")
+        stages.observe(3.0, stage="bm25")
+        answers.inc(status="NOT_FOUND")
+        answers.inc(2, status="ANSWERED")
+        size.set(128, index="dense")
+
+        text = registry.render()
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="bm25",le="0.01"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="bm25",le="0.1"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="bm25",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{stage="bm25"} 3', text)
+        self.assertIn('answers_total{status="ANSWERED"} 2', text)
+        self.assertIn('index_size{index="dense"} 128', text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_label_names_are_checked(self) -> None:
+        registry = MetricsRegistry()
+        counter = registry.counter("c_total", "C.", ("status",))
+        with self.assertRaises(ValueError):
+            counter.inc(stage="x")
+        with self.assertRaises(ValueError):
+            registry.counter("c_total", "Again.")
+
+
+if __name__ == "__main__":
+    unittest.main()
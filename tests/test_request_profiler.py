@@ -0,0 +1,113 @@
+import marshal
+import threading
+import time
+import unittest
+
+from src.common.profiling import ProfilerBusy, RequestProfiler, profile_worker
+
+
+def _busy_request(seconds: float) -> int:
+    total = 0
+    stop_at = time.perf_counter() + seconds
+    while time.perf_counter() < stop_at:
+        total += sum(range(100))
+    return total
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def _run_in_background(self, profiler: RequestProfiler, **kwargs) -> dict:
+        result: dict = {}
+
+        def target() -> None:
+            result["data"], result["session"] = profiler.run(**kwargs)
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        while not profiler.active:
+            time.sleep(0.001)
+        result["thread"] = thread
+        return result
+
+    def test_request_hook_is_a_no_op_without_session(self) -> None:
+        profiler = RequestProfiler()
+        with profiler.request():
+            _busy_request(0.001)
+        self.assertFalse(profiler.active)
+
+    def test_cprofile_mode_stops_after_requested_count(self) -> None:
+        profiler = RequestProfiler(max_seconds=5.0)
+        result = self._run_in_background(profiler, mode="cprofile", requests=2)
+        for _ in range(2):
+            with profiler.request():
+                _busy_request(0.01)
+        result["thread"].join(timeout=5.0)
+        self.assertEqual(result["session"].requests, 2)
+        stats = marshal.loads(result["data"])
+        self.assertIn("_busy_request", {func_name for _, _, func_name in stats})
+        self.assertFalse(profiler.active)
+
+    def test_sample_mode_returns_collapsed_request_stacks(self) -> None:
+        profiler = RequestProfiler(max_seconds=5.0, sample_interval_s=0.001)
+        result = self._run_in_background(profiler, mode="sample", requests=1)
+        with profiler.request():
+            _busy_request(0.2)
+        result["thread"].join(timeout=5.0)
+        lines = result["data"].decode("utf-8").splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any("_busy_request (" in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn(";", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_sample_mode_includes_helper_threads(self) -> None:
+        profiler = RequestProfiler(max_seconds=5.0, sample_interval_s=0.001)
+        result = self._run_in_background(profiler, mode="sample", requests=1)
+
+        def helper() -> None:
+            with profile_worker():
+                _busy_request(0.2)
+
+        with profiler.request():
+            thread = threading.Thread(target=helper)
+            thread.start()
+            thread.join()
+        result["thread"].join(timeout=5.0)
+        self.assertIn("helper (", result["data"].decode("utf-8"))
+
+    def test_stream_counts_once_and_profiles_each_step(self) -> None:
+        profiler = RequestProfiler(max_seconds=5.0)
+        result = self._run_in_background(profiler, mode="cprofile", requests=1)
+
+        def events():
+            for _ in range(3):
+                _busy_request(0.005)
+                yield "event"
+
+        stream = profiler.request_stream(events())
+        self.assertEqual(next(stream), "event")
+        # Later steps may run on another threadpool thread.
+        rest: list = []
+        thread = threading.Thread(target=lambda: rest.extend(stream))
+        thread.start()
+        thread.join()
+        result["thread"].join(timeout=5.0)
+        self.assertEqual(rest, ["event", "event"])
+        self.assertEqual(result["session"].requests, 1)
+        self.assertFalse(result["session"].threads)
+        stats = marshal.loads(result["data"])
+        self.assertIn("_busy_request", {func_name for _, _, func_name in stats})
+
+    def test_one_session_at_a_time(self) -> None:
+        profiler = RequestProfiler(max_seconds=5.0)
+        result = self._run_in_background(profiler, mode="cprofile", requests=1)
+        with self.assertRaises(ProfilerBusy):
+            profiler.run("sample", seconds=0.01)
+        with profiler.request():
+            pass
+        result["thread"].join(timeout=5.0)
+        with self.assertRaises(ValueError):
+            profiler.run("perf")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from src.app.semantic_cache import SemanticCache
+from src.common.schemas import AnswerPackage
+from src.indexing.dense_index import EmbeddingBackend
+
+
+class TestSemanticCache(unittest.TestCase):
+    def _cache(self, threshold: float, capacity: int = 4) -> SemanticCache:
+        return SemanticCache(EmbeddingBackend("hash://128"), capacity=capacity, threshold=threshold)
+
+    def test_near_duplicate_question_hits_within_same_scope(self) -> None:
+        cache = self._cache(threshold=0.6)
+        scope = (5, None, "internal", False)
+        package = AnswerPackage(answer_text="12 ngay", citations=[], confidence="High", status="ANSWERED")
+        cache.store("nghi phep hang nam", scope, package)
+
+        seen = []
+        cache.add_hit_listener(seen.append)
+        hit = cache.lookup("chinh sach nghi phep nam", scope)
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.answer_text, "12 ngay")
+        self.assertEqual(seen[0].cached_question, "nghi phep hang nam")
+
+        self.assertIsNone(cache.lookup("chinh sach nghi phep nam", (5, "HR", "internal", False)))
+        self.assertIsNone(cache.lookup("quy trinh phat hanh phan mem", scope))
+
+        cache.record_false_hit(seen[0])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["false_hits"]), (1, 2, 1))
+
+    def test_debug_hit_is_marked_with_the_cached_question(self) -> None:
+        cache = self._cache(threshold=0.6)
+        scope = (5, None, "internal", True)
+        package = AnswerPackage(answer_text="12 ngay", citations=[], confidence="High", status="ANSWERED")
+        package.debug = {"normalized_question": "nghi phep hang nam", "prompt": "..."}
+        cache.store("nghi phep hang nam", scope, package)
+
+        debug = cache.lookup("chinh sach nghi phep nam", scope).debug
+        self.assertTrue(debug["semantic_cache_hit"])
+        self.assertEqual(debug["cached_question"], "nghi phep hang nam")
+        self.assertEqual(debug["cached_debug"]["normalized_question"], "nghi phep hang nam")
+        self.assertNotIn("normalized_question", debug)
+
+    def test_ring_buffer_overwrites_oldest_entry(self) -> None:
+        cache = self._cache(threshold=0.99, capacity=2)
+        scope = (5, None, None, False)
+        for text in ("nghi phep", "bao hiem", "cong tac phi"):
+            cache.store(text, scope, AnswerPackage(answer_text=text, citations=[], confidence="Low", status="ANSWERED"))
+        self.assertIsNone(cache.lookup("nghi phep", scope))
+        self.assertEqual(cache.lookup("cong tac phi", scope).answer_text, "cong tac phi")
+        self.assertEqual(cache.stats()["entries"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
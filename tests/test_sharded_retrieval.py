@@ -0,0 +1,118 @@
+import gc
+import unittest
+
+import numpy as np
+
+from src.common.schemas import DocumentChunk
+from src.config.settings import load_settings
+from src.indexing.bm25_index import BM25Index, BM25Postings
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+from src.retrieval.bm25_retriever import BM25Retriever
+from src.retrieval.dense_retriever import DenseRetriever
+from src.retrieval.service import RetrievalRequest, RetrievalService
+from src.retrieval.sharding import ShardCoordinator, ShardedBM25Retriever, ShardedDenseRetriever, ShardSpec, shard_of
+
+DOCS = {
+    "hr_leave": ["Nhan vien duoc nghi phep 12 ngay moi nam.", "Nghi phep dai ngay can quan ly duyet truoc."],
+    "it_vpn": ["Ket noi VPN bang GlobalProtect truoc khi truy cap he thong noi bo."],
+    "sec_password": ["Mat khau phai duoc thay dinh ky moi 90 ngay.", "Mat khau it nhat 12 ky tu."],
+    "fin_expense": ["Chi phi cong tac can hoa don hop le.", "Hoa don nop trong 30 ngay."],
+    "eng_review": ["Pull request can it nhat mot reviewer phe duyet."],
+    "eng_onboarding": ["Ky su moi hoan thanh checklist onboarding trong 7 ngay dau."],
+    "ops_oncall": ["Truc on-call xoay vong hang tuan, phan hoi su co trong 15 phut."],
+}
+QUERIES = [
+    "nghi phep bao nhieu ngay",
+    "VPN GlobalProtect",
+    "mat khau thay doi",
+    "hoa don chi phi cong tac",
+    "reviewer pull request",
+    "onboarding ky su moi",
+]
+
+
+def _chunks() -> list:
+    chunks = []
+    for doc_id, texts in DOCS.items():
+        for i, text in enumerate(texts):
+            chunks.append(
+                DocumentChunk(
+                    doc_id=doc_id,
+                    chunk_id=f"{doc_id}-{i}",
+                    text=text,
+                    title=doc_id.replace("_", " "),
+                    section_path=doc_id.split("_")[0].upper(),
+                    department=doc_id.split("_")[0].upper(),
+                    updated_at="2024-01-01",
+                    access_level="restricted" if doc_id.startswith("sec") else "internal",
+                )
+            )
+    return chunks
+
+
+class TestShardedRetrieval(unittest.TestCase):
+    def setUp(self) -> None:
+        self.settings = load_settings("config/default.yaml")
+        self.backend = EmbeddingBackend("hash://64")
+        chunks = _chunks()
+        self.bm25 = BM25Index(chunks)
+        self.dense = DenseIndex.build(chunks, self.backend)
+        self.unsharded = RetrievalService(self.settings, BM25Retriever(self.bm25), DenseRetriever(self.dense, self.backend))
+
+    def _sharded(self, n_shards: int, executor: str) -> tuple:
+        coordinator = ShardCoordinator(self.bm25, self.dense, self.backend, n_shards, executor=executor)
+        service = RetrievalService(
+            self.settings,
+            ShardedBM25Retriever(coordinator),
+            ShardedDenseRetriever(coordinator),
+        )
+        return coordinator, service
+
+    def _assert_same(self, expected, actual) -> None:
+        self.assertEqual([h.chunk_ref.chunk_id for h in expected], [h.chunk_ref.chunk_id for h in actual])
+        np.testing.assert_allclose([h.score for h in expected], [h.score for h in actual], rtol=1e-5)
+
+    def test_partitioned_postings_keep_global_statistics(self) -> None:
+        full = BM25Postings.from_index(self.bm25)
+        doc_ids = np.array([i for i, chunk in enumerate(self.bm25.chunks) if shard_of(chunk.doc_id, 2) == 0])
+        shard = full.partition(doc_ids)
+        self.assertEqual(shard.n_docs, len(doc_ids))
+        np.testing.assert_array_equal(shard.idf, full.idf)
+        for query in QUERIES:
+            tokens = BM25Index._tokenize(query)
+            np.testing.assert_allclose(shard.scores(tokens), full.scores(tokens)[doc_ids])
+
+    def test_thread_shards_match_unsharded_retrieval(self) -> None:
+        coordinator, sharded = self._sharded(3, "thread")
+        try:
+            self.assertEqual(sum(coordinator.shard_sizes), len(self.bm25.chunks))
+            for query in QUERIES:
+                for access_level in (None, "internal"):
+                    expected, expected_debug = self.unsharded.retrieve(query, top_k=3, access_level=access_level)
+                    actual, actual_debug = sharded.retrieve(query, top_k=3, access_level=access_level)
+                    self._assert_same(expected_debug.bm25_hits, actual_debug.bm25_hits)
+                    self._assert_same(expected_debug.dense_hits, actual_debug.dense_hits)
+                    self._assert_same(expected, actual)
+            requests = [RetrievalRequest(query=q, top_k=2) for q in QUERIES]
+            for (expected, _), (actual, _) in zip(self.unsharded.retrieve_many(requests), sharded.retrieve_many(requests)):
+                self._assert_same(expected, actual)
+        finally:
+            coordinator.close()
+
+    def test_process_shards_match_unsharded_retrieval(self) -> None:
+        coordinator, sharded = self._sharded(2, "process")
+        try:
+            coordinator.warm()
+            # Partitions live in the shard processes only, not in this one.
+            gc.collect()
+            self.assertFalse([obj for obj in gc.get_objects() if isinstance(obj, ShardSpec)])
+            for query in QUERIES[:3]:
+                expected, _ = self.unsharded.retrieve(query, top_k=3)
+                actual, _ = sharded.retrieve(query, top_k=3)
+                self._assert_same(expected, actual)
+        finally:
+            coordinator.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
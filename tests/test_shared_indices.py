@@ -0,0 +1,113 @@
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.common.schemas import DocumentChunk
+from src.indexing.bm25_index import BM25Index
+from src.indexing.chunk_store import ChunkStore
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+
+
+def _chunks() -> list:
+    texts = [
+        ("hr", "Nhan vien duoc nghi phep 12 ngay moi nam, nghi phep can duyet truoc.", "HR > Leave", "internal"),
+        ("it", "Ket noi VPN bang GlobalProtect truoc khi truy cap he thong noi bo.", "IT > VPN", "public"),
+        ("sec", "Mat khau phai duoc thay dinh ky moi 90 ngay.", "Security > Password", "restricted"),
+        ("fin", "Chi phi cong tac can hoa don hop le va duyet cua quan ly.", "Finance > Expenses", "internal"),
+    ]
+    return [
+        DocumentChunk(
+            doc_id=doc_id,
+            chunk_id=f"{doc_id}-0",
+            text=text,
+            title=f"{doc_id} policy",
+            section_path=section,
+            department=doc_id.upper(),
+            updated_at="2024-01-01",
+            access_level=access,
+        )
+        for doc_id, text, section, access in texts
+    ]
+
+
+class TestSharedIndices(unittest.TestCase):
+    QUERIES = ["nghi phep bao nhieu ngay", "VPN GlobalProtect", "mat khau", "duyet hoa don chi phi", "khong lien quan"]
+
+    def _assert_same_hits(self, expected, actual) -> None:
+        self.assertEqual([h.chunk_ref.chunk_id for h in expected], [h.chunk_ref.chunk_id for h in actual])
+        np.testing.assert_allclose([h.score for h in expected], [h.score for h in actual], rtol=1e-6)
+
+    def test_mmapped_bm25_arrays_score_like_the_pickled_index(self) -> None:
+        chunks = _chunks()
+        original = BM25Index(chunks)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            original.save_arrays(Path(tmp_dir) / "bm25")
+            mapped = BM25Index.load_arrays(Path(tmp_dir) / "bm25", chunks, mmap=True)
+            self.assertIsInstance(mapped._postings.doc_ids, np.memmap)
+            for query in self.QUERIES:
+                self._assert_same_hits(original.search(query, top_k=4), mapped.search(query, top_k=4))
+                self._assert_same_hits(
+                    original.search(query, top_k=4, access_level="internal"),
+                    mapped.search(query, top_k=4, access_level="internal"),
+                )
+            batched = mapped.search_many(self.QUERIES, [3] * 5, [None] * 5, [None] * 5)
+            for query, hits in zip(self.QUERIES, batched):
+                self._assert_same_hits(original.search(query, top_k=3), hits)
+            with self.assertRaises(ValueError):
+                BM25Index.load_arrays(Path(tmp_dir) / "bm25", chunks[:2])
+
+    def test_mmapped_dense_index_is_read_only_and_matches(self) -> None:
+        backend = EmbeddingBackend("hash://64")
+        built = DenseIndex.build(_chunks(), backend)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            built.save(Path(tmp_dir) / "dense")
+            mapped = DenseIndex.load(Path(tmp_dir) / "dense", search_backend="numpy", mmap=True)
+            self.assertIsInstance(mapped.embeddings, np.memmap)
+            self.assertFalse(mapped.embeddings.flags.writeable)
+            for query in self.QUERIES:
+                self._assert_same_hits(built.search(query, top_k=3, backend=backend), mapped.search(query, top_k=3, backend=backend))
+
+    def test_mmapped_load_keeps_chunks_and_vocab_out_of_the_heap(self) -> None:
+        # What each worker allocates to load one version: with mmap the chunk
+        # text, metadata and BM25 vocabulary stay in the shared mapped files.
+        base = _chunks()
+        chunks = [
+            DocumentChunk(**{**chunk.to_dict(), "chunk_id": f"{chunk.chunk_id}-{i}", "text": f"{chunk.text} muc{i} dieu{i * 7}"})
+            for i in range(500)
+            for chunk in base
+        ]
+        backend = EmbeddingBackend("hash://64")
+        original = BM25Index(chunks)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            original.save_arrays(root / "bm25")
+            DenseIndex.build(chunks, backend).save(root / "dense")
+
+            def load(mmap: bool):
+                tracemalloc.start()
+                dense = DenseIndex.load(root / "dense", search_backend="numpy", mmap=mmap)
+                bm25 = BM25Index.load_arrays(root / "bm25", dense.chunks, mmap=mmap)
+                allocated = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                return bm25, allocated
+
+            copied, copied_bytes = load(mmap=False)
+            mapped, mapped_bytes = load(mmap=True)
+            self.assertIsInstance(mapped.chunks, ChunkStore)
+            self.assertNotIsInstance(mapped._postings.vocab, dict)
+            self.assertLess(mapped_bytes, copied_bytes / 20)
+            self.assertEqual(mapped.chunks[1234], copied.chunks[1234])
+            self.assertEqual(mapped.chunks[-3:], copied.chunks[-3:])
+            for query in self.QUERIES + ["muc42 dieu294"]:
+                self._assert_same_hits(copied.search(query, top_k=5), mapped.search(query, top_k=5))
+                self._assert_same_hits(
+                    copied.search(query, top_k=5, access_level="internal"),
+                    mapped.search(query, top_k=5, access_level="internal"),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
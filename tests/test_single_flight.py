@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+
+from src.app.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self) -> None:
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(1.0)
+            return {"answer": "ok"}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", compute)))
+        leader.start()
+        started.wait(1.0)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("k", compute))) for _ in range(3)]
+        for t in followers:
+            t.start()
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        self.assertEqual(flight.stats()["in_flight"], 1)
+        release.set()
+        for t in [leader, *followers]:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"answer": "ok"}] * 4)
+        self.assertEqual(len({id(r) for r in results}), 4)
+        self.assertEqual(flight.stats(), {"in_flight": 0, "executions": 1, "coalesced": 3})
+
+        flight.do("k", compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_errors_reach_every_waiter(self) -> None:
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(1.0)
+            raise RuntimeError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("k", fail)
+            except RuntimeError as exc:
+                errors.append(str(exc))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(1.0)
+        follower = threading.Thread(target=call)
+        follower.start()
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(errors, ["boom", "boom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import dataclasses
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.app.slow_query_log import SlowQueryLog
+from src.common.metrics import request_timings, stage_timer
+from src.config.settings import load_settings
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    def _log(self, tmp_dir: str, **overrides) -> SlowQueryLog:
+        settings = dataclasses.replace(
+            load_settings("config/default.yaml"),
+            slow_query_path=Path(tmp_dir) / "slow.jsonl",
+            **overrides,
+        )
+        return SlowQueryLog(settings)
+
+    def test_stage_timer_accumulates_only_inside_request_scope(self) -> None:
+        with stage_timer("bm25_search"):
+            pass
+        with request_timings() as timings:
+            with stage_timer("bm25_search"):
+                pass
+            with stage_timer("bm25_search"):
+                pass
+        self.assertEqual(list(timings), ["bm25_search"])
+        self.assertGreaterEqual(timings["bm25_search"], 0.0)
+
+    def test_reasons_cover_total_and_stage_thresholds(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = self._log(tmp_dir, slow_query_total_ms=1000.0, slow_query_stage_ms={"dense_search": 50.0})
+            self.assertEqual(log.reasons(0.2, {"dense_search": 0.01}), [])
+            self.assertEqual(log.reasons(1.5, {"dense_search": 0.01}), ["total"])
+            self.assertEqual(log.reasons(0.2, {"dense_search": 0.08, "bm25_search": 5.0}), ["dense_search"])
+            log.close()
+
+    def test_capture_writes_record_in_background(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = self._log(tmp_dir)
+            path = Path(tmp_dir) / "slow.jsonl"
+            self.assertFalse(path.exists())
+            log.capture(
+                "ask",
+                ["total"],
+                2.5,
+                {"llm_generation": 2.25},
+                {"question": "Nghi phep bao nhieu ngay?", "top_k": 3},
+                {"retrieval": {"fusion": {"lexical_weight": 0.5}}},
+            )
+            log.flush()
+            rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]["endpoint"], "ask")
+            self.assertEqual(rows[0]["total_ms"], 2500.0)
+            self.assertEqual(rows[0]["stage_ms"], {"llm_generation": 2250.0})
+            self.assertEqual(rows[0]["request"]["top_k"], 3)
+            self.assertEqual(rows[0]["retrieval"]["fusion"]["lexical_weight"], 0.5)
+            self.assertEqual(log.stats()["written"], 1)
+            log.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.common.profiling import StartupProfile
+from src.common.schemas import DocumentChunk
+from src.indexing.dense_index import DenseIndex, EmbeddingBackend
+
+
+class TestLazyLoading(unittest.TestCase):
+    def test_embedding_model_is_loaded_on_first_encode(self) -> None:
+        with mock.patch.dict(os.environ, {"DISABLE_EXTERNAL_MODELS": ""}):
+            backend = EmbeddingBackend("not-a-real/model")
+        self.assertIsNone(backend.load_duration_s)
+        vectors = backend.encode(["nghi phep"])
+        self.assertEqual(vectors.shape, (1, 384))
+        self.assertIsNotNone(backend.load_duration_s)
+
+    def test_numpy_dense_search_never_builds_faiss(self) -> None:
+        backend = EmbeddingBackend("hash://32")
+        chunk = DocumentChunk(
+            doc_id="d1",
+            chunk_id="c1",
+            text="nghi phep nam",
+            title="hr",
+            section_path="HR",
+            department="HR",
+            updated_at="1970-01-01",
+            access_level="public",
+        )
+        index = DenseIndex([chunk], backend.encode(["hr HR nghi phep nam"]), "hash://32", search_backend="numpy")
+        hits = index.search("nghi phep", top_k=1, backend=backend)
+        self.assertEqual(hits[0].chunk_ref.chunk_id, "c1")
+        self.assertIsNone(index.faiss_build_s)
+        self.assertIsInstance(index.embeddings, np.ndarray)
+
+
+class TestStartupProfile(unittest.TestCase):
+    def test_report_lists_stages_and_disabled_profile_records_nothing(self) -> None:
+        profile = StartupProfile()
+        profile.import_module("json")
+        with profile.stage("load settings"):
+            pass
+        profile.record("load bm25", 0.25)
+        profile.record("load embedding_model (lazy)", None)
+        report = profile.report()
+        self.assertIn("import json", report)
+        self.assertIn("load bm25", report)
+        self.assertNotIn("embedding_model", report)
+
+        disabled = StartupProfile(enabled=False)
+        with disabled.stage("x"):
+            pass
+        self.assertEqual(disabled.timings, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
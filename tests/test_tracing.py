@@ -0,0 +1,85 @@
+import contextvars
+import json
+import threading
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.common.tracing import NOOP_SPAN, configure_tracing, current_trace_id, get_tracer, start_span, trace_stream
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self) -> None:
+        configure_tracing(False, Path("unused"))
+
+    def test_disabled_tracing_yields_noop_span(self) -> None:
+        configure_tracing(False, Path("unused"))
+        with start_span("qa.ask") as span:
+            self.assertIs(span, NOOP_SPAN)
+            self.assertIsNone(current_trace_id())
+
+    def test_nested_spans_share_trace_and_export_to_jsonl(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "spans.jsonl"
+            configure_tracing(True, path)
+            with start_span("qa.ask", trace_id="a" * 32, top_k=3) as root:
+                with start_span("retrieval.bm25") as child:
+                    child.set_attribute("candidates", 7)
+                    self.assertEqual(current_trace_id(), "a" * 32)
+            with self.assertRaises(RuntimeError):
+                with start_span("answer.guardrails"):
+                    raise RuntimeError("boom")
+            get_tracer().exporter.flush()
+
+            rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            by_name = {row["name"]: row for row in rows}
+            self.assertEqual(by_name["retrieval.bm25"]["parent_id"], root.span_id)
+            self.assertEqual(by_name["retrieval.bm25"]["trace_id"], "a" * 32)
+            self.assertEqual(by_name["retrieval.bm25"]["attributes"]["candidates"], 7)
+            self.assertEqual(by_name["qa.ask"]["attributes"]["top_k"], 3)
+            self.assertIsNone(by_name["qa.ask"]["parent_id"])
+            self.assertEqual(by_name["answer.guardrails"]["status"], "error")
+            self.assertNotEqual(by_name["answer.guardrails"]["trace_id"], "a" * 32)
+
+    def test_stream_span_is_parent_of_steps_on_other_threads(self) -> None:
+        def events():
+            for i in range(3):
+                with start_span("step", index=i):
+                    pass
+                yield i
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "spans.jsonl"
+            configure_tracing(True, path)
+            stream = trace_stream("qa.ask", events())
+            # Like Starlette: each step on a threadpool thread in a fresh context copy.
+            for _ in range(2):
+                thread = threading.Thread(target=contextvars.copy_context().run, args=(next, stream))
+                thread.start()
+                thread.join()
+            stream.close()
+            get_tracer().exporter.flush()
+
+            rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            root = next(row for row in rows if row["name"] == "qa.ask")
+            steps = [row for row in rows if row["name"] == "step"]
+            self.assertEqual(len(steps), 2)
+            self.assertTrue(all(row["parent_id"] == root["span_id"] for row in steps))
+            self.assertTrue(root["attributes"]["closed_early"])
+            self.assertEqual(root["status"], "ok")
+
+    def test_file_rotates_at_max_bytes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "spans.jsonl"
+            configure_tracing(True, path, max_bytes=200, backup_count=2)
+            for i in range(20):
+                with start_span("stage", index=i):
+                    pass
+            get_tracer().exporter.flush()
+            self.assertTrue(path.with_name("spans.jsonl.1").exists())
+            self.assertTrue(path.with_name("spans.jsonl.2").exists())
+            self.assertFalse(path.with_name("spans.jsonl.3").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()